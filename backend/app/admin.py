@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import os
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.diagnostics import handle_tracer, loop_monitor, profiler
+from app.models.game import MAX_PLAYERS, MIN_PLAYERS, GameError, TournamentInfo
+from app.services.tournament import tournaments
+from app.websocket.drain import drain_controller
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+async def require_admin(authorization: str = Header(default="")) -> None:
+    """`Authorization: Bearer <ADMIN_TOKEN>` を検証する。ADMIN_TOKEN未設定時は管理APIを無効化する。"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.post("/drain")
+async def start_drain(exit: bool = False) -> dict[str, bool]:
+    """ドレインを開始する。exit=true の場合は完了後にプロセスを終了する。"""
+    drain_controller.start(exit_after=exit)
+    return {"draining": True}
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, le=120),
+    interval_ms: float = Query(default=5.0, ge=1, le=1000),
+) -> str:
+    """イベントループのスレッドを seconds 秒サンプリングし、collapsed形式のスタックを返す。
+
+    `flamegraph.pl` や speedscope にそのまま渡せる。同時に実行できるのは1つだけ。
+    """
+    thread_id = loop_monitor.loop_thread
+    if thread_id is None:
+        raise HTTPException(status_code=503, detail="Loop monitor is not running")
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    stacks = await asyncio.to_thread(
+        profiler.sample, thread_id, seconds, interval_ms / 1000
+    )
+    return profiler.collapsed(stacks)
+
+
+@router.get("/loop")
+async def loop_stats() -> dict[str, Any]:
+    """イベントループ遅延のヒストグラムと、直近のブロック（遅いコールバック）のスタックを返す。"""
+    return loop_monitor.report()
+
+
+@router.get("/slow-handlers")
+async def slow_handlers(
+    limit: int = Query(default=20, ge=1, le=200),
+) -> list[dict[str, Any]]:
+    """直近のイベント処理のうち遅いものを、Redisのコマンド数・往復回数とともに返す。"""
+    return handle_tracer.slowest(limit)
+
+
+@router.post("/tournaments")
+async def create_tournament(
+    rounds: int = Query(default=3, ge=1, le=20),
+    table_size: int = Query(default=MAX_PLAYERS, ge=MIN_PLAYERS, le=MAX_PLAYERS),
+) -> TournamentInfo:
+    """登録受付中のトーナメントを作成する。
+
+    トーナメントはこのワーカーのメモリ上にあるため、プレイヤーは ?room=<tournament_id> 付きで接続して
+    join_tournament を送る。
+    """
+    return tournaments.create(rounds, table_size).info()
+
+
+@router.post("/tournaments/{tournament_id}/start")
+async def start_tournament(tournament_id: str) -> TournamentInfo:
+    """登録を締め切り、最初のラウンドの全卓をまとめて開始する。"""
+    try:
+        return (await tournaments.begin(tournament_id)).info()
+    except GameError as e:
+        raise HTTPException(status_code=404 if e.code == "TOURNAMENT_NOT_FOUND" else 409, detail=e.message)
+
+
+@router.post("/tournaments/{tournament_id}/advance")
+async def advance_tournament(tournament_id: str) -> TournamentInfo:
+    """終わっていない卓をその時点の得点で打ち切り、すぐに次のラウンドへ進める。"""
+    try:
+        return (await tournaments.advance(tournament_id)).info()
+    except GameError as e:
+        raise HTTPException(status_code=404 if e.code == "TOURNAMENT_NOT_FOUND" else 409, detail=e.message)
@@ -0,0 +1,185 @@
+"""ゲームイベントの列形式ファイルからバランス調整用の統計を集計するCLI。
+
+使い方:
+    python -m app.cli.analytics analytics/                    # ディレクトリ内の全 .dcol
+    python -m app.cli.analytics analytics/events-2026*.dcol   # ファイルを指定
+    python -m app.cli.analytics analytics/ --json
+
+ファイルはブロックごとに読んで集計するため、アーカイブの大きさに関係なくメモリ使用量は一定。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.services.analytics import (
+    FILE_SUFFIX,
+    AnalyticsFormatError,
+    EventKind,
+    iter_blocks,
+)
+
+
+@dataclass
+class Stats:
+    blocks: int = 0
+    events: int = 0
+    # (kind, card) -> 件数
+    by_card: Counter[tuple[int, int]] = field(default_factory=Counter)
+    # card -> 横取り・バーストで動いたカードの枚数
+    stolen_cards: Counter[int] = field(default_factory=Counter)
+    lost_cards: Counter[int] = field(default_factory=Counter)
+    # 人数 -> 件数・合計
+    started: Counter[int] = field(default_factory=Counter)
+    finished: Counter[int] = field(default_factory=Counter)
+    turns: Counter[int] = field(default_factory=Counter)
+    duration_ms: Counter[int] = field(default_factory=Counter)
+
+    def add(self, block: dict) -> None:
+        kinds = block["kind"]
+        cards = block["card"]
+        players = block["players"]
+        counts = block["count"]
+        self.blocks += 1
+        self.events += len(kinds)
+        # 行の大半を占める DRAW は Counter でまとめて数え、1行ずつ見るのは件数の少ない種類だけにする
+        self.by_card.update(zip(kinds, cards))
+        kind_bytes = kinds.tobytes()
+        for i in _rows(kind_bytes, EventKind.STEAL):
+            self.stolen_cards[cards[i]] += counts[i]
+        for i in _rows(kind_bytes, EventKind.BURST):
+            self.lost_cards[cards[i]] += counts[i]
+        for i in _rows(kind_bytes, EventKind.GAME_START):
+            self.started[players[i]] += 1
+        for i in _rows(kind_bytes, EventKind.GAME_END):
+            self.finished[players[i]] += 1
+            self.turns[players[i]] += counts[i]
+            self.duration_ms[players[i]] += block["value"][i]
+
+    def report(self) -> dict:
+        cards = sorted({card for _, card in self.by_card if card >= 0})
+        per_card = {}
+        for card in cards:
+            draws = self.by_card[EventKind.DRAW, card]
+            bursts = self.by_card[EventKind.BURST, card]
+            steals = self.by_card[EventKind.STEAL, card]
+            skips = self.by_card[EventKind.SKIP_STEAL, card]
+            per_card[card] = {
+                "draws": draws,
+                "bursts": bursts,
+                "burst_rate": bursts / draws if draws else 0.0,
+                "steals": steals,
+                "steal_rate": steals / (steals + skips) if steals + skips else 0.0,
+                "stolen_cards": self.stolen_cards[card],
+                "lost_cards": self.lost_cards[card],
+            }
+
+        steals = sum(self.by_card[EventKind.STEAL, card] for card in cards)
+        skips = sum(self.by_card[EventKind.SKIP_STEAL, card] for card in cards)
+        finished = sum(self.finished.values())
+        by_players = {
+            players: {
+                "started": self.started[players],
+                "finished": self.finished[players],
+                "avg_turns": self.turns[players] / self.finished[players],
+                "avg_minutes": self.duration_ms[players] / self.finished[players] / 60000,
+            }
+            for players in sorted(self.finished)
+        }
+        return {
+            "events": self.events,
+            "games_started": sum(self.started.values()),
+            "games_finished": finished,
+            "steal": {
+                "steals": steals,
+                "skips": skips,
+                # 横取りできる場面で実際に横取りした割合
+                "rate": steals / (steals + skips) if steals + skips else 0.0,
+                "per_game": steals / finished if finished else 0.0,
+                "cards_per_steal": (
+                    sum(self.stolen_cards.values()) / steals if steals else 0.0
+                ),
+            },
+            "by_card": per_card,
+            "by_player_count": by_players,
+        }
+
+
+def _rows(kinds: bytes, kind: EventKind) -> Iterator[int]:
+    """kind 列（1行1バイト）から指定した種類の行番号を bytes.find で探す。"""
+    target = bytes([kind])
+    i = kinds.find(target)
+    while i >= 0:
+        yield i
+        i = kinds.find(target, i + 1)
+
+
+def _files(paths: list[str]) -> list[Path]:
+    files: list[Path] = []
+    for p in map(Path, paths):
+        files.extend(sorted(p.glob(f"*{FILE_SUFFIX}")) if p.is_dir() else [p])
+    return files
+
+
+def _print(report: dict) -> None:
+    print(
+        f"events={report['events']} games started={report['games_started']} "
+        f"finished={report['games_finished']}"
+    )
+    steal = report["steal"]
+    print(
+        f"steal: {steal['steals']} of {steal['steals'] + steal['skips']} chances "
+        f"({steal['rate']:.1%}), {steal['per_game']:.2f}/game, "
+        f"{steal['cards_per_steal']:.2f} cards/steal"
+    )
+
+    print(
+        f"\n{'card':>4} {'draws':>9} {'bursts':>8} {'burst%':>7} "
+        f"{'steals':>8} {'steal%':>7} {'stolen':>8} {'lost':>8}"
+    )
+    for card, row in report["by_card"].items():
+        print(
+            f"{card:>4} {row['draws']:>9} {row['bursts']:>8} {row['burst_rate']:>7.1%} "
+            f"{row['steals']:>8} {row['steal_rate']:>7.1%} "
+            f"{row['stolen_cards']:>8} {row['lost_cards']:>8}"
+        )
+
+    print(f"\n{'players':>7} {'started':>8} {'finished':>9} {'avg turns':>10} {'avg min':>8}")
+    for players, row in report["by_player_count"].items():
+        print(
+            f"{players:>7} {row['started']:>8} {row['finished']:>9} "
+            f"{row['avg_turns']:>10.1f} {row['avg_minutes']:>8.1f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ ゲームイベント集計ツール")
+    parser.add_argument("paths", nargs="+", help=f"{FILE_SUFFIX} ファイルまたはそれを含むディレクトリ")
+    parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    stats = Stats()
+    try:
+        for path in _files(args.paths):
+            for block in iter_blocks(path):
+                stats.add(block)
+    except (OSError, AnalyticsFormatError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    report = stats.report()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+    else:
+        _print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""終了したゲームのアーカイブ（SQLite）を参照するCLI。
+
+使い方:
+    python -m app.cli.archive games --limit 20                 # 最近終了したゲーム
+    python -m app.cli.archive player <player_id>               # プレイヤーの戦績
+    python -m app.cli.archive summary                          # 件数と期間
+    python -m app.cli.archive games --path archive/games.sqlite3
+
+サーバーの稼働中もWALモードのため読み出せる。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+from app.services.archive import connect
+
+
+def _time(ended_at: int) -> str:
+    return datetime.fromtimestamp(ended_at, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _games(conn: sqlite3.Connection, limit: int) -> None:
+    games = conn.execute(
+        "SELECT id, room_id, ended_at, player_count FROM games ORDER BY id DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    for game_id, room_id, ended_at, player_count in games:
+        results = conn.execute(
+            "SELECT nickname, score FROM results WHERE game_id = ? ORDER BY rank",
+            (game_id,),
+        ).fetchall()
+        print(json.dumps({
+            "room_id": room_id,
+            "ended_at": _time(ended_at),
+            "players": player_count,
+            "rankings": [{"player": nick, "score": score} for nick, score in results],
+        }, ensure_ascii=False))
+
+
+def _player(conn: sqlite3.Connection, player_id: str, limit: int) -> None:
+    rows = conn.execute(
+        "SELECT g.room_id, g.ended_at, g.player_count, r.rank, r.nickname, r.score"
+        " FROM results r JOIN games g ON g.id = r.game_id"
+        " WHERE r.player_id = ? ORDER BY g.id DESC LIMIT ?",
+        (player_id, limit),
+    ).fetchall()
+    for room_id, ended_at, player_count, rank, nickname, score in rows:
+        print(
+            f"{_time(ended_at)} {room_id} {nickname:<20} "
+            f"rank={rank}/{player_count} score={score}"
+        )
+    games, wins, total = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(rank = 1), 0), COALESCE(SUM(score), 0)"
+        " FROM results WHERE player_id = ?",
+        (player_id,),
+    ).fetchone()
+    print(f"games={games} wins={wins} total_score={total}")
+
+
+def _summary(conn: sqlite3.Connection) -> None:
+    games, first, last = conn.execute(
+        "SELECT COUNT(*), MIN(ended_at), MAX(ended_at) FROM games"
+    ).fetchone()
+    players = conn.execute(
+        "SELECT COUNT(DISTINCT player_id) FROM results WHERE player_id != ''"
+    ).fetchone()[0]
+    print(f"games={games} players={players}")
+    if games:
+        print(f"from={_time(first)} to={_time(last)}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ ゲームアーカイブ参照ツール")
+    parser.add_argument(
+        "--path",
+        default=os.getenv("ARCHIVE_PATH") or "archive/games.sqlite3",
+        help="アーカイブのSQLiteファイル",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    games = sub.add_parser("games", help="最近終了したゲームを表示する")
+    games.add_argument("--limit", type=int, default=20)
+    player = sub.add_parser("player", help="プレイヤーの戦績を表示する")
+    player.add_argument("player_id")
+    player.add_argument("--limit", type=int, default=20)
+    sub.add_parser("summary", help="件数と期間を表示する")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"error: {args.path} not found", file=sys.stderr)
+        return 1
+    try:
+        conn = connect(args.path)
+        try:
+            if args.command == "games":
+                _games(conn, args.limit)
+            elif args.command == "player":
+                _player(conn, args.player_id, args.limit)
+            else:
+                _summary(conn)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
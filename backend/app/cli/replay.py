@@ -0,0 +1,77 @@
+"""リプレイログからゲーム状態を再構築するCLI。
+
+使い方:
+    python -m app.cli.replay replays/ab12cd34.drpl            # 最終状態
+    python -m app.cli.replay replays/ab12cd34.drpl --step 40  # 40手目適用後の状態
+    python -m app.cli.replay replays/ab12cd34.drpl --trace    # 全ステップを1行ずつ出力
+    python -m app.cli.replay replays/*.drpl --bench           # 全ファイルの再生速度を計測
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+
+from app.services.replay_log import ReplayAction, ReplayError, ReplayGame
+
+
+def _print_state(game: ReplayGame) -> None:
+    state = game.snapshot().model_dump(mode="json")
+    state["step"] = game.step
+    state["finished"] = game.finished
+    print(json.dumps(state, ensure_ascii=False))
+
+
+def _trace(game: ReplayGame) -> None:
+    game.reset()
+    for action, player, card, count in game.records:
+        nickname = game.players[player] if player < len(game.players) else "-"
+        game.apply(action, player, card, count)
+        print(
+            f"{game.step:5d} {ReplayAction(action).name:<10} {nickname:<20} "
+            f"card={card:>2} count={count} -> phase={game.phase.value} "
+            f"current={game.current} deck={len(game.deck)}"
+        )
+
+
+def _bench(paths: list[str]) -> None:
+    games = [ReplayGame.load(p) for p in paths]
+    steps = sum(len(g) for g in games)
+    start = time.perf_counter()
+    for game in games:
+        game.reset()
+        game.seek(len(game))
+    elapsed = time.perf_counter() - start
+    rate = steps / elapsed if elapsed else float("inf")
+    print(f"games={len(games)} steps={steps} elapsed={elapsed:.4f}s steps/s={rate:,.0f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ リプレイツール")
+    parser.add_argument("paths", nargs="+", help="リプレイファイル（.drpl）")
+    parser.add_argument("--step", type=int, default=None, help="適用するレコード数")
+    parser.add_argument("--trace", action="store_true", help="全ステップを出力する")
+    parser.add_argument("--bench", action="store_true", help="再生速度を計測する")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.bench:
+            _bench(args.paths)
+            return 0
+        for path in args.paths:
+            game = ReplayGame.load(path)
+            if args.trace:
+                _trace(game)
+            else:
+                game.seek(len(game) if args.step is None else args.step)
+                _print_state(game)
+    except (OSError, ReplayError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
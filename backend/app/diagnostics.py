@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from types import FrameType
+from typing import Any
+
+from app.redis.instrumented import RedisCallCounter
+
+logger = logging.getLogger(__name__)
+
+# ループ遅延ヒストグラムのバケット上限（ミリ秒）。最後のバケットはそれ以上
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+def _stack(frame: FrameType | None) -> list[str]:
+    """根元から末端の順に並べたスタック。"""
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+# ---------------------------------------------------------------------------
+# イベントループの遅延
+# ---------------------------------------------------------------------------
+
+class LoopMonitor:
+    """イベントループの遅延を計測し、長時間ブロックしたコールバックのスタックを記録するクラス。
+
+    ループ上のタスクは interval ごとに sleep() の寝過ごし時間をヒストグラムへ記録する。
+    別スレッドのウォッチドッグはそのタスクが slow_callback_ms 以上戻ってこない場合に
+    ループのスレッドのスタックを取得する（ブロックしている最中のコールバックが分かる）。
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.5,
+        slow_callback_ms: float = 100.0,
+        max_slow_callbacks: int = 50,
+    ) -> None:
+        self.interval = interval
+        self.slow_callback_ms = slow_callback_ms
+        # 平滑化した遅延（悪化は即座に、回復はゆっくり反映する）
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.slow_callbacks: deque[dict[str, Any]] = deque(maxlen=max_slow_callbacks)
+        self._last_tick = time.monotonic()
+        self._reported_tick = 0.0
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    @property
+    def loop_thread(self) -> int | None:
+        return self._loop_thread
+
+    def start(self) -> None:
+        if self.interval <= 0:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.create_task(self._measure())
+        if self.slow_callback_ms > 0:
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self._last_tick = time.monotonic()
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+            self.histogram[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms > self.lag_ms:
+                self.lag_ms = lag_ms
+            else:
+                self.lag_ms = self.lag_ms * 0.7 + lag_ms * 0.3
+
+    def _watch(self) -> None:
+        threshold = self.interval + self.slow_callback_ms / 1000
+        while not self._stop.wait(self.slow_callback_ms / 2000):
+            last_tick = self._last_tick
+            blocked = time.monotonic() - last_tick
+            # 同じブロックは一度だけ記録する
+            if blocked < threshold or last_tick == self._reported_tick:
+                continue
+            self._reported_tick = last_tick
+            assert self._loop_thread is not None
+            stack = _stack(sys._current_frames().get(self._loop_thread))
+            blocked_ms = round((blocked - self.interval) * 1000, 1)
+            self.slow_callbacks.append(
+                {"ts": time.time(), "blocked_ms": blocked_ms, "stack": stack}
+            )
+            logger.warning(
+                "Event loop blocked",
+                extra={"blocked_ms": blocked_ms, "where": stack[-1] if stack else ""},
+            )
+
+    def report(self) -> dict[str, Any]:
+        labels = [f"<={b}ms" for b in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}ms"]
+        return {
+            "interval": self.interval,
+            "lag_ms": round(self.lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "histogram": dict(zip(labels, self.histogram)),
+            "slow_callbacks": list(self.slow_callbacks),
+        }
+
+
+# ---------------------------------------------------------------------------
+# サンプリングプロファイラー
+# ---------------------------------------------------------------------------
+
+class SamplingProfiler:
+    """別スレッドからイベントループのスレッドのスタックを定期的に採取するプロファイラー。
+
+    対象スレッドにはフックを入れないため、採取中もループ側のオーバーヘッドはほぼない。
+    結果は flamegraph.pl / speedscope がそのまま読める collapsed 形式
+    （"root;...;leaf 回数" を1行1スタック）で返す。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, thread_id: int, seconds: float, interval: float) -> Counter[str]:
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("profiler is already running")
+        try:
+            stacks: Counter[str] = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frame = sys._current_frames().get(thread_id)
+                if frame is not None:
+                    stacks[";".join(_stack(frame))] += 1
+                del frame
+                time.sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def collapsed(stacks: Counter[str]) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# ---------------------------------------------------------------------------
+# イベント処理の記録
+# ---------------------------------------------------------------------------
+
+class HandleTracer:
+    """直近の EventHandler.handle の所要時間とRedis呼び出し数を保持するクラス。"""
+
+    def __init__(self, size: int = 1000) -> None:
+        # (時刻, イベント, room_id, 所要時間ms, コマンド数, 往復回数)
+        self._records: deque[tuple[float, str, str, float, int, int]] = deque(maxlen=size)
+
+    def record(
+        self, event: str, room_id: str, elapsed: float, calls: RedisCallCounter
+    ) -> None:
+        self._records.append(
+            (time.time(), event, room_id, elapsed * 1000, calls.commands, calls.round_trips)
+        )
+
+    def slowest(self, limit: int) -> list[dict[str, Any]]:
+        return [
+            {
+                "ts": ts,
+                "event": event,
+                "room": room_id,
+                "latency_ms": round(latency_ms, 3),
+                "redis_commands": commands,
+                "redis_round_trips": round_trips,
+            }
+            for ts, event, room_id, latency_ms, commands, round_trips in heapq.nlargest(
+                limit, self._records, key=lambda r: r[3]
+            )
+        ]
+
+
+loop_monitor = LoopMonitor(
+    interval=float(os.getenv("LOOP_LAG_INTERVAL", "0.5")),
+    slow_callback_ms=float(os.getenv("SLOW_CALLBACK_MS", "100")),
+)
+profiler = SamplingProfiler()
+handle_tracer = HandleTracer(size=int(os.getenv("HANDLE_TRACE_SIZE", "1000")))
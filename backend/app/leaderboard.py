@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.models.game import LeaderboardEntry, PlayerRankPayload
+from app.services.leaderboard import leaderboard
+
+Board = Literal["global", "daily", "rolling"]
+
+router = APIRouter(prefix="/leaderboard")
+
+
+@router.get("")
+async def top_players(
+    board: Board = "global",
+    limit: int = Query(default=10, ge=1, le=100),
+) -> list[LeaderboardEntry]:
+    """ランキング上位 limit 件を返す。"""
+    return await leaderboard.top(board, limit)
+
+
+@router.get("/{player_id}")
+async def player_rank(
+    player_id: str,
+    board: Board = "global",
+    radius: int = Query(default=5, ge=0, le=25),
+) -> PlayerRankPayload:
+    """プレイヤーの順位と前後 radius 件のランキングを返す。"""
+    result = await leaderboard.rank(board, player_id, radius)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Player not ranked")
+    return result
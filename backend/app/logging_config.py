@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+# LogRecord標準の属性（これ以外は extra で渡された構造化フィールドとして出力する）
+_RESERVED = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコード1行のJSONで出力するフォーマッタ（リスナースレッド上で実行される）。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """フォーマッターを通さずにレコードをキューへ積むハンドラー。
+
+    標準のQueueHandlerは呼び出し元（イベントループ）でフォーマッターまで通すため、
+    呼び出し時点の値が必要なメッセージ本文（msg % args）だけをここで埋め込み、
+    JSONへのシリアライズ・例外の整形・I/OはQueueListenerのスレッドに任せる。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # args に渡された可変オブジェクトがリスナー側で整形されるまでに変わらないよう、先に文字列にする
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# ---------------------------------------------------------------------------
+# サンプリング
+# ---------------------------------------------------------------------------
+
+class LogSampler:
+    """イベント種別ごとに N 件に 1 件だけログを残す。
+
+    LOG_SAMPLE_RATES="draw_card=0.01,connect=0.1,default=1" の形式で設定する。
+    """
+
+    def __init__(self, spec: str = "") -> None:
+        self._every: dict[str, int] = {}
+        self._default = 1
+        self._counters: dict[str, int] = {}
+        for item in spec.split(","):
+            name, _, rate = item.strip().partition("=")
+            if not name or not rate:
+                continue
+            every = self._every_from_rate(float(rate))
+            if name == "default":
+                self._default = every
+            else:
+                self._every[name] = every
+
+    @staticmethod
+    def _every_from_rate(rate: float) -> int:
+        if rate <= 0:
+            return 0
+        return max(1, round(1 / rate))
+
+    def sample(self, event: str) -> bool:
+        every = self._every.get(event, self._default)
+        if every <= 1:
+            return every == 1
+        count = self._counters.get(event, 0) + 1
+        self._counters[event] = count
+        return count % every == 1
+
+
+log_sampler = LogSampler(os.getenv("LOG_SAMPLE_RATES", ""))
+
+
+def sampled(event: str) -> bool:
+    return log_sampler.sample(event)
+
+
+# ---------------------------------------------------------------------------
+# 接続単位のコンテキスト
+# ---------------------------------------------------------------------------
+
+class ContextLogger(logging.LoggerAdapter):  # type: ignore[type-arg]
+    """接続ごとに一度だけ作成し、room/player などのコンテキストを全ログに付与するアダプター。
+
+    ルーム移動時は bind() で extra を書き換えるだけで、呼び出しごとの辞書生成は行わない。
+    """
+
+    def bind(self, **context: Any) -> None:
+        self.extra.update(context)  # type: ignore[union-attr]
+
+    def process(
+        self, msg: Any, kwargs: MutableMapping[str, Any]
+    ) -> tuple[Any, MutableMapping[str, Any]]:
+        context = self.extra or {}
+        extra = kwargs.get("extra")
+        kwargs["extra"] = {**context, **extra} if extra else context
+        return msg, kwargs
+
+
+def bind_context(logger: logging.Logger, **context: Any) -> ContextLogger:
+    return ContextLogger(logger, context)
+
+
+# ---------------------------------------------------------------------------
+# 初期化
+# ---------------------------------------------------------------------------
+
+_listener: QueueListener | None = None
+
+
+def setup_logging() -> None:
+    """ルートロガー（とuvicornのロガー）をキュー経由の非同期出力に切り替える。
+
+    LOG_FORMAT=json（デフォルト）で構造化JSON、text で従来の1行テキストを出力する。
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json") == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(log_queue)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "info").upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uv_logger = logging.getLogger(name)
+        uv_logger.handlers = [handler]
+        uv_logger.propagate = False
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,18 +1,37 @@
 import json
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 import redis.asyncio as aioredis
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.websockets import WebSocketState
 
+from app import admin, leaderboard as leaderboard_api, room_state, tournament as tournament_api
+from app.diagnostics import handle_tracer, loop_monitor
+from app.logging_config import bind_context, sampled, setup_logging
 from app.redis.client import RedisClient
+from app.redis.instrumented import CountingRedis, count_redis_calls
+from app.services.analytics import analytics
+from app.services.archive import game_archive
 from app.services.game_service import GameService
+from app.services.leaderboard import leaderboard
+from app.services.matchmaking import matchmaker
+from app.services.replay_log import replay_recorder
+from app.services.state_feed import state_feed
+from app.services.tournament import tournaments
+from app.startup import startup
+from app.websocket.admission import admission
+from app.websocket.drain import drain_controller
 from app.websocket.handlers import EventHandler
+from app.websocket.heartbeat import heartbeat
+from app.websocket.manager import manager
 
-logging.basicConfig(level=os.getenv("LOG_LEVEL", "info").upper())
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -21,19 +40,62 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 redis_client: aioredis.Redis | None = None
+# ルーム単位のキーを振り分けるRedis（REDIS_SHARD_URLS未設定ならredis_clientのみ）
+redis_shards: dict[str, aioredis.Redis] = {}
+redis_store: RedisClient | None = None
+# 全接続で共有するサービス（接続ごとの状態は持たない）
+event_handler: EventHandler | None = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    global redis_client
+    global redis_client, redis_store, event_handler
     redis_url = (
         f"redis://:{os.getenv('REDIS_PASSWORD', '')}@"
         f"{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6379')}/0"
     )
-    redis_client = aioredis.from_url(redis_url, decode_responses=True)
-    logger.info("Redis connected")
+    # 管理APIでイベントごとのRedis呼び出し数を見られるよう、計測付きのクライアントを使う
+    redis_client = client = CountingRedis.from_url(redis_url, decode_responses=True)
+    for url in os.getenv("REDIS_SHARD_URLS", "").split(","):
+        if url.strip():
+            redis_shards[url.strip()] = CountingRedis.from_url(
+                url.strip(), decode_responses=True
+            )
+    redis_store = RedisClient(client, redis_shards)
+    logger.info("Redis connected", extra={"shards": len(redis_store.shards)})
+    # 接続確立とLuaスクリプトの読み込みはバックグラウンドで行い、ポートの待ち受けを遅らせない
+    startup.begin(redis_store)
+    await replay_recorder.start()
+    drain_controller.add_flush_hook(replay_recorder.flush)
+    await game_archive.start()
+    drain_controller.add_flush_hook(game_archive.flush)
+    await analytics.start()
+    drain_controller.add_flush_hook(analytics.flush)
+    # fly.io の kill_signal（SIGUSR1）でドレインしてから終了する
+    drain_controller.install_signal_handler()
+    game_service = GameService(redis_store, manager)
+    event_handler = EventHandler(game_service)
+    state_feed.start(game_service._build_game_state)
+    matchmaker.start(game_service)
+    tournaments.start(game_service)
+    leaderboard.start(redis_store)
+    heartbeat.start(event_handler)
+    loop_monitor.start()
     yield
-    await redis_client.aclose()
+    await startup.stop()
+    await loop_monitor.stop()
+    await heartbeat.stop()
+    await matchmaker.stop()
+    await tournaments.stop()
+    # ローカルのファイルに書き出すものを先に止め、Redisの障害で書き出しが失われないようにする
+    await replay_recorder.stop()
+    await game_archive.stop()
+    await analytics.stop()
+    await leaderboard.stop()
+    for shard in redis_shards.values():
+        await shard.aclose()
+    redis_shards.clear()
+    await client.aclose()
     logger.info("Redis disconnected")
 
 
@@ -57,59 +119,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-# ---------------------------------------------------------------------------
-# WebSocket 接続管理
-# ---------------------------------------------------------------------------
-
-class ConnectionManager:
-    def __init__(self) -> None:
-        # room_id -> {player_id -> WebSocket}
-        self.rooms: dict[str, dict[str, WebSocket]] = {}
-
-    async def connect(self, room_id: str, player_id: str, ws: WebSocket) -> None:
-        await ws.accept()
-        if room_id not in self.rooms:
-            self.rooms[room_id] = {}
-        self.rooms[room_id][player_id] = ws
-        logger.info("Connected: player=%s room=%s", player_id, room_id)
-
-    def disconnect(self, room_id: str, player_id: str) -> None:
-        if room_id in self.rooms:
-            self.rooms[room_id].pop(player_id, None)
-            if not self.rooms[room_id]:
-                del self.rooms[room_id]
-        logger.info("Disconnected: player=%s room=%s", player_id, room_id)
-
-    async def move_player(
-        self,
-        from_room: str,
-        to_room: str,
-        player_id: str,
-        ws: WebSocket,
-    ) -> None:
-        """プレイヤーをfrom_roomからto_roomに移動する（lobby→実ルームID）。"""
-        self.disconnect(from_room, player_id)
-        if to_room not in self.rooms:
-            self.rooms[to_room] = {}
-        self.rooms[to_room][player_id] = ws
-        logger.info("Moved: player=%s %s -> %s", player_id, from_room, to_room)
-
-    async def broadcast(self, room_id: str, message: dict) -> None:
-        if room_id not in self.rooms:
-            return
-        data = json.dumps(message, ensure_ascii=False)
-        for ws in list(self.rooms[room_id].values()):
-            try:
-                await ws.send_text(data)
-            except Exception:
-                pass
-
-    async def send_personal(self, ws: WebSocket, message: dict) -> None:
-        await ws.send_text(json.dumps(message, ensure_ascii=False))
-
-
-manager = ConnectionManager()
+app.include_router(admin.router)
+app.include_router(leaderboard_api.router)
+app.include_router(room_state.router)
+app.include_router(tournament_api.router)
 
 
 # ---------------------------------------------------------------------------
@@ -121,32 +134,72 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Redisへの接続とスクリプトの読み込みが済んでいれば200、それまでは503を返す。"""
+    report = startup.report()
+    if not report["ready"]:
+        return JSONResponse({"status": "starting", **report}, status_code=503)
+    return JSONResponse({"status": "ready", **report})
+
+
 @app.get("/rooms")
 async def list_rooms() -> list[dict]:
     """waitingステータスのルーム一覧を返す。"""
-    if redis_client is None:
+    if redis_store is None:
         return []
-    redis_c = RedisClient(redis_client)
-    return await redis_c.list_waiting_rooms()
+    return await redis_store.list_waiting_rooms()
 
 
 # ---------------------------------------------------------------------------
 # WebSocket エンドポイント
 # ---------------------------------------------------------------------------
 
+async def _is_seated(room_id: str, player_id: str) -> bool:
+    """player_id が room_id のルーム、またはトーナメントに登録済みかを返す。"""
+    tournament = tournaments.get(room_id)
+    if tournament is not None:
+        return player_id in tournament.entrants
+    if redis_store is None:
+        return False
+    try:
+        return await redis_store.get_nickname(room_id, player_id) is not None
+    except Exception:
+        logger.warning("Seat lookup failed", extra={"room": room_id}, exc_info=True)
+        return False
+
+
 @app.websocket("/ws/{player_id}")
 async def websocket_endpoint(ws: WebSocket, player_id: str) -> None:
     room_id = "lobby"
-    await manager.connect(room_id, player_id, ws)
-
-    assert redis_client is not None
-    redis_c = RedisClient(redis_client)
-    game_svc = GameService(redis_c, manager)
-    handler = EventHandler(game_svc)
-
+    ip = admission.client_ip(ws)
+    # ?room= のルームに席があればゲーム中の再接続（負荷が高くても席に戻れるようにする）。
+    # 席の確認はロビー接続を断る段階でだけ行う（通常時はRedisを引かない）
+    seat = ws.query_params.get("room")
+    reconnecting = bool(seat and admission.shedding_lobby and await _is_seated(seat, player_id))
+    reason = admission.check(ip, reconnecting=reconnecting)
+    if reason is not None:
+        await admission.reject(ws, reason)
+        return
+    admission.acquire(ip)
+    try:
+        await manager.connect(room_id, player_id, ws)
+    except Exception:
+        admission.release(ip)
+        raise
+    log = bind_context(logger, player=player_id, room=room_id)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    if drain_controller.draining:
+        await manager.send_personal(ws, drain_controller.payload())
+
+    assert event_handler is not None
+    handler = event_handler
+
+    heartbeat.register(ws, player_id)
     try:
         while True:
             raw = await ws.receive_text()
+            heartbeat.touch(ws)
             try:
                 event = json.loads(raw)
             except json.JSONDecodeError:
@@ -162,16 +215,39 @@ async def websocket_endpoint(ws: WebSocket, player_id: str) -> None:
                 )
                 continue
 
-            event_type: str = event.get("type", "")
-            logger.debug(
-                "Event: type=%s player=%s room=%s", event_type, player_id, room_id
-            )
+            # マッチメイキングでは受信ループの外でルームが変わるため、現在地を引き直す
+            current_room = manager.room_of(ws, room_id)
+            if current_room != room_id:
+                room_id = current_room
+                log.bind(room=room_id)
 
-            new_room_id = await handler.handle(ws, player_id, room_id, event)
+            event_type: str = event.get("type", "")
+            started = time.perf_counter()
+            with count_redis_calls() as calls:
+                new_room_id = await handler.handle(ws, player_id, room_id, event)
+            elapsed = time.perf_counter() - started
+            handle_tracer.record(event_type, room_id, elapsed, calls)
+            if debug_enabled and sampled(event_type):
+                log.debug(
+                    "Event handled",
+                    extra={
+                        "event": event_type,
+                        "latency_ms": round(elapsed * 1000, 3),
+                        "redis_commands": calls.commands,
+                    },
+                )
             if new_room_id:
                 room_id = new_room_id
+                log.bind(room=room_id)
 
     except WebSocketDisconnect:
-        manager.disconnect(room_id, player_id)
-        if room_id != "lobby":
-            await game_svc.handle_disconnect(player_id, room_id)
+        await handler.disconnect(ws, player_id, room_id)
+    except RuntimeError:
+        # ブロードキャストの送信に失敗した接続は Starlette が切断済みにするため、
+        # 次の受信が WebSocketDisconnect ではなく RuntimeError になる
+        if ws.application_state != WebSocketState.DISCONNECTED:
+            raise
+        await handler.disconnect(ws, player_id, room_id)
+    finally:
+        heartbeat.unregister(ws)
+        admission.release(ip)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import random
 from enum import Enum
 
 from pydantic import BaseModel, Field
@@ -18,6 +19,18 @@ MIN_PLAYERS = 2
 ROOM_TTL = 10800  # 3時間（秒）
 
 
+def build_deck(deck_size: int = 110, seed: int | None = None) -> list[int]:
+    """シャッフル済みの山札を返す。seedを指定すると同じ並びを再現できる。
+
+    山札はRedisのリスト末尾（RPOP）から引かれるため、引く順番はリストの逆順になる。
+    """
+    deck: list[int] = []
+    for card, count in CARD_DISTRIBUTION.items():
+        deck.extend([card] * count)
+    random.Random(seed).shuffle(deck)
+    return deck[:deck_size]  # 先頭から deck_size 枚に切り出す
+
+
 # ---------------------------------------------------------------------------
 # Enum
 # ---------------------------------------------------------------------------
@@ -28,6 +41,12 @@ class RoomStatus(str, Enum):
     FINISHED = "finished"
 
 
+class TournamentStatus(str, Enum):
+    REGISTERING = "registering"
+    RUNNING = "running"
+    FINISHED = "finished"
+
+
 class GamePhase(str, Enum):
     SCORE = "score"
     DRAW = "draw"
@@ -85,10 +104,40 @@ class ConfirmBurstPayload(BaseModel):
     pass
 
 
+class EndTurnPayload(BaseModel):
+    pass
+
+
 class LeaveRoomPayload(BaseModel):
     pass
 
 
+class WatchRoomPayload(BaseModel):
+    room_id: str
+
+
+class QuickPlayPayload(BaseModel):
+    nickname: str = Field(min_length=1, max_length=20)
+    max_players: int = Field(ge=MIN_PLAYERS, le=MAX_PLAYERS)
+
+
+class CancelQuickPlayPayload(BaseModel):
+    pass
+
+
+class PongPayload(BaseModel):
+    pass
+
+
+class JoinTournamentPayload(BaseModel):
+    tournament_id: str
+    nickname: str = Field(min_length=1, max_length=20)
+
+
+class LeaveTournamentPayload(BaseModel):
+    pass
+
+
 # ---------------------------------------------------------------------------
 # サーバー → クライアント ペイロード
 # ---------------------------------------------------------------------------
@@ -140,12 +189,19 @@ class TurnChangedPayload(BaseModel):
     current_player: str  # nickname
 
 
+class DrawHint(BaseModel):
+    burst_probability: float      # 手番プレイヤーが次の1枚でバーストする確率
+    steal_values: list[int]       # 引くと横取りできる数字
+    steal_probability: float      # 次の1枚が steal_values のいずれかである確率
+
+
 class GameStatePayload(BaseModel):
     fields: dict[str, list[int]]  # nickname → カードリスト
     deck_count: int
     scores: dict[str, int]        # nickname → スコア
     current_player: str           # nickname
     phase: GamePhase
+    hint: DrawHint | None = None  # 手番プレイヤーが次に引くときのヒント（STEAL・BURST中はNone）
 
 
 class PlayerRanking(BaseModel):
@@ -163,6 +219,97 @@ class ErrorPayload(BaseModel):
     code: str
 
 
+class RoomWatchedPayload(BaseModel):
+    room_id: str
+    status: RoomStatus
+    players: list[str]  # nicknames
+    spectator_count: int
+
+
+class MatchQueuedPayload(BaseModel):
+    max_players: int  # 待機中の人数別キュー
+
+
+class MatchFoundPayload(BaseModel):
+    room_id: str
+    nickname: str       # このルームでの自分のニックネーム（重複時は番号付きに変わる）
+    max_players: int
+    players: list[str]  # nicknames
+
+
+class TournamentJoinedPayload(BaseModel):
+    tournament_id: str
+    nickname: str
+    status: TournamentStatus
+    round: int                 # 現在のラウンド（登録受付中は0）
+    player_count: int          # 登録者数
+    room_id: str | None        # 進行中のラウンドで着席している卓（休み・ラウンド間はNone）
+
+
+class TournamentRoundPayload(BaseModel):
+    tournament_id: str
+    round: int                 # 1始まり
+    rounds: int
+    table: int                 # 卓番号（1始まり、前のラウンドの上位から順）
+
+
+class TournamentStanding(BaseModel):
+    rank: int                  # 1始まり
+    nickname: str
+    points: int                # 順位点の合計
+    score: int                 # ゲーム内スコアの合計（同点時の順位付けに使う）
+    games: int
+    wins: int
+
+
+class TournamentStandingsPayload(BaseModel):
+    tournament_id: str
+    round: int                 # 終了したラウンド
+    rounds: int
+    status: TournamentStatus
+    next_round_in_ms: int | None  # 次のラウンドの着席までの時間（終了時はNone）
+    standings: list[TournamentStanding]
+
+
+class ServerBusyPayload(BaseModel):
+    reason: str                # too_many_connections | capacity | overloaded
+    retry_after_ms: int        # 再接続までの待ち時間（クライアントごとにばらける）
+
+
+class ServerDrainingPayload(BaseModel):
+    reconnect_url: str | None  # Noneの場合は同じURLに再接続する
+    retry_after_ms: int        # 再接続までの待ち時間（クライアントごとにばらける）
+
+
+# ---------------------------------------------------------------------------
+# REST レスポンス
+# ---------------------------------------------------------------------------
+
+class LeaderboardEntry(BaseModel):
+    rank: int           # 1始まり
+    player_id: str
+    nickname: str       # 最後に記録されたニックネーム
+    score: int
+
+
+class PlayerRankPayload(BaseModel):
+    player_id: str
+    rank: int
+    score: int
+    neighbours: list[LeaderboardEntry]  # 前後 radius 件（本人を含む）
+
+
+class TournamentInfo(BaseModel):
+    tournament_id: str
+    status: TournamentStatus
+    round: int
+    rounds: int
+    table_size: int
+    player_count: int
+    tables_playing: int        # 現在のラウンドで終了していない卓の数
+    standings: list[TournamentStanding]
+
+
 # ---------------------------------------------------------------------------
 # 内部型
 # ---------------------------------------------------------------------------
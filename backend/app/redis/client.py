@@ -1,24 +1,86 @@
 from __future__ import annotations
 
-import random
+import asyncio
+import json
+from collections import Counter
+from collections.abc import Mapping
 
 import redis.asyncio as aioredis
 
+from app.hashring import HashRing
 from app.models.game import (
-    CARD_DISTRIBUTION,
     ROOM_TTL,
     GamePhase,
     RoomInfo,
     RoomStatus,
     TurnInfo,
+    build_deck,
 )
 
+# ターン順リングを1つ進め、まだ席のある（逆引きハッシュに残っている）次のプレイヤーを返す。
+# KEYS: [turn_order, turn, nickname_index]
+ADVANCE_TURN_SCRIPT = """
+local n = redis.call('LLEN', KEYS[1])
+if n == 0 then return false end
+local idx = tonumber(redis.call('HGET', KEYS[2], 'turn_idx') or '-1')
+for _ = 1, n do
+  idx = (idx + 1) % n
+  local nickname = redis.call('LINDEX', KEYS[1], idx)
+  if redis.call('HEXISTS', KEYS[3], nickname) == 1 then
+    redis.call('HSET', KEYS[2], 'turn_idx', idx)
+    return nickname
+  end
+end
+return false
+"""
+
+# 山札の末尾から1枚引き、残り枚数ハッシュの該当する数字を1減らす。
+# KEYS: [deck, remaining]
+DRAW_CARD_SCRIPT = """
+local card = redis.call('RPOP', KEYS[1])
+if card then redis.call('HINCRBY', KEYS[2], card, -1) end
+return card
+"""
+
 
 class RedisClient:
-    """Redisへの全読み書き操作を担当するクラス。"""
+    """Redisへの全読み書き操作を担当するクラス。
+
+    shards を渡すとルーム単位のキーを room_id のコンシステントハッシュで複数のRedisへ振り分ける。
+    ルームのキーはすべて {room_id} でハッシュタグ付けしているので、Redis Cluster でも同じ
+    スロットに載る。ランキング・マッチメイキングなどルームに属さないキーは redis（プライマリ）に置く。
+    """
 
-    def __init__(self, redis: aioredis.Redis) -> None:
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        shards: Mapping[str, aioredis.Redis] | None = None,
+    ) -> None:
         self.redis = redis
+        # シャード名（接続URL） -> クライアント。未指定ならプライマリのみの1シャード構成
+        self.shards: dict[str, aioredis.Redis] = dict(shards) if shards else {"primary": redis}
+        self._ring = HashRing(list(self.shards))
+        self._advance_turn_script = redis.register_script(ADVANCE_TURN_SCRIPT)
+        self._draw_card_script = redis.register_script(DRAW_CARD_SCRIPT)
+
+    def _node(self, room_id: str) -> aioredis.Redis:
+        """room_id のキーを保持するRedisを返す。"""
+        return self.shards[self._ring.node_for(room_id)]
+
+    async def warm_up(self) -> None:
+        """全シャードへ接続し、Luaスクリプトを読み込んでおく。
+
+        最初のゲームで接続確立（TCP/AUTH）や NOSCRIPT → SCRIPT LOAD の往復を待たせないため。
+        """
+        scripts = (ADVANCE_TURN_SCRIPT, DRAW_CARD_SCRIPT)
+        clients = {id(c): c for c in (self.redis, *self.shards.values())}.values()
+
+        async def warm(redis: aioredis.Redis) -> None:
+            await redis.ping()
+            for script in scripts:
+                await redis.script_load(script)
+
+        await asyncio.gather(*(warm(redis) for redis in clients))
 
     # ---------------------------------------------------------------------------
     # キー生成ヘルパー
@@ -26,31 +88,62 @@ class RedisClient:
 
     @staticmethod
     def _room_key(room_id: str) -> str:
-        return f"room:{room_id}"
+        return f"room:{{{room_id}}}"
 
     @staticmethod
     def _players_key(room_id: str) -> str:
-        return f"room:{room_id}:players"
+        return f"room:{{{room_id}}}:players"
 
     @staticmethod
     def _nicknames_key(room_id: str) -> str:
-        return f"room:{room_id}:nicknames"
+        return f"room:{{{room_id}}}:nicknames"
+
+    @staticmethod
+    def _nickname_index_key(room_id: str) -> str:
+        """nickname -> player_id の逆引きハッシュ。"""
+        return f"room:{{{room_id}}}:nickidx"
+
+    @staticmethod
+    def _turn_order_key(room_id: str) -> str:
+        return f"game:{{{room_id}}}:order"
 
     @staticmethod
     def _deck_key(room_id: str) -> str:
-        return f"game:{room_id}:deck"
+        return f"game:{{{room_id}}}:deck"
+
+    @staticmethod
+    def _remaining_key(room_id: str) -> str:
+        """数字 -> 山札に残っている枚数。"""
+        return f"game:{{{room_id}}}:remaining"
 
     @staticmethod
     def _field_key(room_id: str, nickname: str) -> str:
-        return f"game:{room_id}:field:{nickname}"
+        return f"game:{{{room_id}}}:field:{nickname}"
 
     @staticmethod
     def _scores_key(room_id: str) -> str:
-        return f"game:{room_id}:scores"
+        return f"game:{{{room_id}}}:scores"
 
     @staticmethod
     def _turn_key(room_id: str) -> str:
-        return f"game:{room_id}:turn"
+        return f"game:{{{room_id}}}:turn"
+
+    @staticmethod
+    def _leaderboard_key(board: str) -> str:
+        """global / day:{YYYYMMDD} / 7d などのランキング（ZSET、member=player_id）。
+
+        ランキングのキーは {lb} のハッシュタグで同じスロットに置く（合算・MULTIがクラスタでも使える）。
+        """
+        return f"{{lb}}:{board}"
+
+    @staticmethod
+    def _leaderboard_names_key() -> str:
+        return "{lb}:names"
+
+    @staticmethod
+    def _match_queue_key(worker: int, size: int) -> str:
+        """ワーカーごと・人数ごとのクイックプレイ待ち行列。"""
+        return f"mm:{worker}:queue:{size}"
 
     # ---------------------------------------------------------------------------
     # ルーム操作
@@ -62,16 +155,100 @@ class RedisClient:
         host_player_id: str,
         max_players: int,
     ) -> None:
+        redis = self._node(room_id)
         key = self._room_key(room_id)
-        await self.redis.hset(key, mapping={  # type: ignore[arg-type]
+        await redis.hset(key, mapping={  # type: ignore[arg-type]
             "status": RoomStatus.WAITING.value,
             "max_players": str(max_players),
             "host_player_id": host_player_id,
         })
-        await self.redis.expire(key, ROOM_TTL)
+        await redis.expire(key, ROOM_TTL)
+
+    async def create_rooms_bulk(
+        self,
+        rooms: list[tuple[str, int, list[tuple[str, str]]]],
+    ) -> None:
+        """(room_id, max_players, [(player_id, nickname), ...]) のルームをシャードごとに1往復でまとめて作成する。
+
+        先頭のプレイヤーをホストとする。
+        """
+        by_node: dict[str, list[tuple[str, int, list[tuple[str, str]]]]] = {}
+        for room in rooms:
+            by_node.setdefault(self._ring.node_for(room[0]), []).append(room)
+        await asyncio.gather(*(
+            self._create_rooms_on(self.shards[node], node_rooms)
+            for node, node_rooms in by_node.items()
+        ))
+
+    async def _create_rooms_on(
+        self,
+        redis: aioredis.Redis,
+        rooms: list[tuple[str, int, list[tuple[str, str]]]],
+    ) -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            for room_id, max_players, players in rooms:
+                room_key = self._room_key(room_id)
+                players_key = self._players_key(room_id)
+                nicknames_key = self._nicknames_key(room_id)
+                index_key = self._nickname_index_key(room_id)
+                pipe.hset(room_key, mapping={
+                    "status": RoomStatus.WAITING.value,
+                    "max_players": str(max_players),
+                    "host_player_id": players[0][0],
+                })
+                pipe.rpush(players_key, *[pid for pid, _ in players])
+                pipe.hset(nicknames_key, mapping=dict(players))
+                pipe.hset(index_key, mapping={nick: pid for pid, nick in players})
+                for key in (room_key, players_key, nicknames_key, index_key):
+                    pipe.expire(key, ROOM_TTL)
+            await pipe.execute()
+
+    async def begin_games_bulk(
+        self,
+        games: list[tuple[str, list[str], list[int]]],
+    ) -> None:
+        """(room_id, ターン順のnicknames, 山札) のゲームをシャードごとに1往復でまとめて開始状態にする。
+
+        ステータス・山札・得点・ターン順と、先頭プレイヤーの draw フェーズの手番を書き込む。
+        create_rooms_bulk で作ったばかりの（場にカードのない）ルーム向け。
+        """
+        by_node: dict[str, list[tuple[str, list[str], list[int]]]] = {}
+        for game in games:
+            by_node.setdefault(self._ring.node_for(game[0]), []).append(game)
+        await asyncio.gather(*(
+            self._begin_games_on(self.shards[node], node_games)
+            for node, node_games in by_node.items()
+        ))
+
+    async def _begin_games_on(
+        self,
+        redis: aioredis.Redis,
+        games: list[tuple[str, list[str], list[int]]],
+    ) -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            for room_id, nicknames, deck in games:
+                deck_key = self._deck_key(room_id)
+                remaining_key = self._remaining_key(room_id)
+                scores_key = self._scores_key(room_id)
+                order_key = self._turn_order_key(room_id)
+                turn_key = self._turn_key(room_id)
+                pipe.hset(self._room_key(room_id), "status", RoomStatus.PLAYING.value)
+                pipe.delete(deck_key, remaining_key, scores_key, order_key, turn_key)
+                pipe.rpush(deck_key, *[str(c) for c in deck])
+                pipe.hset(remaining_key, mapping=Counter(deck))  # type: ignore[arg-type]
+                pipe.hset(scores_key, mapping={nick: "0" for nick in nicknames})
+                pipe.rpush(order_key, *nicknames)
+                pipe.hset(turn_key, mapping={
+                    "turn_idx": "0",
+                    "current_nickname": nicknames[0],
+                    "phase": GamePhase.DRAW.value,
+                })
+                for key in (deck_key, remaining_key, scores_key, order_key, turn_key):
+                    pipe.expire(key, ROOM_TTL)
+            await pipe.execute()
 
     async def get_room(self, room_id: str) -> RoomInfo | None:
-        data = await self.redis.hgetall(self._room_key(room_id))
+        data = await self._node(room_id).hgetall(self._room_key(room_id))
         if not data:
             return None
         return RoomInfo(
@@ -82,36 +259,49 @@ class RedisClient:
         )
 
     async def set_room_status(self, room_id: str, status: RoomStatus) -> None:
-        await self.redis.hset(self._room_key(room_id), "status", status.value)
+        await self._node(room_id).hset(self._room_key(room_id), "status", status.value)
 
     async def delete_room(self, room_id: str) -> None:
-        nicknames = await self.get_all_nicknames(room_id)
+        redis = self._node(room_id)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hvals(self._nicknames_key(room_id))
+            # 途中で抜けたプレイヤーの場はターン順にだけ名前が残る
+            pipe.lrange(self._turn_order_key(room_id), 0, -1)
+            seated, order = await pipe.execute()
         keys = [
             self._room_key(room_id),
             self._players_key(room_id),
             self._nicknames_key(room_id),
+            self._nickname_index_key(room_id),
             self._deck_key(room_id),
+            self._remaining_key(room_id),
             self._scores_key(room_id),
             self._turn_key(room_id),
+            self._turn_order_key(room_id),
         ]
-        for nickname in nicknames:
+        for nickname in {*seated, *order}:
             keys.append(self._field_key(room_id, nickname))
-        if keys:
-            await self.redis.delete(*keys)
+        await redis.delete(*keys)
 
     async def list_waiting_rooms(self) -> list[dict]:
-        """waitingステータスのルーム一覧を返す。"""
+        """waitingステータスのルーム一覧を返す（全シャードを並行して走査する）。"""
+        per_shard = await asyncio.gather(
+            *(self._list_waiting_rooms_on(redis) for redis in self.shards.values())
+        )
+        return [room for rooms in per_shard for room in rooms]
+
+    async def _list_waiting_rooms_on(self, redis: aioredis.Redis) -> list[dict]:
         rooms = []
         cursor = 0
         while True:
-            cursor, keys = await self.redis.scan(cursor, match="room:*", count=100)
+            cursor, keys = await redis.scan(cursor, match="room:*", count=100)
             for key in keys:
                 # room:{room_id}:players などのサブキーを除外
                 parts = key.split(":")
                 if len(parts) != 2:
                     continue
-                room_id = parts[1]
-                data = await self.redis.hgetall(key)
+                room_id = parts[1].strip("{}")
+                data = await redis.hgetall(key)
                 if data.get("status") == RoomStatus.WAITING.value:
                     player_count = await self.get_player_count(room_id)
                     rooms.append({
@@ -133,115 +323,176 @@ class RedisClient:
         player_id: str,
         nickname: str,
     ) -> None:
-        await self.redis.rpush(self._players_key(room_id), player_id)  # type: ignore[arg-type]
-        await self.redis.hset(self._nicknames_key(room_id), player_id, nickname)
-        await self.redis.expire(self._players_key(room_id), ROOM_TTL)
-        await self.redis.expire(self._nicknames_key(room_id), ROOM_TTL)
+        async with self._node(room_id).pipeline(transaction=True) as pipe:
+            pipe.rpush(self._players_key(room_id), player_id)
+            pipe.hset(self._nicknames_key(room_id), player_id, nickname)
+            pipe.hset(self._nickname_index_key(room_id), nickname, player_id)
+            pipe.expire(self._players_key(room_id), ROOM_TTL)
+            pipe.expire(self._nicknames_key(room_id), ROOM_TTL)
+            pipe.expire(self._nickname_index_key(room_id), ROOM_TTL)
+            await pipe.execute()
 
     async def remove_player(self, room_id: str, player_id: str) -> None:
-        await self.redis.lrem(self._players_key(room_id), 0, player_id)
-        await self.redis.hdel(self._nicknames_key(room_id), player_id)
+        nickname = await self.get_nickname(room_id, player_id)
+        async with self._node(room_id).pipeline(transaction=True) as pipe:
+            pipe.lrem(self._players_key(room_id), 0, player_id)
+            pipe.hdel(self._nicknames_key(room_id), player_id)
+            if nickname is not None:
+                pipe.hdel(self._nickname_index_key(room_id), nickname)
+            await pipe.execute()
 
     async def get_player_ids(self, room_id: str) -> list[str]:
-        return await self.redis.lrange(self._players_key(room_id), 0, -1)
+        return await self._node(room_id).lrange(self._players_key(room_id), 0, -1)
 
     async def get_player_count(self, room_id: str) -> int:
-        return await self.redis.llen(self._players_key(room_id))
+        return await self._node(room_id).llen(self._players_key(room_id))
 
     async def get_nickname(self, room_id: str, player_id: str) -> str | None:
-        return await self.redis.hget(self._nicknames_key(room_id), player_id)
+        return await self._node(room_id).hget(self._nicknames_key(room_id), player_id)
 
     async def get_player_id_by_nickname(
         self, room_id: str, nickname: str
     ) -> str | None:
-        all_nicknames: dict[str, str] = await self.redis.hgetall(
-            self._nicknames_key(room_id)
-        )
-        for pid, nick in all_nicknames.items():
-            if nick == nickname:
-                return pid
-        return None
+        return await self._node(room_id).hget(self._nickname_index_key(room_id), nickname)
 
     async def get_all_nicknames(self, room_id: str) -> list[str]:
-        player_ids = await self.get_player_ids(room_id)
-        nicknames = []
-        for pid in player_ids:
-            nick = await self.get_nickname(room_id, pid)
-            if nick:
-                nicknames.append(nick)
-        return nicknames
+        """参加順のニックネーム一覧を返す（席順リストと名前ハッシュを1往復で取得する）。"""
+        async with self._node(room_id).pipeline(transaction=True) as pipe:
+            pipe.lrange(self._players_key(room_id), 0, -1)
+            pipe.hgetall(self._nicknames_key(room_id))
+            player_ids, names = await pipe.execute()
+        return [names[pid] for pid in player_ids if names.get(pid)]
+
+    async def get_nickname_index(self, room_id: str) -> dict[str, str]:
+        """nickname -> player_id の逆引きハッシュ全体を返す。"""
+        return await self._node(room_id).hgetall(  # type: ignore[no-any-return]
+            self._nickname_index_key(room_id)
+        )
 
     async def is_nickname_taken(self, room_id: str, nickname: str) -> bool:
-        all_nicks: dict[str, str] = await self.redis.hgetall(
-            self._nicknames_key(room_id)
+        return bool(
+            await self._node(room_id).hexists(self._nickname_index_key(room_id), nickname)
         )
-        return nickname in all_nicks.values()
 
-    async def get_next_player_nickname(
-        self, room_id: str, current_nickname: str
-    ) -> str:
-        nicknames = await self.get_all_nicknames(room_id)
-        if not nicknames:
-            return current_nickname
-        try:
-            idx = nicknames.index(current_nickname)
-        except ValueError:
-            return nicknames[0]
-        return nicknames[(idx + 1) % len(nicknames)]
+    # ---------------------------------------------------------------------------
+    # マッチメイキング
+    # ---------------------------------------------------------------------------
+
+    async def enqueue_match(
+        self, worker: int, size: int, player_id: str, nickname: str
+    ) -> None:
+        await self.redis.rpush(
+            self._match_queue_key(worker, size),
+            json.dumps([player_id, nickname], ensure_ascii=False),
+        )  # type: ignore[misc]
+
+    async def pop_match_batches(
+        self, worker: int, sizes: list[int]
+    ) -> dict[int, list[tuple[str, str]]]:
+        """各待ち行列から size の倍数ぶんだけ先頭から取り出す（2往復、待ち人数に依存しない）。"""
+        keys = [self._match_queue_key(worker, size) for size in sizes]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.llen(key)
+            lengths: list[int] = await pipe.execute()
+
+        takes = [
+            (size, key, length // size * size)
+            for size, key, length in zip(sizes, keys, lengths)
+            if length >= size
+        ]
+        if not takes:
+            return {}
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for _, key, count in takes:
+                pipe.lpop(key, count)
+            popped: list[list[str] | None] = await pipe.execute()
+
+        batches: dict[int, list[tuple[str, str]]] = {}
+        for (size, _, _), raw in zip(takes, popped):
+            if raw:
+                batches[size] = [tuple(json.loads(item)) for item in raw]  # type: ignore[misc]
+        return batches
+
+    async def requeue_matches(
+        self, worker: int, size: int, entries: list[tuple[str, str]]
+    ) -> None:
+        """マッチしなかった端数を順番を保ったまま待ち行列の先頭に戻す。"""
+        if not entries:
+            return
+        await self.redis.lpush(
+            self._match_queue_key(worker, size),
+            *[json.dumps(list(e), ensure_ascii=False) for e in reversed(entries)],
+        )  # type: ignore[misc]
 
     # ---------------------------------------------------------------------------
     # デッキ操作
     # ---------------------------------------------------------------------------
 
-    async def initialize_deck(self, room_id: str, deck_size: int = 110) -> None:
-        deck: list[int] = []
-        for card, count in CARD_DISTRIBUTION.items():
-            deck.extend([card] * count)
-        random.shuffle(deck)
-        deck = deck[:deck_size]  # 先頭から deck_size 枚に切り出す
+    async def initialize_deck(
+        self, room_id: str, deck_size: int = 110, seed: int | None = None
+    ) -> None:
+        redis = self._node(room_id)
+        deck = build_deck(deck_size, seed)
         key = self._deck_key(room_id)
-        await self.redis.delete(key)
-        await self.redis.rpush(key, *[str(c) for c in deck])  # type: ignore[arg-type]
-        await self.redis.expire(key, ROOM_TTL)
+        remaining_key = self._remaining_key(room_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key, remaining_key)
+            pipe.rpush(key, *[str(c) for c in deck])
+            pipe.hset(remaining_key, mapping=Counter(deck))  # type: ignore[arg-type]
+            pipe.expire(key, ROOM_TTL)
+            pipe.expire(remaining_key, ROOM_TTL)
+            await pipe.execute()
 
     async def draw_card(self, room_id: str) -> int | None:
-        val = await self.redis.rpop(self._deck_key(room_id))
+        val = await self._draw_card_script(
+            keys=[self._deck_key(room_id), self._remaining_key(room_id)],
+            client=self._node(room_id),
+        )
         if val is None:
             return None
         return int(val)
 
+    async def get_remaining_counts(self, room_id: str) -> dict[int, int]:
+        """山札に残っている数字ごとの枚数を返す（山札のリストを走査しない）。"""
+        raw: dict[str, str] = await self._node(room_id).hgetall(
+            self._remaining_key(room_id)
+        )
+        return {int(card): int(count) for card, count in raw.items()}
+
     async def get_deck_count(self, room_id: str) -> int:
-        return await self.redis.llen(self._deck_key(room_id))
+        return await self._node(room_id).llen(self._deck_key(room_id))
 
     # ---------------------------------------------------------------------------
     # フィールド（場）操作
     # ---------------------------------------------------------------------------
 
     async def get_field(self, room_id: str, nickname: str) -> list[int]:
-        raw = await self.redis.lrange(self._field_key(room_id, nickname), 0, -1)
+        raw = await self._node(room_id).lrange(self._field_key(room_id, nickname), 0, -1)
         return [int(v) for v in raw]
 
     async def add_to_field(self, room_id: str, nickname: str, card: int) -> None:
+        redis = self._node(room_id)
         key = self._field_key(room_id, nickname)
-        await self.redis.rpush(key, str(card))  # type: ignore[arg-type]
-        await self.redis.expire(key, ROOM_TTL)
+        await redis.rpush(key, str(card))  # type: ignore[arg-type]
+        await redis.expire(key, ROOM_TTL)
 
     async def clear_field(self, room_id: str, nickname: str) -> list[int]:
         key = self._field_key(room_id, nickname)
         cards = await self.get_field(room_id, nickname)
-        await self.redis.delete(key)
+        await self._node(room_id).delete(key)
         return cards
 
     async def remove_card_from_field(
         self, room_id: str, nickname: str, card: int
     ) -> None:
-        await self.redis.lrem(self._field_key(room_id, nickname), 1, str(card))
+        await self._node(room_id).lrem(self._field_key(room_id, nickname), 1, str(card))
 
     async def remove_all_of_card_from_field(
         self, room_id: str, nickname: str, card: int
     ) -> None:
         """指定した数字のカードをすべて場から削除する。"""
-        await self.redis.lrem(self._field_key(room_id, nickname), 0, str(card))
+        await self._node(room_id).lrem(self._field_key(room_id, nickname), 0, str(card))
 
     async def get_all_fields(self, room_id: str) -> dict[str, list[int]]:
         nicknames = await self.get_all_nicknames(room_id)
@@ -255,33 +506,101 @@ class RedisClient:
     # ---------------------------------------------------------------------------
 
     async def initialize_scores(self, room_id: str, nicknames: list[str]) -> None:
+        redis = self._node(room_id)
         key = self._scores_key(room_id)
-        await self.redis.delete(key)
+        await redis.delete(key)
         if nicknames:
             mapping = {nick: "0" for nick in nicknames}
-            await self.redis.hset(key, mapping=mapping)  # type: ignore[arg-type]
-        await self.redis.expire(key, ROOM_TTL)
+            await redis.hset(key, mapping=mapping)  # type: ignore[arg-type]
+        await redis.expire(key, ROOM_TTL)
 
     async def get_score(self, room_id: str, nickname: str) -> int:
-        val = await self.redis.hget(self._scores_key(room_id), nickname)
+        val = await self._node(room_id).hget(self._scores_key(room_id), nickname)
         return int(val) if val is not None else 0
 
     async def add_score(self, room_id: str, nickname: str, points: int) -> int:
-        val = await self.redis.hincrbyfloat(
-            self._scores_key(room_id), nickname, points
+        return int(
+            await self._node(room_id).hincrby(self._scores_key(room_id), nickname, points)
         )
-        return int(float(val))
 
     async def get_all_scores(self, room_id: str) -> dict[str, int]:
-        raw: dict[str, str] = await self.redis.hgetall(self._scores_key(room_id))
-        return {nick: int(float(score)) for nick, score in raw.items()}
+        raw: dict[str, str] = await self._node(room_id).hgetall(self._scores_key(room_id))
+        return {nick: int(score) for nick, score in raw.items()}
+
+    # ---------------------------------------------------------------------------
+    # ランキング
+    # ---------------------------------------------------------------------------
+
+    async def apply_leaderboard_results(
+        self,
+        results: list[tuple[str, str, int]],
+        day: str,
+        rolling_days: list[str],
+        day_ttl: int,
+        rebuild_rolling: bool,
+    ) -> None:
+        """(player_id, nickname, score) の結果を1往復でランキングへ加算する。
+
+        全期間・当日・rolling のZSETに加算する。rebuild_rolling の場合は rolling へは加算せず、
+        直近の日別ZSETを合算して作り直す（最も古い日を外す。メンバー数に比例するので日付が変わったときだけ）。
+        MULTI でまとめるので、他のワーカーの作り直しと加算が重なって二重に数えることはない。
+        """
+        day_key = self._leaderboard_key(f"day:{day}")
+        rolling_key = self._leaderboard_key(f"{len(rolling_days)}d")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for player_id, _, score in results:
+                pipe.zincrby(self._leaderboard_key("global"), score, player_id)
+                pipe.zincrby(day_key, score, player_id)
+                if not rebuild_rolling:
+                    pipe.zincrby(rolling_key, score, player_id)
+            if results:
+                pipe.hset(
+                    self._leaderboard_names_key(),
+                    mapping={player_id: nickname for player_id, nickname, _ in results},
+                )
+                pipe.expire(day_key, day_ttl)
+            if rebuild_rolling:
+                pipe.zunionstore(
+                    rolling_key, [self._leaderboard_key(f"day:{d}") for d in rolling_days]
+                )
+            await pipe.execute()
+
+    async def get_leaderboard_range(
+        self, board: str, start: int, stop: int
+    ) -> list[tuple[str, str, int]]:
+        """順位 start..stop（0始まり、両端含む）の (player_id, nickname, score) を返す。"""
+        entries: list[tuple[str, float]] = await self.redis.zrevrange(
+            self._leaderboard_key(board), start, stop, withscores=True
+        )
+        if not entries:
+            return []
+        names = await self.redis.hmget(
+            self._leaderboard_names_key(), [player_id for player_id, _ in entries]
+        )
+        return [
+            (player_id, name or "", int(score))
+            for (player_id, score), name in zip(entries, names)
+        ]
+
+    async def get_leaderboard_rank(
+        self, board: str, player_id: str
+    ) -> tuple[int, int] | None:
+        """(順位（0始まり）, スコア) を返す。未登録ならNone。"""
+        key = self._leaderboard_key(board)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(key, player_id)
+            pipe.zscore(key, player_id)
+            rank, score = await pipe.execute()
+        if rank is None:
+            return None
+        return int(rank), int(score)
 
     # ---------------------------------------------------------------------------
     # ターン操作
     # ---------------------------------------------------------------------------
 
     async def get_turn(self, room_id: str) -> TurnInfo | None:
-        data: dict[str, str] = await self.redis.hgetall(self._turn_key(room_id))
+        data: dict[str, str] = await self._node(room_id).hgetall(self._turn_key(room_id))
         if not data:
             return None
         drawn_card_val = data.get("drawn_card")
@@ -298,6 +617,7 @@ class RedisClient:
         phase: GamePhase,
         drawn_card: int | None = None,
     ) -> None:
+        redis = self._node(room_id)
         key = self._turn_key(room_id)
         mapping: dict[str, str] = {
             "current_nickname": current_nickname,
@@ -307,9 +627,33 @@ class RedisClient:
             mapping["drawn_card"] = str(drawn_card)
         else:
             # drawn_cardをリセット
-            await self.redis.hdel(key, "drawn_card")
-        await self.redis.hset(key, mapping=mapping)  # type: ignore[arg-type]
-        await self.redis.expire(key, ROOM_TTL)
+            await redis.hdel(key, "drawn_card")
+        await redis.hset(key, mapping=mapping)  # type: ignore[arg-type]
+        await redis.expire(key, ROOM_TTL)
+
+    async def initialize_turn_order(self, room_id: str, nicknames: list[str]) -> None:
+        """ゲーム開始時にターン順を保存し、先頭プレイヤーを現在の手番にする。"""
+        order_key = self._turn_order_key(room_id)
+        turn_key = self._turn_key(room_id)
+        async with self._node(room_id).pipeline(transaction=True) as pipe:
+            pipe.delete(order_key)
+            if nicknames:
+                pipe.rpush(order_key, *nicknames)
+            pipe.hset(turn_key, "turn_idx", "0")
+            pipe.expire(order_key, ROOM_TTL)
+            pipe.expire(turn_key, ROOM_TTL)
+            await pipe.execute()
+
+    async def advance_turn(self, room_id: str) -> str | None:
+        """ターン順で次の（切断していない）プレイヤーに手番を進め、そのニックネームを返す。"""
+        return await self._advance_turn_script(
+            keys=[
+                self._turn_order_key(room_id),
+                self._turn_key(room_id),
+                self._nickname_index_key(room_id),
+            ],
+            client=self._node(room_id),
+        )
 
     async def set_phase(self, room_id: str, phase: GamePhase) -> None:
-        await self.redis.hset(self._turn_key(room_id), "phase", phase.value)
+        await self._node(room_id).hset(self._turn_key(room_id), "phase", phase.value)
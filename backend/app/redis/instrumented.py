@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+
+
+class RedisCallCounter:
+    """1回の処理で発行したRedisコマンド数と往復回数。"""
+
+    __slots__ = ("commands", "round_trips")
+
+    def __init__(self) -> None:
+        self.commands = 0
+        self.round_trips = 0
+
+
+_counter: ContextVar[RedisCallCounter | None] = ContextVar("redis_call_counter", default=None)
+
+
+@contextmanager
+def count_redis_calls() -> Iterator[RedisCallCounter]:
+    """ブロック内（同じコンテキストで実行されるコルーチン）のRedis呼び出しを数える。"""
+    counter = RedisCallCounter()
+    token = _counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _counter.reset(token)
+
+
+class CountingPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        counter = _counter.get()
+        if counter is not None and self.command_stack:
+            counter.commands += len(self.command_stack)
+            counter.round_trips += 1
+        return await super().execute(raise_on_error)
+
+
+class CountingRedis(aioredis.Redis):
+    """count_redis_calls() の内側で発行されたコマンドを数えるRedisクライアント。
+
+    カウンターが設定されていない場合のオーバーヘッドはContextVarの参照1回だけ。
+    """
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        counter = _counter.get()
+        if counter is not None:
+            counter.commands += 1
+            counter.round_trips += 1
+        return await super().execute_command(*args, **options)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> CountingPipeline:
+        return CountingPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+
+from app.routing import owns_room
+from app.services.state_feed import STATE_POLL_TIMEOUT, state_feed
+
+router = APIRouter(prefix="/rooms")
+
+
+@router.get("/{room_id}/state")
+async def room_state(
+    room_id: str,
+    since: int | None = Query(default=None),
+    timeout: float = Query(default=STATE_POLL_TIMEOUT, gt=0, le=STATE_POLL_TIMEOUT),
+    if_none_match: str = Header(default=""),
+) -> Response:
+    """ゲーム中のルームの GameStatePayload を返す（WebSocketを使えないクライアント・デバッグ用）。
+
+    ETag はルームの状態のバージョンで、If-None-Match が一致すれば304を返す。
+    since=<バージョン> を付けると、状態がそのバージョンから変わるまで最大 timeout 秒待ってから返す
+    （変わらなければ304）。
+    """
+    if not owns_room(room_id):
+        # 変更通知は担当ワーカーでしか起きないので、ここで返すと古い状態をキャッシュし続ける
+        raise HTTPException(status_code=421, detail="Room is served by another worker")
+    version, body = await state_feed.snapshot(room_id)
+    if body is not None and since == version:
+        await state_feed.wait(room_id, since, timeout)
+        version, body = await state_feed.snapshot(room_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Game not in progress")
+
+    headers = {"ETag": f'"{version}"', "Cache-Control": "no-cache"}
+    if since == version or if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
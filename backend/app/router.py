@@ -0,0 +1,271 @@
+"""マルチワーカー起動用のフロントルーター。
+
+    python -m app.router
+
+WEB_WORKERS 個の uvicorn ワーカー（WORKER_INDEX 付きの python -m app.router）を
+127.0.0.1:{WORKER_BASE_PORT + i} で起動し、PORT で受けた接続をリクエスト先頭のURLで振り分ける。
+
+- ``?room=<room_id>`` 付きの接続・``/rooms/<room_id>/...`` へのリクエスト:
+  コンシステントハッシュでルームの担当ワーカーへ
+  （同じルームのプレイヤーと状態のポーリングは必ず同じワーカーに集まる）
+- それ以外（ロビー接続・/health・/rooms など）: 接続数が最も少ないワーカーへ
+
+振り分けは接続単位で、以降のバイト列（WebSocketフレームを含む）はそのまま中継する。
+WebSocket以外のHTTPリクエストは Connection: close で1リクエストごとに接続を閉じさせ、次のリクエストを振り分け直す。
+SIGUSR1 は全ワーカーに転送され（ドレイン）、全ワーカーの終了後にルーターも終了する。
+WEB_WORKERS=1 の場合はルーターを挟まず、このプロセスのまま uvicorn を起動する
+（execし直すとインタープリターの起動と import をもう一度待つことになり、コールドスタートが遅くなる）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from app.logging_config import setup_logging
+from app.routing import TRUST_PROXY_HEADERS, WORKER_COUNT, worker_for_room
+
+setup_logging()
+logger = logging.getLogger("app.router")
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKER_HOST = "127.0.0.1"
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "8001"))
+MAX_HEAD_SIZE = 64 * 1024
+RESTART_DELAY = 1.0
+
+BAD_GATEWAY = (
+    b"HTTP/1.1 502 Bad Gateway\r\n"
+    b"content-length: 0\r\n"
+    b"connection: close\r\n\r\n"
+)
+
+
+def _serve(host: str, port: int) -> None:
+    """このプロセスで uvicorn を起動する（単体起動・各ワーカー共通）。"""
+    # マルチワーカー時のルーターは uvicorn を import しない
+    import uvicorn  # noqa: PLC0415
+
+    from app.websocket.compression import websocket_protocol  # noqa: PLC0415
+
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        # ログは setup_logging() の設定をそのまま使う
+        log_config=None,
+        # 生存確認はアプリのハートビート（app.websocket.heartbeat）がまとめて行う。
+        # websockets のキープアライブは接続ごとにタスクとタイマーを持つので無効にする
+        ws_ping_interval=None,
+        ws_ping_timeout=None,
+        # permessage-deflate は WS_COMPRESSION_* の設定で組み立てたプロトコルクラス側で有効にする
+        ws=websocket_protocol(),
+        ws_per_message_deflate=False,
+    )
+
+
+def room_from_target(target: str) -> str | None:
+    """リクエストターゲット（パス+クエリ）からルームIDを取り出す。"""
+    parts = urlsplit(target)
+    path, query = parts.path, parts.query
+    # /rooms/{room_id}/state などルーム単位のREST（状態の変更通知は担当ワーカーのプロセス内にしかない）。
+    # トーナメントも作成したワーカーのメモリ上にしかないため、IDで同じワーカーに振り分ける
+    for prefix in ("/rooms/", "/tournaments/", "/admin/tournaments/"):
+        if path.startswith(prefix):
+            room_id = path[len(prefix):].partition("/")[0]
+            if room_id:
+                return room_id
+    if not query:
+        return None
+    rooms = parse_qs(query).get("room")
+    return rooms[0] if rooms else None
+
+
+# クライアントIPを名乗るヘッダー（ルーターが付け直すもの以外はワーカーに渡さない）
+FORWARDING_HEADERS = (b"x-forwarded-for", b"forwarded", b"fly-client-ip")
+# HTTPリクエスト（WebSocket以外）ではキープアライブを使わせないため、付け直す
+CONNECTION_HEADERS = (b"connection", b"keep-alive")
+
+
+def _header(headers: bytes, name: bytes) -> bytes | None:
+    """リクエストヘッダー部から name（小文字）の最初の値を返す。"""
+    for line in headers.split(b"\r\n"):
+        key, sep, value = line.partition(b":")
+        if sep and key.strip().lower() == name:
+            return value.strip()
+    return None
+
+
+def _strip_headers(headers: bytes, names: tuple[bytes, ...]) -> bytes:
+    """リクエストヘッダー部（末尾の空行を含む）から names（小文字）のヘッダーを取り除く。"""
+    lines = headers.split(b"\r\n")
+    kept = [
+        line for line in lines
+        if line.partition(b":")[0].strip().lower() not in names
+    ]
+    return headers if len(kept) == len(lines) else b"\r\n".join(kept)
+
+
+class Router:
+    """ワーカープロセスの監視と接続の振り分けを行うクラス。"""
+
+    def __init__(self, worker_count: int) -> None:
+        self.worker_count = worker_count
+        self.active = [0] * worker_count
+        self.processes: list[asyncio.subprocess.Process | None] = [None] * worker_count
+        self.stopping = asyncio.Event()
+        self.draining = False
+
+    # ---------------------------------------------------------------------------
+    # ワーカー管理
+    # ---------------------------------------------------------------------------
+
+    async def _supervise(self, index: int) -> None:
+        env = {
+            **os.environ,
+            "WEB_WORKERS": str(self.worker_count),
+            "WORKER_INDEX": str(index),
+            "HOST": WORKER_HOST,
+            "PORT": str(WORKER_BASE_PORT + index),
+        }
+        while not self.stopping.is_set():
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "app.router", env=env
+            )
+            self.processes[index] = proc
+            code = await proc.wait()
+            if self.stopping.is_set():
+                break
+            if self.draining:
+                if all(p is None or p.returncode is not None for p in self.processes):
+                    self.stopping.set()
+                break
+            logger.warning("Worker exited: index=%d code=%s (restarting)", index, code)
+            await asyncio.sleep(RESTART_DELAY)
+
+    def _drain(self) -> None:
+        self.draining = True
+        for proc in self.processes:
+            if proc is not None and proc.returncode is None:
+                proc.send_signal(signal.SIGUSR1)
+
+    async def _terminate_workers(self) -> None:
+        for proc in self.processes:
+            if proc is not None and proc.returncode is None:
+                proc.send_signal(signal.SIGTERM)
+        for proc in self.processes:
+            if proc is not None:
+                await proc.wait()
+
+    # ---------------------------------------------------------------------------
+    # 振り分け
+    # ---------------------------------------------------------------------------
+
+    def pick_worker(self, target: str) -> int:
+        room_id = room_from_target(target)
+        if room_id:
+            return worker_for_room(room_id)
+        return min(range(self.worker_count), key=self.active.__getitem__)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        request_line, _, rest = head.partition(b"\r\n")
+        parts = request_line.split(b" ")
+        target = parts[1].decode("latin-1") if len(parts) >= 2 else "/"
+        index = self.pick_worker(target)
+
+        try:
+            up_reader, up_writer = await asyncio.open_connection(
+                WORKER_HOST, WORKER_BASE_PORT + index, limit=MAX_HEAD_SIZE
+            )
+        except OSError:
+            writer.write(BAD_GATEWAY)
+            await writer.drain()
+            writer.close()
+            return
+
+        # 実クライアントのIPをワーカーへ渡す（uvicornのproxy-headersで解釈される）。
+        # クライアントが送ってきた転送ヘッダーは詐称できるので、付け替える前に取り除く
+        peer = writer.get_extra_info("peername")
+        client_ip = peer[0].encode() if peer else b""
+        forwarded = b"\r\nX-Forwarded-For: " + client_ip
+        edge_ip = _header(rest, b"fly-client-ip") if TRUST_PROXY_HEADERS else None
+        if edge_ip:
+            # エッジが付けたクライアントIPはそのまま渡す（admission.client_ip が参照する）
+            forwarded = b"\r\nX-Forwarded-For: " + edge_ip + b"\r\nfly-client-ip: " + edge_ip
+        stripped: tuple[bytes, ...] = FORWARDING_HEADERS
+        if _header(rest, b"upgrade") is None:
+            # 振り分けは接続の最初のリクエストで1回だけ決まるので、キープアライブで
+            # 別のルームへのリクエストが続くと担当でないワーカーに届く。
+            # WebSocket以外は1リクエストごとに閉じさせ、次のリクエストを振り分け直す
+            stripped += CONNECTION_HEADERS
+            forwarded += b"\r\nConnection: close"
+        up_writer.write(
+            request_line + forwarded + b"\r\n" + _strip_headers(rest, stripped)
+        )
+
+        self.active[index] += 1
+        try:
+            await asyncio.gather(
+                _pipe(reader, up_writer), _pipe(up_reader, writer)
+            )
+        finally:
+            self.active[index] -= 1
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+        loop.add_signal_handler(signal.SIGUSR1, self._drain)
+
+        supervisors = [
+            asyncio.create_task(self._supervise(i)) for i in range(self.worker_count)
+        ]
+        server = await asyncio.start_server(
+            self._handle, HOST, PORT, limit=MAX_HEAD_SIZE
+        )
+        logger.info(
+            "Router listening on %s:%d (workers=%d)", HOST, PORT, self.worker_count
+        )
+        async with server:
+            await self.stopping.wait()
+        await self._terminate_workers()
+        await asyncio.gather(*supervisors, return_exceptions=True)
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+def main() -> None:
+    # ルーターが起動したワーカーには WORKER_INDEX が渡される
+    if WORKER_COUNT == 1 or os.getenv("WORKER_INDEX") is not None:
+        _serve(HOST, PORT)
+        return
+    asyncio.run(Router(WORKER_COUNT).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+import uuid
+
+from app.hashring import HashRing
+
+# ---------------------------------------------------------------------------
+# ワーカー構成（app.router が各ワーカープロセスに環境変数で渡す）
+# ---------------------------------------------------------------------------
+
+WORKER_COUNT = max(1, int(os.getenv("WEB_WORKERS", "1")))
+WORKER_INDEX = int(os.getenv("WORKER_INDEX", "0"))
+
+worker_ring = HashRing([str(i) for i in range(WORKER_COUNT)])
+
+# fly.io のエッジなど、クライアントIPを付け直すプロキシの後ろで動かす場合だけ 1 にする。
+# 0 の場合、クライアントが送った fly-client-ip は信用しない（ルーターも取り除く）
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "0") != "0"
+
+
+def worker_for_room(room_id: str) -> int:
+    """ルームを担当するワーカー番号を返す。"""
+    return int(worker_ring.node_for(room_id))
+
+
+def owns_room(room_id: str) -> bool:
+    return WORKER_COUNT == 1 or worker_for_room(room_id) == WORKER_INDEX
+
+
+def new_room_id(prefix: str = "") -> str:
+    """このワーカーが担当するルームIDを生成する。
+
+    作成者のソケットがそのまま担当ワーカーに残るので、再接続時も同じワーカーに振り分けられる。
+    トーナメントIDも同じ方法で作り、ルームと同じハッシュで担当ワーカーを決める。
+    """
+    while True:
+        room_id = prefix + uuid.uuid4().hex[: 8 - len(prefix)]
+        if owns_room(room_id):
+            return room_id
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from enum import IntEnum
+from pathlib import Path
+
+from app.logging_config import sampled
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "5.0"))
+# 書き込み待ちのイベント数の上限（超えた分は捨てる。ゲームの処理は待たせない）
+ANALYTICS_QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "50000"))
+
+# ---------------------------------------------------------------------------
+# ファイルフォーマット
+# ---------------------------------------------------------------------------
+#
+# プロセス・1時間ごとに1ファイル（{ANALYTICS_DIR}/events-{YYYYMMDDHH}-{pid}.dcol）の追記専用バイナリ。
+# 書き込み1回ぶんのイベントを1ブロックとし、ブロック内は列ごとに連続して並べる。
+#
+#   ブロックヘッダー: magic(4s) version(B) rows(I)
+#   列            : kind(B) ts(d) players(B) card(b) count(H) value(I) の順に rows 個ずつ（リトルエンディアン）
+#
+# 列の意味は kind ごとに異なる。
+#
+#   GAME_START  players=人数
+#   DRAW        card=引いた数字
+#   STEAL       card=横取りした数字 count=枚数
+#   SKIP_STEAL  card=横取りできた数字
+#   BURST       card=バーストの原因になった数字 count=失った枚数
+#   GAME_END    count=ターン数 value=開始からの経過ミリ秒
+#
+# players はすべての kind でゲーム開始時の人数。ブロック単位で読めるため、
+# 集計はファイル全体を読み込まずにブロックごとに進められる。
+
+MAGIC = b"DCOL"
+VERSION = 1
+BLOCK = struct.Struct("<4sBI")
+# (名前, array の型コード)
+COLUMNS = (
+    ("kind", "B"),
+    ("ts", "d"),
+    ("players", "B"),
+    ("card", "b"),
+    ("count", "H"),
+    ("value", "I"),
+)
+NO_CARD = -1
+FILE_SUFFIX = ".dcol"
+
+# (kind, ts, players, card, count, value)
+Row = tuple[int, float, int, int, int, int]
+
+
+class EventKind(IntEnum):
+    GAME_START = 1
+    DRAW = 2
+    STEAL = 3
+    SKIP_STEAL = 4
+    BURST = 5
+    GAME_END = 6
+
+
+class _Game:
+    """集計のためにゲーム中だけ保持するルームごとの状態。"""
+
+    __slots__ = ("players", "started", "turns")
+
+    def __init__(self, players: int) -> None:
+        self.players = players
+        self.started = time.monotonic()
+        self.turns = 0
+
+
+# ---------------------------------------------------------------------------
+# 記録（サーバー側）
+# ---------------------------------------------------------------------------
+
+class AnalyticsExporter:
+    """ゲームのイベントを上限付きキューに積み、バックグラウンドで列形式のファイルへ書き出すクラス。
+
+    record() はキューへ入れるだけで I/O を行わず、キューが満杯なら捨てる。
+    書き込みタスクは最初のイベントが届いてから flush_interval 待ち、
+    その間に溜まった分をまとめて1ブロックとしてスレッドプール上で追記する。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = ANALYTICS_FLUSH_INTERVAL,
+        queue_size: int = ANALYTICS_QUEUE_SIZE,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: asyncio.Queue[Row] = asyncio.Queue(maxsize=queue_size)
+        # 書き込みタスクが待ち受けで受け取った、次のブロックに入れるイベント
+        self._held: list[Row] = []
+        self._games: dict[str, _Game] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    async def start(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._task = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def start_game(self, room_id: str, players: int) -> None:
+        if self.directory is None:
+            return
+        self._games[room_id] = _Game(players)
+        self._put(EventKind.GAME_START, players)
+
+    def record(
+        self, room_id: str, kind: EventKind, card: int | None = None, count: int = 0
+    ) -> None:
+        game = self._games.get(room_id)
+        if game is None:
+            return
+        self._put(kind, game.players, NO_CARD if card is None else card, count)
+
+    def turn(self, room_id: str) -> None:
+        game = self._games.get(room_id)
+        if game is not None:
+            game.turns += 1
+
+    def end_game(self, room_id: str) -> None:
+        game = self._games.pop(room_id, None)
+        if game is None:
+            return
+        elapsed_ms = int((time.monotonic() - game.started) * 1000)
+        self._put(EventKind.GAME_END, game.players, count=game.turns, value=elapsed_ms)
+
+    def drop_game(self, room_id: str) -> None:
+        """終了せずに消えたゲーム（全員が切断）は GAME_END を残さない。"""
+        self._games.pop(room_id, None)
+
+    def _put(
+        self, kind: EventKind, players: int, card: int = NO_CARD, count: int = 0, value: int = 0
+    ) -> None:
+        try:
+            self._queue.put_nowait(
+                (kind, time.time(), players, card, min(count, 0xFFFF), min(value, 0xFFFFFFFF))
+            )
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if sampled("analytics_dropped"):
+                logger.warning("Analytics queue full", extra={"dropped": self.dropped})
+
+    async def flush(self) -> None:
+        if self.directory is None:
+            return
+        # 書き込みタスクとドレイン時の flush が同じファイルへ同時に追記しないようにする
+        async with self._lock:
+            batch, self._held = self._held, []
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if batch:
+                await asyncio.to_thread(self._write_block, batch)
+
+    async def _write_loop(self) -> None:
+        while True:
+            # イベントがなければここで止まり、空のブロックは書かない
+            self._held.append(await self._queue.get())
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # 書けなかったブロックは捨てる（分析用のため再送してメモリを圧迫しない）
+                logger.exception("Analytics write failed")
+
+    def _write_block(self, rows: list[Row]) -> None:
+        assert self.directory is not None
+        hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
+        path = self.directory / f"events-{hour}-{os.getpid()}{FILE_SUFFIX}"
+        data = bytearray(BLOCK.pack(MAGIC, VERSION, len(rows)))
+        for i, (_, typecode) in enumerate(COLUMNS):
+            column = array(typecode, [row[i] for row in rows])
+            if sys.byteorder != "little":
+                column.byteswap()
+            data += column.tobytes()
+        with open(path, "ab") as f:
+            f.write(data)
+
+
+analytics = AnalyticsExporter(os.getenv("ANALYTICS_DIR", "analytics"))
+
+
+# ---------------------------------------------------------------------------
+# 読み出し（オフライン）
+# ---------------------------------------------------------------------------
+
+class AnalyticsFormatError(Exception):
+    pass
+
+
+_ROW_SIZE = sum(array(typecode).itemsize for _, typecode in COLUMNS)
+
+
+def iter_blocks(path: str | os.PathLike[str]) -> Iterator[dict[str, array]]:  # type: ignore[type-arg]
+    """ファイルをブロックごとに読み、列名 -> array の辞書を返す（一度に1ブロックだけ保持する）。"""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(BLOCK.size)
+            if len(header) < BLOCK.size:
+                # 書き込み途中の末尾は無視する
+                return
+            magic, version, rows = BLOCK.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise AnalyticsFormatError(f"{path}: 未対応のフォーマットです")
+            body = f.read(rows * _ROW_SIZE)
+            if len(body) < rows * _ROW_SIZE:
+                return
+            block: dict[str, array] = {}  # type: ignore[type-arg]
+            offset = 0
+            for name, typecode in COLUMNS:
+                column = array(typecode)
+                size = rows * column.itemsize
+                column.frombytes(body[offset:offset + size])
+                if sys.byteorder != "little":
+                    column.byteswap()
+                block[name] = column
+                offset += size
+            yield block
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", "2.0"))
+# 書き込み待ちのゲームの上限（ディスク障害時にメモリを使い切らないように古いものから捨てる）
+ARCHIVE_MAX_PENDING = 10000
+
+# ---------------------------------------------------------------------------
+# スキーマ
+# ---------------------------------------------------------------------------
+#
+# 1ゲーム = games 1行 + results プレイヤー数行（rank は同点でも1から連番）。
+# 途中で抜けたプレイヤーは player_id が残っていないため空文字になる。
+# 複数ワーカーが同じファイルへ書き込み、CLIからも並行して読めるようWALモードで開く。
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    room_id TEXT NOT NULL,
+    ended_at INTEGER NOT NULL,
+    player_count INTEGER NOT NULL,
+    winner TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_ended_at ON games (ended_at);
+CREATE TABLE IF NOT EXISTS results (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    rank INTEGER NOT NULL,
+    player_id TEXT NOT NULL,
+    nickname TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (game_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_player_id ON results (player_id);
+"""
+
+# (room_id, 終了時刻のUNIX秒, [(player_id, nickname, score), ...] 順位順)
+ArchivedGame = tuple[str, int, list[tuple[str, str, int]]]
+
+
+def connect(path: str | os.PathLike[str]) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class GameArchive:
+    """終了したゲームの結果をローカルのSQLiteへまとめて書き込むクラス。
+
+    submit() はメモリ上のバッファへ積むだけで、書き込みはバックグラウンドタスクが
+    flush_interval ごとにスレッドプール上で1トランザクションにまとめて行う。
+    有効な場合、GameService はゲーム終了直後にルームのRedisキーを削除する（ROOM_TTL まで残さない）。
+    """
+
+    def __init__(self, path: str, flush_interval: float = ARCHIVE_FLUSH_INTERVAL) -> None:
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self._pending: list[ArchivedGame] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    async def start(self) -> None:
+        if self.path is None:
+            return
+        await asyncio.to_thread(self._create)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def submit(self, room_id: str, results: list[tuple[str, str, int]]) -> None:
+        """1ゲーム分の (player_id, nickname, score) を順位順で書き込み待ちに追加する。"""
+        if self.path is None:
+            return
+        self._pending.append((room_id, int(time.time()), results))
+        overflow = len(self._pending) - ARCHIVE_MAX_PENDING
+        if overflow > 0:
+            del self._pending[:overflow]
+            logger.warning("Archive backlog overflow", extra={"dropped": overflow})
+
+    async def flush(self) -> None:
+        if self.path is None or not self._pending:
+            return
+        # 定期flushとドレイン時のflushが重なっても同じゲームを二重に書かない
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception:
+                # 次回のflushで再送する
+                self._pending[:0] = batch
+                raise
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Archive flush failed")
+
+    def _create(self) -> None:
+        assert self.path is not None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connect(self.path).close()
+
+    def _write_batch(self, batch: list[ArchivedGame]) -> None:
+        assert self.path is not None
+        conn = connect(self.path)
+        try:
+            with conn:
+                for room_id, ended_at, results in batch:
+                    winner = results[0][1] if results else ""
+                    cursor = conn.execute(
+                        "INSERT INTO games (room_id, ended_at, player_count, winner)"
+                        " VALUES (?, ?, ?, ?)",
+                        (room_id, ended_at, len(results), winner),
+                    )
+                    conn.executemany(
+                        "INSERT INTO results (game_id, rank, player_id, nickname, score)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (cursor.lastrowid, rank, player_id, nickname, score)
+                            for rank, (player_id, nickname, score) in enumerate(results, 1)
+                        ],
+                    )
+        finally:
+            conn.close()
+
+
+game_archive = GameArchive(os.getenv("ARCHIVE_PATH", "archive/games.sqlite3"))
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import logging
 import os
-import uuid
+import random
+from collections import Counter
 
 from fastapi import WebSocket
 
@@ -11,6 +12,7 @@ from app.models.game import (
     CardDrawnPayload,
     CardStolenPayload,
     CardsScoredPayload,
+    DrawHint,
     GameEndedPayload,
     GameError,
     GamePhase,
@@ -20,9 +22,20 @@ from app.models.game import (
     PlayerRanking,
     RoomCreatedPayload,
     RoomStatus,
+    RoomWatchedPayload,
     TurnChangedPayload,
+    TurnInfo,
+    build_deck,
 )
 from app.redis.client import RedisClient
+from app.routing import new_room_id
+from app.services.analytics import EventKind, analytics
+from app.services.archive import game_archive
+from app.services.leaderboard import leaderboard
+from app.services.replay_log import ReplayAction, replay_recorder
+from app.services.state_feed import state_feed
+from app.services.tournament import tournaments
+from app.websocket.state_publisher import state_publisher
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +58,7 @@ class GameService:
         nickname: str,
         max_players: int,
     ) -> str:
-        room_id = uuid.uuid4().hex[:8]
+        room_id = new_room_id()
         await self.redis.create_room(room_id, player_id, max_players)
         await self.redis.add_player(room_id, player_id, nickname)
 
@@ -109,6 +122,9 @@ class GameService:
                     ).model_dump(),
                 },
             )
+            # ゲーム中の再接続（ドレイン後の別インスタンスを含む）ではターン状態を即座に復元する
+            if room.status == RoomStatus.PLAYING:
+                await self._send_game_state(ws, room_id)
             logger.info("Player reconnected: room=%s player=%s", room_id, player_id)
             return
 
@@ -158,12 +174,24 @@ class GameService:
         if player_count < 2:
             raise GameError("INVALID_PHASE", "ゲーム開始には2人以上必要です")
 
+        await self.begin_game(room_id)
+
+    async def begin_game(
+        self, room_id: str, nicknames: list[str] | None = None
+    ) -> None:
+        """検証済みのルームでゲームを開始する（ホスト操作・マッチメイキング共通）。"""
+        state_publisher.reopen(room_id)
         await self.redis.set_room_status(room_id, RoomStatus.PLAYING)
         deck_size = int(os.getenv("DECK_SIZE", "110"))
-        await self.redis.initialize_deck(room_id, deck_size=deck_size)
+        seed = random.getrandbits(63)
+        await self.redis.initialize_deck(room_id, deck_size=deck_size, seed=seed)
 
-        nicknames = await self.redis.get_all_nicknames(room_id)
+        if nicknames is None:
+            nicknames = await self.redis.get_all_nicknames(room_id)
         await self.redis.initialize_scores(room_id, nicknames)
+        await self.redis.initialize_turn_order(room_id, nicknames)
+        replay_recorder.start_game(room_id, seed, deck_size, nicknames)
+        analytics.start_game(room_id, len(nicknames))
 
         deck_count = await self.redis.get_deck_count(room_id)
         first_player = nicknames[0]
@@ -182,19 +210,115 @@ class GameService:
         logger.info("Game started: room=%s first_player=%s", room_id, first_player)
         await self._start_turn(room_id, first_player)
 
+    async def begin_games(self, games: list[tuple[str, list[str]]]) -> None:
+        """create_rooms_bulk で作成した複数のルームでゲームをまとめて開始する（マッチメイキング・トーナメント）。
+
+        Redisの初期化はシャードごとに1往復で済ませ、開始時の game_state は
+        （場が空で得点も0なので）Redisから読み直さずにメモリ上で組み立てて送る。
+        """
+        deck_size = int(os.getenv("DECK_SIZE", "110"))
+        setups = []
+        for room_id, nicknames in games:
+            seed = random.getrandbits(63)
+            setups.append((room_id, nicknames, seed, build_deck(deck_size, seed)))
+        await self.redis.begin_games_bulk(
+            [(room_id, nicknames, deck) for room_id, nicknames, _, deck in setups]
+        )
+
+        for room_id, nicknames, seed, deck in setups:
+            state_publisher.reopen(room_id)
+            replay_recorder.start_game(room_id, seed, deck_size, nicknames)
+            analytics.start_game(room_id, len(nicknames))
+            analytics.turn(room_id)
+            first_player = nicknames[0]
+            await self.manager.broadcast(
+                room_id,
+                {
+                    "type": "game_started",
+                    "payload": GameStartedPayload(
+                        players=nicknames,
+                        deck_count=len(deck),
+                        first_player=first_player,
+                    ).model_dump(),
+                },
+            )
+            await self.manager.broadcast(
+                room_id,
+                {
+                    "type": "turn_changed",
+                    "payload": TurnChangedPayload(current_player=first_player).model_dump(),
+                },
+            )
+            fields: dict[str, list[int]] = {nick: [] for nick in nicknames}
+            state = GameStatePayload(
+                fields=fields,
+                deck_count=len(deck),
+                scores={nick: 0 for nick in nicknames},
+                current_player=first_player,
+                phase=GamePhase.DRAW,
+                hint=self._draw_hint(first_player, fields, Counter(deck)),
+            )
+            state_feed.notify(room_id)
+            await self.manager.broadcast(
+                room_id, {"type": "game_state", "payload": state.model_dump()}
+            )
+        logger.info("Games started", extra={"count": len(setups)})
+
+    async def watch_room(
+        self, ws: WebSocket, player_id: str, from_room: str, room_id: str
+    ) -> None:
+        """席を持たない観戦者としてルームのブロードキャストを購読する。"""
+        if from_room != "lobby" and not self.manager.is_spectator(from_room, player_id):
+            raise GameError("ALREADY_IN_ROOM", "ルームに参加中は観戦できません")
+        room = await self.redis.get_room(room_id)
+        if room is None:
+            raise GameError("ROOM_NOT_FOUND", f"ルーム '{room_id}' が見つかりません")
+        if await self.redis.get_nickname(room_id, player_id):
+            raise GameError("ALREADY_IN_ROOM", "参加中のルームは観戦できません")
+        if not self.manager.watch(from_room, room_id, player_id, ws):
+            raise GameError("ROOM_FULL", "観戦者が上限に達しています")
+
+        nicknames = await self.redis.get_all_nicknames(room_id)
+        await self.manager.send_personal(
+            ws,
+            {
+                "type": "room_watched",
+                "payload": RoomWatchedPayload(
+                    room_id=room_id,
+                    status=room.status,
+                    players=nicknames,
+                    spectator_count=len(self.manager.spectators[room_id]),
+                ).model_dump(),
+            },
+        )
+        if room.status == RoomStatus.PLAYING:
+            await self._send_game_state(ws, room_id)
+        logger.info("Spectator joined: room=%s player=%s", room_id, player_id)
+
     async def handle_disconnect(self, player_id: str, room_id: str) -> None:
         nickname = await self.redis.get_nickname(room_id, player_id)
         await self.redis.remove_player(room_id, player_id)
+        replay_recorder.record(room_id, ReplayAction.LEAVE, nickname)
         player_count = await self.redis.get_player_count(room_id)
         room = await self.redis.get_room(room_id)
         if player_count == 0 and room and room.status == RoomStatus.PLAYING:
             await self.redis.delete_room(room_id)
+            replay_recorder.finish_game(room_id)
+            analytics.drop_game(room_id)
+            state_publisher.cancel(room_id)
+            state_feed.drop(room_id)
+            tournaments.abandon_table(room_id)
             logger.info("Room deleted (empty, was playing): room=%s", room_id)
-        else:
-            logger.info(
-                "Player disconnected: room=%s player=%s nickname=%s",
-                room_id, player_id, nickname,
-            )
+            return
+        logger.info(
+            "Player disconnected: room=%s player=%s nickname=%s",
+            room_id, player_id, nickname,
+        )
+        if room and room.status == RoomStatus.PLAYING:
+            # 手番のプレイヤーが抜けたら次の人へ回す（そのままだと誰も操作できずゲームが止まる）
+            turn = await self.redis.get_turn(room_id)
+            if turn is not None and turn.current_nickname == nickname:
+                await self._advance_turn(room_id, turn.current_nickname)
 
     # ---------------------------------------------------------------------------
     # ゲームアクション
@@ -212,6 +336,7 @@ class GameService:
         cards = await self.redis.clear_field(room_id, nickname)
         points = sum(cards)
         total_score = await self.redis.add_score(room_id, nickname, points)
+        replay_recorder.record(room_id, ReplayAction.SCORE, nickname)
 
         await self.manager.broadcast(
             room_id,
@@ -240,6 +365,8 @@ class GameService:
             return
 
         await self.redis.add_to_field(room_id, nickname, card)
+        replay_recorder.record(room_id, ReplayAction.DRAW, nickname, card)
+        analytics.record(room_id, EventKind.DRAW, card)
         field_after = await self.redis.get_field(room_id, nickname)
 
         await self.manager.broadcast(
@@ -281,13 +408,15 @@ class GameService:
         )
 
         card = turn.drawn_card
-        targets = await self._find_steal_targets(room_id, nickname, card)
-        if not targets:
+        targets = [] if card is None else await self._find_steal_targets(room_id, nickname, card)
+        if card is None or not targets:
             raise GameError("CANNOT_STEAL", "横取り対象が存在しません")
 
+        stolen = 0
         for target_nickname in targets:
             target_field = await self.redis.get_field(room_id, target_nickname)
             count = target_field.count(card)
+            stolen += count
             await self.redis.remove_all_of_card_from_field(room_id, target_nickname, card)
             for _ in range(count):
                 await self.redis.add_to_field(room_id, nickname, card)
@@ -304,6 +433,9 @@ class GameService:
                 },
             )
 
+        replay_recorder.record(room_id, ReplayAction.STEAL, nickname, card, stolen)
+        analytics.record(room_id, EventKind.STEAL, card, stolen)
+
         # 横取り後: ターン継続（プレイヤーがもう1枚引くかターン終了を選択）
         await self.redis.set_turn(room_id, nickname, GamePhase.DRAWN)
         await self._broadcast_game_state(room_id)
@@ -312,6 +444,8 @@ class GameService:
         nickname, turn = await self._validate_turn(
             room_id, player_id, GamePhase.STEAL
         )
+        replay_recorder.record(room_id, ReplayAction.SKIP_STEAL, nickname)
+        analytics.record(room_id, EventKind.SKIP_STEAL, turn.drawn_card)
         # スキップ後: ターン継続（プレイヤーがもう1枚引くかターン終了を選択）
         await self.redis.set_turn(room_id, nickname, GamePhase.DRAWN)
         await self._broadcast_game_state(room_id)
@@ -322,6 +456,7 @@ class GameService:
 
     async def end_turn(self, player_id: str, room_id: str) -> None:
         nickname, _ = await self._validate_turn(room_id, player_id, GamePhase.DRAWN)
+        replay_recorder.record(room_id, ReplayAction.END_TURN, nickname)
         await self._advance_turn(room_id, nickname)
 
     # ---------------------------------------------------------------------------
@@ -333,8 +468,63 @@ class GameService:
         """バースト条件: 場が4枚以上 かつ 引いたカードと同じ数字が2枚以上（自分を含む）。"""
         return len(field) >= 4 and field.count(drawn_card) >= 2
 
+    @staticmethod
+    def _draw_hint(
+        nickname: str, fields: dict[str, list[int]], remaining: dict[int, int]
+    ) -> DrawHint:
+        """残り枚数から、nicknameが次の1枚を引いたときのバースト・横取りの確率を求める。
+
+        場の数字は最大10種類なので、山札の長さに関係なく定数時間で計算できる。
+        """
+        deck_count = sum(remaining.values())
+        field = fields.get(nickname, [])
+        # 場が3枚以上なら、場にある数字を引くと _is_burst の条件を満たす
+        burst_values = set(field) if len(field) >= 3 else set()
+        steal_values = sorted(
+            {
+                card
+                for other, other_field in fields.items()
+                if other != nickname
+                for card in other_field
+                if remaining.get(card, 0) > 0
+            }
+            - burst_values
+        )
+        if deck_count == 0:
+            return DrawHint(
+                burst_probability=0.0, steal_values=steal_values, steal_probability=0.0
+            )
+        burst = sum(remaining.get(card, 0) for card in burst_values)
+        steal = sum(remaining[card] for card in steal_values)
+        return DrawHint(
+            burst_probability=burst / deck_count,
+            steal_values=steal_values,
+            steal_probability=steal / deck_count,
+        )
+
+    @classmethod
+    def _next_draw_hint(
+        cls, turn: TurnInfo, fields: dict[str, list[int]], remaining: dict[int, int]
+    ) -> DrawHint | None:
+        """手番プレイヤーが次に引くときの場でヒントを求める。
+
+        SCOREフェーズは得点化で場が空になってから引く。STEAL・BURSTフェーズは次に引く前に
+        場が変わり（BURSTは手番も移る）、その結果はプレイヤーの選択次第なのでヒントを付けない。
+        """
+        nickname = turn.current_nickname
+        if turn.phase in (GamePhase.DRAW, GamePhase.DRAWN):
+            return cls._draw_hint(nickname, fields, remaining)
+        if turn.phase == GamePhase.SCORE:
+            return cls._draw_hint(nickname, {**fields, nickname: []}, remaining)
+        return None
+
     async def _handle_burst(self, room_id: str, nickname: str) -> None:
         lost_cards = await self.redis.clear_field(room_id, nickname)
+        replay_recorder.record(room_id, ReplayAction.BURST, nickname)
+        # BURSTフェーズ中は場が変わらないため、最後の1枚がバーストの原因になったカード
+        analytics.record(
+            room_id, EventKind.BURST, lost_cards[-1] if lost_cards else None, len(lost_cards)
+        )
         await self.manager.broadcast(
             room_id,
             {
@@ -371,6 +561,7 @@ class GameService:
         field = await self.redis.get_field(room_id, nickname)
         phase = GamePhase.SCORE if field else GamePhase.DRAW
         await self.redis.set_turn(room_id, nickname, phase)
+        analytics.turn(room_id)
 
         await self.manager.broadcast(
             room_id,
@@ -382,10 +573,15 @@ class GameService:
         await self._broadcast_game_state(room_id)
 
     async def _advance_turn(self, room_id: str, current_nickname: str) -> None:
-        next_nickname = await self.redis.get_next_player_nickname(
-            room_id, current_nickname
-        )
-        await self._start_turn(room_id, next_nickname)
+        next_nickname = await self.redis.advance_turn(room_id)
+        await self._start_turn(room_id, next_nickname or current_nickname)
+
+    async def finish_game(self, room_id: str) -> None:
+        """プレイ中のゲームをその時点の得点で終了させる（トーナメントのラウンド打ち切り用）。"""
+        room = await self.redis.get_room(room_id)
+        if room is None or room.status != RoomStatus.PLAYING:
+            return
+        await self._end_game(room_id)
 
     async def _end_game(self, room_id: str) -> None:
         # 場に残っているカードをすべて得点化する
@@ -409,6 +605,14 @@ class GameService:
                 )
 
         await self.redis.set_room_status(room_id, RoomStatus.FINISHED)
+        # 終了後にgame_stateが届くとクライアントがプレイ中の表示に戻るため、予約分を破棄する
+        state_publisher.cancel(room_id)
+        # REST のポーラーには最終得点を反映した状態を返す（アーカイブ時はキーを消す直前に渡す）
+        if not game_archive.enabled:
+            state_feed.notify(room_id)
+        replay_recorder.record(room_id, ReplayAction.END)
+        replay_recorder.finish_game(room_id)
+        analytics.end_game(room_id)
         scores = await self.redis.get_all_scores(room_id)
         sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
 
@@ -428,31 +632,68 @@ class GameService:
                 ).model_dump(),
             },
         )
+        # トーナメントの卓なら成績に加える（全卓が終わると次のラウンドが予約される）
+        tournaments.record_result(room_id, sorted_scores)
+        # rankingsは構造化フィールドとして渡し、整形はログ出力スレッドに任せる
         logger.info(
-            "Game ended: room=%s winner=%s rankings=%s",
-            room_id, winner, rankings,
+            "Game ended",
+            extra={"room": room_id, "winner": winner, "scores": sorted_scores},
         )
+        # ランキングへの反映はバッファに積むだけ（Redisへはバックグラウンドでまとめて書き込む）
+        player_ids = await self.redis.get_nickname_index(room_id)
+        leaderboard.submit([
+            (player_ids[nick], nick, score)
+            for nick, score in sorted_scores
+            if nick in player_ids
+        ])
+        if game_archive.enabled:
+            game_archive.submit(
+                room_id,
+                [(player_ids.get(nick, ""), nick, score) for nick, score in sorted_scores],
+            )
+            # 参照中のポーラーがいれば、消す前に最終状態を組み立てて StateFeed に残す
+            if state_feed.tracking(room_id):
+                state_feed.finish(room_id, await self._build_game_state(room_id))
+            # 結果はアーカイブに残るので、ROOM_TTL まで待たずにルームのキーを消してRedisのメモリを空ける
+            await self.redis.delete_room(room_id)
 
-    async def _broadcast_game_state(self, room_id: str) -> None:
+    async def _build_game_state(self, room_id: str) -> GameStatePayload | None:
         turn = await self.redis.get_turn(room_id)
         if turn is None:
-            return
+            return None
         fields = await self.redis.get_all_fields(room_id)
         scores = await self.redis.get_all_scores(room_id)
         deck_count = await self.redis.get_deck_count(room_id)
+        remaining = await self.redis.get_remaining_counts(room_id)
+        return GameStatePayload(
+            fields=fields,
+            deck_count=deck_count,
+            scores=scores,
+            current_player=turn.current_nickname,
+            phase=turn.phase,
+            hint=self._next_draw_hint(turn, fields, remaining),
+        )
 
+    async def _broadcast_game_state(self, room_id: str) -> None:
+        """game_stateの送信を予約する（StatePublisherがルームごとに間引いて送る）。"""
+        state_feed.notify(room_id)
+        await state_publisher.mark_dirty(room_id, self._emit_game_state)
+
+    async def _emit_game_state(self, room_id: str) -> None:
+        state = await self._build_game_state(room_id)
+        # 組み立て中に _end_game が走った場合は送らない（game_ended の後に届くとクライアントがプレイ中の表示に戻る）
+        if state is None or state_publisher.ended(room_id):
+            return
         await self.manager.broadcast(
-            room_id,
-            {
-                "type": "game_state",
-                "payload": GameStatePayload(
-                    fields=fields,
-                    deck_count=deck_count,
-                    scores=scores,
-                    current_player=turn.current_nickname,
-                    phase=turn.phase,
-                ).model_dump(),
-            },
+            room_id, {"type": "game_state", "payload": state.model_dump()}
+        )
+
+    async def _send_game_state(self, ws: WebSocket, room_id: str) -> None:
+        state = await self._build_game_state(room_id)
+        if state is None:
+            return
+        await self.manager.send_personal(
+            ws, {"type": "game_state", "payload": state.model_dump()}
         )
 
     async def _validate_turn(
@@ -460,9 +701,7 @@ class GameService:
         room_id: str,
         player_id: str,
         expected_phase: GamePhase | None = None,
-    ) -> tuple[str, "TurnInfo"]:  # type: ignore[name-defined]
-        from app.models.game import TurnInfo  # noqa: PLC0415
-
+    ) -> tuple[str, TurnInfo]:
         room = await self.redis.get_room(room_id)
         if room is None or room.status != RoomStatus.PLAYING:
             raise GameError("GAME_NOT_STARTED", "ゲームが開始されていません")
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.models.game import LeaderboardEntry, PlayerRankPayload
+from app.redis.client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_FLUSH_INTERVAL = float(os.getenv("LEADERBOARD_FLUSH_INTERVAL", "2.0"))
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "5.0"))
+LEADERBOARD_ROLLING_DAYS = int(os.getenv("LEADERBOARD_ROLLING_DAYS", "7"))
+# 取り込み待ちの結果の上限（Redis障害時にメモリを使い切らないように古いものから捨てる）
+LEADERBOARD_MAX_PENDING = 10000
+
+
+class Leaderboard:
+    """終了したゲームの結果をランキング（Redis ZSET）へ取り込み、参照を提供するクラス。
+
+    submit() はメモリ上のバッファへ積むだけで、Redisへの書き込みはバックグラウンドタスクが
+    flush_interval ごとに1パイプラインでまとめて行う（ゲーム終了処理を待たせない）。
+    rolling のZSETは結果ごとに加算し、日付が変わったとき（と起動後の最初の書き込み）だけ日別ZSETから作り直す。
+    参照結果は cache_ttl 秒だけプロセス内にキャッシュする。
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = LEADERBOARD_FLUSH_INTERVAL,
+        cache_ttl: float = LEADERBOARD_CACHE_TTL,
+        rolling_days: int = LEADERBOARD_ROLLING_DAYS,
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self.rolling_days = rolling_days
+        self._pending: list[tuple[str, str, int]] = []
+        # キャッシュキー -> (期限, 値)
+        self._cache: dict[tuple[str, ...], tuple[float, object]] = {}
+        self._redis: RedisClient | None = None
+        self._task: asyncio.Task[None] | None = None
+        # rolling のZSETを最後に作り直した日（日付が変わったら作り直して最も古い日を外す）
+        self._rolling_day: str | None = None
+
+    def start(self, redis: RedisClient) -> None:
+        self._redis = redis
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            # 終了処理を止めない（他のサービスの書き出しが続く）。取り込み待ちの結果は失われる
+            logger.exception("Leaderboard flush failed on shutdown", extra={"pending": len(self._pending)})
+
+    # ---------------------------------------------------------------------------
+    # 取り込み
+    # ---------------------------------------------------------------------------
+
+    def submit(self, results: list[tuple[str, str, int]]) -> None:
+        """1ゲーム分の (player_id, nickname, score) を取り込み待ちに追加する。"""
+        if self._redis is None:
+            return
+        self._pending.extend(results)
+        overflow = len(self._pending) - LEADERBOARD_MAX_PENDING
+        if overflow > 0:
+            del self._pending[:overflow]
+            logger.warning("Leaderboard backlog overflow", extra={"dropped": overflow})
+
+    async def flush(self) -> None:
+        if self._redis is None:
+            return
+        today = datetime.now(timezone.utc).date()
+        days = [
+            (today - timedelta(days=i)).strftime("%Y%m%d")
+            for i in range(self.rolling_days)
+        ]
+        rebuild = days[0] != self._rolling_day
+        # 結果がなくても日付が変わったら作り直す（参照されない古い日の分を残さない）
+        if not self._pending and not rebuild:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await self._redis.apply_leaderboard_results(
+                batch,
+                day=days[0],
+                rolling_days=days,
+                day_ttl=(self.rolling_days + 1) * 86400,
+                rebuild_rolling=rebuild,
+            )
+        except Exception:
+            # 次回のflushで再送する
+            self._pending[:0] = batch
+            raise
+        self._rolling_day = days[0]
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Leaderboard flush failed")
+
+    # ---------------------------------------------------------------------------
+    # 参照
+    # ---------------------------------------------------------------------------
+
+    def _board_key(self, board: str) -> str:
+        if board == "daily":
+            return "day:" + datetime.now(timezone.utc).strftime("%Y%m%d")
+        if board == "rolling":
+            return f"{self.rolling_days}d"
+        return "global"
+
+    def _cached(self, key: tuple[str, ...]) -> object | None:
+        hit = self._cache.get(key)
+        if hit is None or hit[0] < time.monotonic():
+            return None
+        return hit[1]
+
+    def _store(self, key: tuple[str, ...], value: object) -> None:
+        now = time.monotonic()
+        if len(self._cache) > 1024:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] >= now}
+        self._cache[key] = (now + self.cache_ttl, value)
+
+    async def top(self, board: str, limit: int) -> list[LeaderboardEntry]:
+        assert self._redis is not None
+        key = ("top", board, str(limit))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+        rows = await self._redis.get_leaderboard_range(
+            self._board_key(board), 0, limit - 1
+        )
+        entries = _entries(rows, first_rank=1)
+        self._store(key, entries)
+        return entries
+
+    async def rank(
+        self, board: str, player_id: str, radius: int
+    ) -> PlayerRankPayload | None:
+        assert self._redis is not None
+        key = ("rank", board, player_id, str(radius))
+        cached = self._cached(key)
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+        board_key = self._board_key(board)
+        found = await self._redis.get_leaderboard_rank(board_key, player_id)
+        if found is None:
+            return None
+        rank, score = found
+        start = max(0, rank - radius)
+        rows = await self._redis.get_leaderboard_range(board_key, start, rank + radius)
+        result = PlayerRankPayload(
+            player_id=player_id,
+            rank=rank + 1,
+            score=score,
+            neighbours=_entries(rows, first_rank=start + 1),
+        )
+        self._store(key, result)
+        return result
+
+
+def _entries(rows: list[tuple[str, str, int]], first_rank: int) -> list[LeaderboardEntry]:
+    return [
+        LeaderboardEntry(rank=first_rank + i, player_id=player_id, nickname=nickname, score=score)
+        for i, (player_id, nickname, score) in enumerate(rows)
+    ]
+
+
+leaderboard = Leaderboard()
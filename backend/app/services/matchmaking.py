@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+from fastapi import WebSocket
+
+from app.models.game import (
+    MAX_PLAYERS,
+    MIN_PLAYERS,
+    GameError,
+    MatchFoundPayload,
+    MatchQueuedPayload,
+    PlayerJoinedPayload,
+)
+from app.routing import WORKER_INDEX, new_room_id
+from app.services.game_service import GameService
+
+logger = logging.getLogger(__name__)
+
+MATCH_SIZES = list(range(MIN_PLAYERS, MAX_PLAYERS + 1))
+
+
+class Matchmaker:
+    """クイックプレイの待ち行列とバッチマッチングを担当するクラス。
+
+    待ち行列はワーカーごとにRedisに置き、ソケットは同じワーカーのロビーに残したまま待たせる。
+    tickごとに人数別の待ち行列から size の倍数ぶんをまとめて取り出し、
+    ルーム作成・ソケット移動・ゲーム開始を一括で行う（Redisへの書き込みはシャードごとに1往復ずつ）。
+    """
+
+    def __init__(self, tick: float = 0.2) -> None:
+        self.tick = tick
+        # player_id -> (ws, 希望人数)。切断済みのプレイヤーを待ち行列から除外するために使う
+        self._queued: dict[str, tuple[WebSocket, int]] = {}
+        self._service: GameService | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self, service: GameService) -> None:
+        self._service = service
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_queued(self, player_id: str) -> bool:
+        return player_id in self._queued
+
+    def cancel(self, player_id: str) -> None:
+        """待ち行列から外す（Redis上のエントリはマッチング時に読み捨てる）。"""
+        self._queued.pop(player_id, None)
+
+    async def enqueue(
+        self,
+        ws: WebSocket,
+        player_id: str,
+        room_id: str,
+        nickname: str,
+        size: int,
+    ) -> None:
+        if self._service is None:
+            raise GameError("SERVER_BUSY", "クイックプレイは現在利用できません")
+        if room_id != "lobby":
+            raise GameError("ALREADY_IN_ROOM", "すでにルームに参加しています")
+        if player_id in self._queued:
+            raise GameError("ALREADY_QUEUED", "すでにクイックプレイの待機中です")
+
+        self._queued[player_id] = (ws, size)
+        await self._service.redis.enqueue_match(WORKER_INDEX, size, player_id, nickname)
+        await self._service.manager.send_personal(
+            ws,
+            {"type": "match_queued", "payload": MatchQueuedPayload(max_players=size).model_dump()},
+        )
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            try:
+                await self.match_once()
+            except Exception:
+                logger.exception("Matchmaking tick failed")
+
+    async def match_once(self) -> int:
+        """1tick分のマッチングを行い、作成したルーム数を返す。"""
+        assert self._service is not None
+        service = self._service
+        batches = await service.redis.pop_match_batches(WORKER_INDEX, MATCH_SIZES)
+        if not batches:
+            return 0
+
+        rooms: list[tuple[str, int, list[tuple[str, str]]]] = []
+        sockets: dict[str, list[tuple[str, WebSocket]]] = {}
+        # room_id -> 番号を付ける前の (player_id, nickname)（卓を作り直すときに並び直させる）
+        entries_of: dict[str, list[tuple[str, str]]] = {}
+        for size, entries in batches.items():
+            valid: list[tuple[str, str]] = []
+            seen: set[str] = set()
+            for player_id, nickname in entries:
+                queued = self._queued.get(player_id)
+                # 切断・キャンセル済み、人数を変えて並び直したエントリは読み捨てる
+                if queued is None or queued[1] != size or player_id in seen:
+                    continue
+                if service.manager.room_of(queued[0], "lobby") != "lobby":
+                    # 待機中に自分でルームへ参加・観戦を始めた
+                    del self._queued[player_id]
+                    continue
+                seen.add(player_id)
+                valid.append((player_id, nickname))
+
+            full = len(valid) // size * size
+            for i in range(0, full, size):
+                group = _dedupe_nicknames(valid[i:i + size])
+                room_id = new_room_id()
+                rooms.append((room_id, size, group))
+                entries_of[room_id] = valid[i:i + size]
+                # 待ち行列（_queued）からはソケットを移すときに外す。それまでの await の間に
+                # 切断したプレイヤーは切断処理の cancel() で _queued から消える
+                sockets[room_id] = [
+                    (player_id, self._queued[player_id][0]) for player_id, _ in group
+                ]
+            await service.redis.requeue_matches(WORKER_INDEX, size, valid[full:])
+
+        if not rooms:
+            return 0
+        await service.redis.create_rooms_bulk(rooms)
+
+        started: list[tuple[str, list[str]]] = []
+        abandoned: list[str] = []
+        requeue: dict[int, list[tuple[str, str]]] = {}
+        for room_id, size, group in rooms:
+            lobby = service.manager.rooms.get("lobby", {})
+            present = [
+                self._queued.get(player_id, (None, 0))[0] is ws and lobby.get(player_id) is ws
+                for player_id, ws in sockets[room_id]
+            ]
+            if not all(present):
+                # 作成中に切断・キャンセルした人がいる卓は使わず、残りの人を待ち行列の先頭に戻す
+                # （切断済みのソケットを着席させると、その人の手番でゲームが止まる）
+                abandoned.append(room_id)
+                requeue.setdefault(size, []).extend(
+                    entry for entry, ok in zip(entries_of[room_id], present) if ok
+                )
+                continue
+            nicknames = [nick for _, nick in group]
+            assigned = dict(group)
+            # 確認から卓全員のソケットの移動までは await で他のタスクに譲らない（move_player は待たない）。
+            # 移動後の切断は受信ループの切断処理がルームの席を片付ける
+            for player_id, ws in sockets[room_id]:
+                del self._queued[player_id]
+                await service.manager.move_player("lobby", room_id, player_id, ws)
+            for player_id, ws in sockets[room_id]:
+                # ニックネームが番号付きに変わった場合もここで本人に伝わる
+                try:
+                    await service.manager.send_personal(
+                        ws,
+                        {
+                            "type": "match_found",
+                            "payload": MatchFoundPayload(
+                                room_id=room_id,
+                                nickname=assigned[player_id],
+                                max_players=size,
+                                players=nicknames,
+                            ).model_dump(),
+                        },
+                    )
+                except Exception:
+                    # 切断済みの接続は切断処理に任せ、他のプレイヤーのルーム作成は続ける
+                    pass
+            await service.manager.broadcast(
+                room_id,
+                {
+                    "type": "player_joined",
+                    "payload": PlayerJoinedPayload(
+                        room_id=room_id,
+                        nickname=nicknames[-1],
+                        player_count=len(nicknames),
+                        max_players=size,
+                        host_nickname=nicknames[0],
+                        players=nicknames,
+                    ).model_dump(),
+                },
+            )
+
+            started.append((room_id, nicknames))
+
+        for room_id in abandoned:
+            await service.redis.delete_room(room_id)
+        for size, entries in requeue.items():
+            await service.redis.requeue_matches(WORKER_INDEX, size, entries)
+        if abandoned:
+            logger.info("Matched rooms abandoned", extra={"count": len(abandoned)})
+
+        try:
+            await service.begin_games(started)
+        except Exception:
+            logger.exception("Matched games failed to start", extra={"count": len(started)})
+        logger.info("Matched rooms", extra={"count": len(started)})
+        return len(started)
+
+
+def _dedupe_nicknames(group: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """同じルームでニックネームが重複した場合は末尾に番号を付ける。
+
+    変更後のニックネームは match_found で本人に通知する。
+    """
+    seen: set[str] = set()
+    result = []
+    for player_id, nickname in group:
+        candidate, n = nickname, 2
+        while candidate in seen:
+            suffix = f"#{n}"
+            candidate = nickname[: 20 - len(suffix)] + suffix
+            n += 1
+        seen.add(candidate)
+        result.append((player_id, candidate))
+    return result
+
+
+matchmaker = Matchmaker(tick=float(os.getenv("MATCHMAKING_TICK", "0.2")))
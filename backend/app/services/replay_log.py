@@ -0,0 +1,367 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from enum import IntEnum
+from pathlib import Path
+
+from app.models.game import ROOM_TTL, GamePhase, GameStatePayload, build_deck
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# ファイルフォーマット
+# ---------------------------------------------------------------------------
+#
+# 1ゲーム = 1ファイル（{REPLAY_DIR}/{room_id}.drpl）の追記専用バイナリ。
+#
+#   ヘッダー : magic(4s) version(B) player_count(B) deck_size(H) seed(Q)
+#   プレイヤー: player_count 個の [len(B) + nickname(utf-8)]（ターン順）
+#   レコード : action(B) player(B) card(b) count(B) の固定長4バイト × N
+#
+# レコードは固定長なので、mmapしたファイルを struct.iter_unpack でそのまま走査できる。
+
+MAGIC = b"DRPL"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ")
+RECORD = struct.Struct("<BBbB")
+NO_CARD = -1
+NO_PLAYER = 0xFF
+FILE_SUFFIX = ".drpl"
+
+
+class ReplayAction(IntEnum):
+    SCORE = 1
+    DRAW = 2
+    STEAL = 3
+    SKIP_STEAL = 4
+    BURST = 5
+    END_TURN = 6
+    LEAVE = 7
+    END = 8
+
+
+# ---------------------------------------------------------------------------
+# 記録（サーバー側）
+# ---------------------------------------------------------------------------
+
+class ReplayRecorder:
+    """適用済みの状態遷移をルームごとにバッファし、非同期でディスクへ追記するクラス。
+
+    record() はバイト列をバッファへ追加するだけで I/O を行わない。
+    書き込みはバックグラウンドタスクがスレッドプール上でまとめて行う。
+    """
+
+    def __init__(
+        self, directory: str, flush_interval: float = 1.0, max_files: int = 0
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        # ディレクトリに残すファイル数の上限（超えたら古いものから消す。0なら無制限）
+        self.max_files = max_files
+        # room_id -> {nickname -> プレイヤー番号}
+        self._players: dict[str, dict[str, int]] = {}
+        # room_id -> 未書き込みのバイト列
+        self._pending: dict[str, bytearray] = {}
+        # room_id -> 最後に書き出した時刻（終了せずに消えたルームの記録を片付けるため）
+        self._active: dict[str, float] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = asyncio.Event()
+        # True ならディレクトリなしでも記録し、ファイルに書かずに buffered() で参照できるよう残す（ストレステスト用）
+        self.in_memory = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None or self.in_memory
+
+    async def start(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        # 書き込み中のスレッドを途中でキャンセルすると、続くflushと並んで追記の順序が崩れるため、
+        # ループが今のflushを終えて抜けるのを待つ
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def start_game(
+        self, room_id: str, seed: int, deck_size: int, nicknames: list[str]
+    ) -> None:
+        if not self.enabled:
+            return
+        self._players[room_id] = {nick: i for i, nick in enumerate(nicknames)}
+        buf = bytearray(
+            HEADER.pack(MAGIC, VERSION, len(nicknames), deck_size, seed)
+        )
+        for nick in nicknames:
+            encoded = nick.encode("utf-8")
+            buf.append(len(encoded))
+            buf += encoded
+        self._pending[room_id] = buf
+
+    def record(
+        self,
+        room_id: str,
+        action: ReplayAction,
+        nickname: str | None = None,
+        card: int | None = None,
+        count: int = 0,
+    ) -> None:
+        players = self._players.get(room_id)
+        if players is None:
+            return
+        player = players.get(nickname, NO_PLAYER) if nickname else NO_PLAYER
+        buf = self._pending.get(room_id)
+        if buf is None:
+            buf = self._pending[room_id] = bytearray()
+        buf += RECORD.pack(
+            action, player, NO_CARD if card is None else card, min(count, 0xFF)
+        )
+
+    def buffered(self, room_id: str) -> bytes:
+        """まだ書き出していない記録（in_memory ではゲーム開始からの全記録）。"""
+        return bytes(self._pending.get(room_id, b""))
+
+    def finish_game(self, room_id: str) -> None:
+        """ゲーム終了後はそのルームの記録を受け付けない（バッファは次回flushで書き出す）。"""
+        self._players.pop(room_id, None)
+        self._active.pop(room_id, None)
+
+    async def flush(self) -> None:
+        if self.directory is None:
+            return
+        now = time.monotonic()
+        for room_id in self._pending:
+            self._active[room_id] = now
+        # 終了も切断処理も経ずに消えたルーム（ドレイン後に戻らなかった卓など）は、
+        # Redis側のキーと同じく ROOM_TTL の間記録がなければ片付ける
+        for room_id in [r for r in self._players if now - self._active.get(r, now) > ROOM_TTL]:
+            self.finish_game(room_id)
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        await asyncio.to_thread(self._write_batch, batch)
+
+    async def _flush_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Replay flush failed")
+
+    def _write_batch(self, batch: dict[str, bytearray]) -> None:
+        assert self.directory is not None
+        created = False
+        for room_id, data in batch.items():
+            path = self.directory / f"{room_id}{FILE_SUFFIX}"
+            created = created or not path.exists()
+            with open(path, "ab") as f:
+                f.write(data)
+        if created and self.max_files > 0:
+            self._prune(batch)
+
+    def _prune(self, batch: dict[str, bytearray]) -> None:
+        """max_files を超えた分を更新の古いファイルから消す（書き込み中のルームは残す）。"""
+        assert self.directory is not None
+        files = []
+        for path in self.directory.glob(f"*{FILE_SUFFIX}"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        excess = len(files) - self.max_files
+        if excess <= 0:
+            return
+        files.sort()
+        for _, path in files:
+            if excess <= 0:
+                break
+            if path.stem in batch or path.stem in self._players:
+                continue
+            path.unlink(missing_ok=True)
+            excess -= 1
+
+
+replay_recorder = ReplayRecorder(
+    os.getenv("REPLAY_DIR", ""),
+    flush_interval=float(os.getenv("REPLAY_FLUSH_INTERVAL", "1.0")),
+    max_files=int(os.getenv("REPLAY_MAX_FILES", "1000")),
+)
+
+
+# ---------------------------------------------------------------------------
+# 再生（オフライン）
+# ---------------------------------------------------------------------------
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayGame:
+    """記録ファイルからゲーム状態を再構築するクラス。
+
+    GameServiceと同じルールをRedisを介さずメモリ上で適用する。
+    """
+
+    __slots__ = (
+        "seed", "deck_size", "players", "records",
+        "deck", "seated", "fields", "scores", "current", "phase",
+        "drawn_card", "finished", "step",
+    )
+
+    def __init__(
+        self,
+        seed: int,
+        deck_size: int,
+        players: list[str],
+        records: list[tuple[int, int, int, int]],
+    ) -> None:
+        self.seed = seed
+        self.deck_size = deck_size
+        self.players = players
+        self.records = records
+        self.reset()
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> ReplayGame:
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm:
+            return cls.parse(mm, str(path))
+
+    @classmethod
+    def parse(cls, data: bytes | mmap.mmap, name: str = "replay") -> ReplayGame:
+        if len(data) < HEADER.size:
+            raise ReplayError(f"{name}: ヘッダーが不完全です")
+        magic, version, player_count, deck_size, seed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"{name}: 未対応のフォーマットです")
+        offset = HEADER.size
+        players = []
+        for _ in range(player_count):
+            length = data[offset]
+            players.append(bytes(data[offset + 1:offset + 1 + length]).decode("utf-8"))
+            offset += 1 + length
+        # 書き込み途中の末尾レコードは無視する
+        end = offset + (len(data) - offset) // RECORD.size * RECORD.size
+        records = list(RECORD.iter_unpack(data[offset:end]))
+        return cls(seed, deck_size, players, records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def reset(self) -> None:
+        self.deck = build_deck(self.deck_size, self.seed)
+        self.seated = list(self.players)
+        self.fields: dict[str, list[int]] = {nick: [] for nick in self.players}
+        self.scores: dict[str, int] = {nick: 0 for nick in self.players}
+        self.current = self.players[0] if self.players else ""
+        self.phase = GamePhase.DRAW
+        self.drawn_card: int | None = None
+        self.finished = False
+        self.step = 0
+
+    def seek(self, step: int) -> ReplayGame:
+        """step個のレコードを適用した状態にする（後方へのシークは先頭から再適用）。"""
+        step = max(0, min(step, len(self.records)))
+        if step < self.step:
+            self.reset()
+        while self.step < step:
+            self.apply(*self.records[self.step])
+        return self
+
+    def apply(self, action: int, player: int, card: int, count: int) -> None:
+        nickname = self.players[player] if player != NO_PLAYER else ""
+        match action:
+            case ReplayAction.SCORE:
+                self.scores[nickname] += sum(self.fields[nickname])
+                self.fields[nickname] = []
+                self.phase = GamePhase.DRAW
+            case ReplayAction.DRAW:
+                drawn = self.deck.pop()
+                if drawn != card:
+                    raise ReplayError(
+                        f"step {self.step}: 山札の不一致 (expected={card} actual={drawn})"
+                    )
+                field = self.fields[nickname]
+                field.append(drawn)
+                if len(field) >= 4 and field.count(drawn) >= 2:
+                    self.phase = GamePhase.BURST
+                elif any(
+                    drawn in self.fields[nick]
+                    for nick in self.seated if nick != nickname
+                ):
+                    self.phase = GamePhase.STEAL
+                    self.drawn_card = drawn
+                else:
+                    self.phase = GamePhase.DRAWN
+            case ReplayAction.STEAL:
+                for nick in self.seated:
+                    if nick == nickname:
+                        continue
+                    field = self.fields[nick]
+                    stolen = field.count(card)
+                    if stolen:
+                        self.fields[nick] = [c for c in field if c != card]
+                        self.fields[nickname].extend([card] * stolen)
+                self.phase = GamePhase.DRAWN
+                self.drawn_card = None
+            case ReplayAction.SKIP_STEAL:
+                self.phase = GamePhase.DRAWN
+                self.drawn_card = None
+            case ReplayAction.BURST:
+                self.fields[nickname] = []
+                if self.deck:  # 山札0枚ならこの後にENDが続く
+                    self._advance()
+            case ReplayAction.END_TURN:
+                self._advance()
+            case ReplayAction.LEAVE:
+                if nickname in self.seated:
+                    self.seated.remove(nickname)
+                    # GameService.handle_disconnect と同じく、手番のプレイヤーが抜けたら次の人へ回す
+                    # （全員が抜けた場合はルームごと削除されるので回さない）
+                    if nickname == self.current and self.seated and not self.finished:
+                        self._advance()
+            case ReplayAction.END:
+                for nick in self.seated:
+                    self.scores[nick] += sum(self.fields[nick])
+                    self.fields[nick] = []
+                self.finished = True
+            case _:
+                raise ReplayError(f"step {self.step}: 不明なアクション {action}")
+        self.step += 1
+
+    def _advance(self) -> None:
+        # RedisClient.advance_turn と同じく、開始時のターン順で次の着席プレイヤーへ進める
+        n = len(self.players)
+        idx = self.players.index(self.current)
+        for _ in range(n):
+            idx = (idx + 1) % n
+            if self.players[idx] in self.seated:
+                self.current = self.players[idx]
+                break
+        self.phase = GamePhase.SCORE if self.fields[self.current] else GamePhase.DRAW
+        self.drawn_card = None
+
+    def snapshot(self) -> GameStatePayload:
+        return GameStatePayload(
+            fields={nick: list(self.fields[nick]) for nick in self.seated},
+            deck_count=len(self.deck),
+            scores=dict(self.scores),
+            current_player=self.current,
+            phase=self.phase,
+        )
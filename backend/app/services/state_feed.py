@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from app.models.game import GameStatePayload
+
+logger = logging.getLogger(__name__)
+
+# ロングポーリング（?since=）で変更を待つ最大時間（秒）
+STATE_POLL_TIMEOUT = float(os.getenv("STATE_POLL_TIMEOUT", "25"))
+# バージョンを保持するルーム数の上限（超えたら待機中のポーラーがいない古いものを捨てる）
+_MAX_TRACKED_ROOMS = 4096
+
+# バージョンはプロセス内の全ルームで共通の単調増加カウンター。
+# 起動時刻（マイクロ秒）から数え始めるので、ワーカーの再起動やルームの追い出し後も
+# 以前に返したバージョンと重ならず、古い ETag / since が一致してしまうことがない。
+_versions = itertools.count(time.time_ns() // 1000)
+
+StateBuilder = Callable[[str], Awaitable[GameStatePayload | None]]
+
+
+class _RoomFeed:
+    """ルームごとのバージョン・共有スナップショット・待機中のポーラー。"""
+
+    __slots__ = ("version", "changed", "body", "body_version", "loading", "waiters", "touched")
+
+    def __init__(self) -> None:
+        self.version = next(_versions)
+        # notify() のたびに set して新しい Event に差し替える
+        self.changed = asyncio.Event()
+        self.body: bytes | None = None
+        self.body_version = -1
+        self.loading: asyncio.Task[tuple[int, bytes | None]] | None = None
+        self.waiters = 0
+        self.touched = time.monotonic()
+
+
+class StateFeed:
+    """REST の GET /rooms/{room_id}/state 向けに、ルームの状態のバージョンとスナップショットを管理するクラス。
+
+    GameService が game_state の送信を予約するたびに notify() でバージョンを進め、
+    ロングポーリング中のリクエストを起こす（Redisをポーリングしない）。
+    スナップショットはバージョンごとに1回だけ組み立て、同じバージョンを読む全リクエストで共有する。
+    参照されたことのないルームは何も保持しない。
+    """
+
+    def __init__(self) -> None:
+        self._rooms: dict[str, _RoomFeed] = {}
+        self._build: StateBuilder | None = None
+
+    def start(self, build: StateBuilder) -> None:
+        self._build = build
+
+    def notify(self, room_id: str) -> None:
+        room = self._rooms.get(room_id)
+        if room is None:
+            return
+        room.version = next(_versions)
+        room.changed.set()
+        room.changed = asyncio.Event()
+
+    def tracking(self, room_id: str) -> bool:
+        """room_id を参照したリクエストがあり、まだ追い出されていなければ True。"""
+        return room_id in self._rooms
+
+    def finish(self, room_id: str, state: GameStatePayload | None) -> None:
+        """ルームのキーを消す直前に呼ぶ。最終状態を新しいバージョンとして保持する。
+
+        保持した最終状態は追い出されるまで（STATE_POLL_TIMEOUT 以上参照されなくなるまで）
+        Redis を読まずに返すので、終了直後のポーラーが404を受け取らない。
+        """
+        room = self._rooms.get(room_id)
+        if room is None:
+            return
+        if state is None:
+            self.drop(room_id)
+            return
+        room.version = next(_versions)
+        room.body = state.model_dump_json().encode()
+        room.body_version = room.version
+        room.changed.set()
+        room.changed = asyncio.Event()
+
+    def drop(self, room_id: str) -> None:
+        """ルーム削除時に呼ぶ。待機中のポーラーは起こされ、次の読み出しで404になる。"""
+        room = self._rooms.pop(room_id, None)
+        if room is not None:
+            room.changed.set()
+
+    async def snapshot(self, room_id: str) -> tuple[int, bytes | None]:
+        """(バージョン, GameStatePayload のJSON) を返す。ゲーム中でなければ JSON は None。"""
+        room = self._room(room_id)
+        if room.body is not None and room.body_version == room.version:
+            return room.version, room.body
+        if room.loading is None:
+            room.loading = asyncio.create_task(self._load(room_id, room))
+        # 読み出しを待つリクエストが切断されても、共有の読み出しは止めない
+        return await asyncio.shield(room.loading)
+
+    async def wait(self, room_id: str, since: int, timeout: float) -> None:
+        """バージョンが since から変わるか timeout 秒経つまで待つ。"""
+        room = self._room(room_id)
+        if room.version != since:
+            return
+        changed = room.changed
+        room.waiters += 1
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            room.waiters -= 1
+            room.touched = time.monotonic()
+
+    async def _load(self, room_id: str, room: _RoomFeed) -> tuple[int, bytes | None]:
+        assert self._build is not None
+        # 読み出し中に変更された場合も、読み始めたときのバージョンとして返す
+        # （次のリクエストで新しいバージョンを読み直すので、古い内容に新しい ETag が付くことはない）
+        version = room.version
+        try:
+            state = await self._build(room_id)
+        finally:
+            room.loading = None
+        body = state.model_dump_json().encode() if state is not None else None
+        # ルームがない・ゲーム前の結果は TTL 切れなど notify() を伴わずに変わりうるのでキャッシュしない
+        if body is not None and room.version == version:
+            room.body = body
+            room.body_version = version
+        return version, body
+
+    def _room(self, room_id: str) -> _RoomFeed:
+        room = self._rooms.get(room_id)
+        if room is None:
+            if len(self._rooms) >= _MAX_TRACKED_ROOMS:
+                self._evict()
+            room = self._rooms[room_id] = _RoomFeed()
+        room.touched = time.monotonic()
+        return room
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - STATE_POLL_TIMEOUT
+        self._rooms = {
+            room_id: room
+            for room_id, room in self._rooms.items()
+            if room.waiters or room.loading is not None or room.touched > cutoff
+        }
+        logger.debug("State feed evicted", extra={"rooms": len(self._rooms)})
+
+
+state_feed = StateFeed()
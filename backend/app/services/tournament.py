@@ -0,0 +1,443 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+from typing import TYPE_CHECKING
+
+from fastapi import WebSocket
+
+from app.models.game import (
+    MIN_PLAYERS,
+    GameError,
+    PlayerJoinedPayload,
+    TournamentInfo,
+    TournamentJoinedPayload,
+    TournamentRoundPayload,
+    TournamentStanding,
+    TournamentStandingsPayload,
+    TournamentStatus,
+)
+from app.routing import new_room_id
+
+if TYPE_CHECKING:
+    from app.services.game_service import GameService
+
+logger = logging.getLogger(__name__)
+
+# 全卓の終了から次のラウンドの着席までの時間（結果を見せる間）
+TOURNAMENT_ROUND_DELAY = float(os.getenv("TOURNAMENT_ROUND_DELAY", "15"))
+TOURNAMENT_MAX_ENTRANTS = int(os.getenv("TOURNAMENT_MAX_ENTRANTS", "1000"))
+# 終了後も結果を参照できるよう保持するトーナメント数
+_MAX_FINISHED = 100
+
+# ---------------------------------------------------------------------------
+# 進め方
+# ---------------------------------------------------------------------------
+#
+# 1. 管理APIで作成し、プレイヤーはロビーから join_tournament で登録する
+# 2. 開始すると、接続中の登録者を table_size 人以下のなるべく均等な卓に分け、
+#    全卓のルーム作成・ゲーム開始をまとめて行う（Redisへはシャードごとに1往復ずつ）
+# 3. 各卓の _end_game から結果を受け取り、順位点（その卓で自分より得点の低かった人数）を加算する
+# 4. 全卓が終わったら順位表を配り、TOURNAMENT_ROUND_DELAY 秒後に順位表の上から順に次の卓へ着席させる
+#    （上位同士・下位同士が当たるスイス式）。rounds 回で終了する
+#
+# 着席時に接続していない登録者はそのラウンドを休み（0点）、再接続して join_tournament を
+# 送り直せば次のラウンドから戻る。状態は担当ワーカーのメモリ上にのみ持つため、
+# 開催中のドレイン・再起動はまたげない。
+
+
+class _Entrant:
+    __slots__ = ("player_id", "nickname", "ws", "order", "points", "score", "games", "wins", "room_id")
+
+    def __init__(self, player_id: str, nickname: str, ws: WebSocket, order: int) -> None:
+        self.player_id = player_id
+        self.nickname = nickname
+        self.ws: WebSocket | None = ws  # 辞退した登録者は None
+        self.order = order       # 登録順（最後のタイブレーク）
+        self.points = 0
+        self.score = 0
+        self.games = 0
+        self.wins = 0
+        # 直近のラウンドで着席した卓（次のラウンドはここかロビーから移動させる）
+        self.room_id: str | None = None
+
+
+class Tournament:
+    def __init__(self, tournament_id: str, rounds: int, table_size: int) -> None:
+        self.id = tournament_id
+        self.rounds = rounds
+        self.table_size = table_size
+        self.status = TournamentStatus.REGISTERING
+        self.round = 0
+        self.entrants: dict[str, _Entrant] = {}
+        # 現在のラウンドで終了していない卓: room_id -> {nickname: player_id}
+        self.tables: dict[str, dict[str, str]] = {}
+        self.next_round: asyncio.Task[None] | None = None
+
+    def ranked(self) -> list[_Entrant]:
+        return sorted(
+            self.entrants.values(), key=lambda e: (-e.points, -e.score, -e.wins, e.order)
+        )
+
+    def standings(self) -> list[TournamentStanding]:
+        return [
+            TournamentStanding(
+                rank=rank,
+                nickname=e.nickname,
+                points=e.points,
+                score=e.score,
+                games=e.games,
+                wins=e.wins,
+            )
+            for rank, e in enumerate(self.ranked(), 1)
+        ]
+
+    def info(self) -> TournamentInfo:
+        return TournamentInfo(
+            tournament_id=self.id,
+            status=self.status,
+            round=self.round,
+            rounds=self.rounds,
+            table_size=self.table_size,
+            player_count=len(self.entrants),
+            tables_playing=len(self.tables),
+            standings=self.standings(),
+        )
+
+
+def table_sizes(players: int, table_size: int) -> list[int]:
+    """players 人を table_size 人以下のなるべく均等な卓に分ける（どの卓も MIN_PLAYERS 人以上）。"""
+    tables = -(-players // table_size)
+    # 3人を2人卓に分けるような場合は、1人卓を作らず卓を減らして1人ずつ多く座らせる
+    while tables > 1 and players // tables < MIN_PLAYERS:
+        tables -= 1
+    base, extra = divmod(players, tables)
+    return [base + 1] * extra + [base] * (tables - extra)
+
+
+class TournamentDirector:
+    """トーナメントの登録・ラウンドごとの一括着席・結果の集計を担当するクラス。"""
+
+    def __init__(self, round_delay: float = TOURNAMENT_ROUND_DELAY) -> None:
+        self.round_delay = round_delay
+        self._tournaments: dict[str, Tournament] = {}
+        # player_id -> 登録中のトーナメント（同時に登録できるのは1つ）
+        self._entries: dict[str, Tournament] = {}
+        # room_id -> その卓のトーナメント（終了していない卓のみ）
+        self._tables: dict[str, Tournament] = {}
+        self._service: GameService | None = None
+
+    def start(self, service: GameService) -> None:
+        self._service = service
+
+    async def stop(self) -> None:
+        tasks = [t.next_round for t in self._tournaments.values() if t.next_round is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get(self, tournament_id: str) -> Tournament | None:
+        return self._tournaments.get(tournament_id)
+
+    def create(self, rounds: int, table_size: int) -> Tournament:
+        finished = [t.id for t in self._tournaments.values() if t.status == TournamentStatus.FINISHED]
+        for tournament_id in finished[: max(0, len(finished) - _MAX_FINISHED + 1)]:
+            del self._tournaments[tournament_id]
+        tournament = Tournament(new_room_id("t"), rounds, table_size)
+        self._tournaments[tournament.id] = tournament
+        logger.info(
+            "Tournament created",
+            extra={"tournament": tournament.id, "rounds": rounds, "table_size": table_size},
+        )
+        return tournament
+
+    # ---------------------------------------------------------------------------
+    # 登録
+    # ---------------------------------------------------------------------------
+
+    async def register(
+        self,
+        ws: WebSocket,
+        player_id: str,
+        room_id: str,
+        tournament_id: str,
+        nickname: str,
+    ) -> None:
+        tournament = self._tournaments.get(tournament_id)
+        if tournament is None or self._service is None:
+            # 別のワーカーに接続している場合も見つからない（?room=<tournament_id> 付きで接続する）
+            raise GameError("TOURNAMENT_NOT_FOUND", f"トーナメント '{tournament_id}' が見つかりません")
+        entrant = tournament.entrants.get(player_id)
+        if entrant is not None:
+            # 再接続した登録者は新しいソケットで次のラウンドから着席する
+            entrant.ws = ws
+        else:
+            if room_id != "lobby":
+                raise GameError("ALREADY_IN_ROOM", "すでにルームに参加しています")
+            if tournament.status != TournamentStatus.REGISTERING:
+                raise GameError("TOURNAMENT_CLOSED", "登録の受付は終了しています")
+            if player_id in self._entries:
+                raise GameError("ALREADY_REGISTERED", "すでに別のトーナメントに登録しています")
+            if len(tournament.entrants) >= TOURNAMENT_MAX_ENTRANTS:
+                raise GameError("TOURNAMENT_FULL", "トーナメントの定員に達しています")
+            if any(e.nickname == nickname for e in tournament.entrants.values()):
+                raise GameError("NICKNAME_TAKEN", f"ニックネーム '{nickname}' はすでに使用されています")
+            entrant = _Entrant(player_id, nickname, ws, len(tournament.entrants))
+            tournament.entrants[player_id] = entrant
+            self._entries[player_id] = tournament
+
+        seated = entrant.room_id if entrant.room_id in tournament.tables else None
+        await self._service.manager.send_personal(
+            ws,
+            {
+                "type": "tournament_joined",
+                "payload": TournamentJoinedPayload(
+                    tournament_id=tournament.id,
+                    nickname=entrant.nickname,
+                    status=tournament.status,
+                    round=tournament.round,
+                    player_count=len(tournament.entrants),
+                    room_id=seated,
+                ).model_dump(),
+            },
+        )
+
+    def withdraw(self, player_id: str) -> None:
+        """登録を取り消す。開始後は次のラウンドから着席させない（それまでの成績は順位表に残す）。"""
+        tournament = self._entries.pop(player_id, None)
+        if tournament is None:
+            return
+        if tournament.status == TournamentStatus.REGISTERING:
+            del tournament.entrants[player_id]
+            for order, entrant in enumerate(tournament.entrants.values()):
+                entrant.order = order
+        else:
+            tournament.entrants[player_id].ws = None
+
+    # ---------------------------------------------------------------------------
+    # ラウンドの進行（管理API）
+    # ---------------------------------------------------------------------------
+
+    async def begin(self, tournament_id: str) -> Tournament:
+        """登録を締め切り、最初のラウンドを始める。"""
+        tournament = self._require(tournament_id)
+        if tournament.status != TournamentStatus.REGISTERING:
+            raise GameError("TOURNAMENT_STARTED", "トーナメントはすでに開始されています")
+        tournament.status = TournamentStatus.RUNNING
+        try:
+            await self._seat_round(tournament)
+        except Exception:
+            # 卓を作れなかった場合は登録受付中に戻し、開始をやり直せるようにする
+            tournament.status = TournamentStatus.REGISTERING
+            raise
+        return tournament
+
+    async def advance(self, tournament_id: str) -> Tournament:
+        """終わっていない卓をその時点の得点で打ち切り、ラウンドを終える（時間切れ・放置された卓）。"""
+        tournament = self._require(tournament_id)
+        if tournament.status != TournamentStatus.RUNNING:
+            raise GameError("TOURNAMENT_NOT_RUNNING", "進行中のトーナメントではありません")
+        assert self._service is not None
+        for room_id in list(tournament.tables):
+            # 打ち切った卓の結果も _end_game から record_result に届く
+            await self._service.finish_game(room_id)
+        if tournament.next_round is not None and not tournament.next_round.done():
+            # 結果表示の待ち時間も飛ばす（順位表はすぐに次のラウンドが始まる旨で送り直す）
+            tournament.next_round.cancel()
+            await self._close_round(tournament, delay=0)
+        return tournament
+
+    def _require(self, tournament_id: str) -> Tournament:
+        tournament = self._tournaments.get(tournament_id)
+        if tournament is None:
+            raise GameError("TOURNAMENT_NOT_FOUND", f"トーナメント '{tournament_id}' が見つかりません")
+        return tournament
+
+    async def _seat_round(self, tournament: Tournament) -> None:
+        assert self._service is not None
+        service = self._service
+        manager = service.manager
+        if tournament.round == 0:
+            # 最初のラウンドは成績がないので無作為に分ける
+            order = list(tournament.entrants.values())
+            random.shuffle(order)
+        else:
+            order = tournament.ranked()
+
+        present: list[tuple[_Entrant, str]] = []
+        for entrant in order:
+            if entrant.ws is None:
+                continue
+            location = manager.room_of(entrant.ws, "")
+            # 切断済み、またはトーナメント外のルーム・観戦に移った登録者はこのラウンドを休む
+            if manager.rooms.get(location, {}).get(entrant.player_id) is not entrant.ws:
+                continue
+            if location != "lobby" and location != entrant.room_id:
+                continue
+            present.append((entrant, location))
+
+        if len(present) < MIN_PLAYERS:
+            logger.warning(
+                "Tournament ended early",
+                extra={"tournament": tournament.id, "present": len(present)},
+            )
+            await self._finish(tournament)
+            return
+
+        rooms: list[tuple[str, int, list[tuple[str, str]]]] = []
+        seats: list[list[tuple[_Entrant, str]]] = []
+        start = 0
+        for size in table_sizes(len(present), tournament.table_size):
+            group = present[start:start + size]
+            start += size
+            rooms.append((new_room_id(), size, [(e.player_id, e.nickname) for e, _ in group]))
+            seats.append(group)
+        # 卓の登録はルームを作れてから行う（作成に失敗した卓が残ると _table_done が呼ばれず、
+        # ラウンドが終わらない）。失敗した場合はラウンドを進めずに呼び出し元へ返す
+        await service.redis.create_rooms_bulk(rooms)
+        tournament.round += 1
+        for (room_id, _, _), group in zip(rooms, seats):
+            tournament.tables[room_id] = {e.nickname: e.player_id for e, _ in group}
+            self._tables[room_id] = tournament
+
+        for table, ((room_id, size, players), group) in enumerate(zip(rooms, seats), 1):
+            for entrant, location in group:
+                await manager.move_player(location, room_id, entrant.player_id, entrant.ws)
+                entrant.room_id = room_id
+            nicknames = [nick for _, nick in players]
+            await manager.broadcast(
+                room_id,
+                {
+                    "type": "player_joined",
+                    "payload": PlayerJoinedPayload(
+                        room_id=room_id,
+                        nickname=nicknames[-1],
+                        player_count=size,
+                        max_players=size,
+                        host_nickname=nicknames[0],
+                        players=nicknames,
+                    ).model_dump(),
+                },
+            )
+            await manager.broadcast(
+                room_id,
+                {
+                    "type": "tournament_round",
+                    "payload": TournamentRoundPayload(
+                        tournament_id=tournament.id,
+                        round=tournament.round,
+                        rounds=tournament.rounds,
+                        table=table,
+                    ).model_dump(),
+                },
+            )
+
+        await service.begin_games(
+            [(room_id, [nick for _, nick in players]) for room_id, _, players in rooms]
+        )
+        logger.info(
+            "Tournament round started",
+            extra={
+                "tournament": tournament.id,
+                "round": tournament.round,
+                "tables": len(rooms),
+                "players": len(present),
+            },
+        )
+
+    # ---------------------------------------------------------------------------
+    # 結果の集計（GameService から呼ばれる）
+    # ---------------------------------------------------------------------------
+
+    def record_result(self, room_id: str, scores: list[tuple[str, int]]) -> None:
+        """卓の最終得点（nickname, score の得点順）を成績に加える。トーナメントの卓でなければ何もしない。"""
+        tournament = self._tables.pop(room_id, None)
+        if tournament is None:
+            return
+        seated = tournament.tables.pop(room_id, {})
+        final = dict(scores)
+        for nickname, player_id in seated.items():
+            entrant = tournament.entrants.get(player_id)
+            if entrant is None:
+                continue
+            score = final.get(nickname, 0)
+            # 順位点: 同じ卓で自分より得点の低かった人数（同点は同じ点）
+            beaten = sum(1 for other in seated if final.get(other, 0) < score)
+            entrant.points += beaten
+            entrant.score += score
+            entrant.games += 1
+            if beaten == len(seated) - 1:
+                entrant.wins += 1
+        self._table_done(tournament)
+
+    def abandon_table(self, room_id: str) -> None:
+        """全員が切断して削除された卓は結果なしで終えたことにする。"""
+        tournament = self._tables.pop(room_id, None)
+        if tournament is None:
+            return
+        tournament.tables.pop(room_id, None)
+        self._table_done(tournament)
+
+    def _table_done(self, tournament: Tournament) -> None:
+        if tournament.tables or tournament.status != TournamentStatus.RUNNING:
+            return
+        tournament.next_round = asyncio.create_task(self._close_round(tournament))
+
+    async def _close_round(self, tournament: Tournament, delay: float | None = None) -> None:
+        if tournament.round >= tournament.rounds:
+            await self._finish(tournament)
+            return
+        delay = self.round_delay if delay is None else delay
+        await self._announce(tournament, next_round_in_ms=int(delay * 1000))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tournament.next_round = None
+        try:
+            await self._seat_round(tournament)
+        except Exception:
+            # 卓は登録されていないので、round_delay 後に着席からやり直す
+            # （接続中の登録者が MIN_PLAYERS 未満になればそこで終了する）
+            logger.exception("Tournament round failed to start", extra={"tournament": tournament.id})
+            if tournament.status == TournamentStatus.RUNNING and not tournament.tables:
+                tournament.next_round = asyncio.create_task(self._close_round(tournament))
+
+    async def _finish(self, tournament: Tournament) -> None:
+        tournament.status = TournamentStatus.FINISHED
+        for player_id in tournament.entrants:
+            if self._entries.get(player_id) is tournament:
+                del self._entries[player_id]
+        await self._announce(tournament, next_round_in_ms=None)
+        logger.info(
+            "Tournament finished",
+            extra={"tournament": tournament.id, "rounds": tournament.round},
+        )
+
+    async def _announce(self, tournament: Tournament, next_round_in_ms: int | None) -> None:
+        """順位表を登録者全員に送る（卓がばらばらなのでルーム単位のブロードキャストは使えない）。"""
+        data = json.dumps(
+            {
+                "type": "tournament_standings",
+                "payload": TournamentStandingsPayload(
+                    tournament_id=tournament.id,
+                    round=tournament.round,
+                    rounds=tournament.rounds,
+                    status=tournament.status,
+                    next_round_in_ms=next_round_in_ms,
+                    standings=tournament.standings(),
+                ).model_dump(),
+            },
+            ensure_ascii=False,
+        )
+        for entrant in tournament.entrants.values():
+            if entrant.ws is None:
+                continue
+            try:
+                await entrant.ws.send_text(data)
+            except Exception:
+                pass
+
+
+tournaments = TournamentDirector()
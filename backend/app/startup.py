@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.redis.client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+STARTUP_RETRY_INTERVAL = float(os.getenv("STARTUP_RETRY_INTERVAL", "0.5"))
+STARTUP_RETRY_MAX = float(os.getenv("STARTUP_RETRY_MAX", "5"))
+
+
+def _process_started() -> float:
+    """プロセスの起動時刻（time.monotonic() 基準）。
+
+    インタープリターの起動と import の時間も含めるため /proc から取得する。
+    取得できない環境ではこのモジュールの読み込み時刻で代用する。
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # comm にはスペースや括弧が入りうるので、最後の ")" 以降を分割する（先頭は3番目のフィールド）
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.monotonic() - max(age, 0.0)
+    except (OSError, ValueError, IndexError):
+        return time.monotonic()
+
+
+class StartupTracker:
+    """起動の各段階の経過時間を記録し、Redisの準備完了（readiness）を判定するクラス。
+
+    lifespan はRedisを待たずにすぐ yield し、接続・Luaスクリプトの読み込みは
+    バックグラウンドで行う（その間も /health は応答し、WebSocket の受け付けも始まる）。
+    Redisに届くまでは再試行を続け、完了するまで ready は False のまま。
+    """
+
+    def __init__(
+        self,
+        retry_interval: float = STARTUP_RETRY_INTERVAL,
+        retry_max: float = STARTUP_RETRY_MAX,
+    ) -> None:
+        self.retry_interval = retry_interval
+        self.retry_max = retry_max
+        self.started = _process_started()
+        # 段階名 -> プロセス起動からの経過ミリ秒
+        self.phases: dict[str, float] = {}
+        self.ready = False
+        self._task: asyncio.Task[None] | None = None
+
+    def mark(self, phase: str) -> None:
+        self.phases[phase] = round((time.monotonic() - self.started) * 1000, 1)
+
+    def begin(self, store: RedisClient) -> None:
+        self.mark("app_loaded")
+        self._task = asyncio.create_task(self._warm(store))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _warm(self, store: RedisClient) -> None:
+        delay = self.retry_interval
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                await store.warm_up()
+                break
+            except (RedisError, OSError) as e:
+                logger.warning(
+                    "Redis not reachable yet",
+                    extra={"attempt": attempts, "error": str(e), "retry_in": delay},
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max)
+        self.mark("redis_ready")
+        self.ready = True
+        logger.info("Startup complete", extra={**self.phases, "attempts": attempts})
+
+    def report(self) -> dict[str, Any]:
+        return {"ready": self.ready, "phases_ms": dict(self.phases)}
+
+
+startup = StartupTracker()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException
+
+from app.models.game import TournamentInfo
+from app.services.tournament import tournaments
+
+router = APIRouter(prefix="/tournaments")
+
+
+@router.get("/{tournament_id}")
+async def tournament_info(tournament_id: str) -> TournamentInfo:
+    """トーナメントの進行状況と順位表を返す。"""
+    tournament = tournaments.get(tournament_id)
+    if tournament is None:
+        raise HTTPException(status_code=404, detail="Tournament not found")
+    return tournament.info()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+from enum import IntEnum
+
+from fastapi import WebSocket
+
+from app.diagnostics import LoopMonitor, loop_monitor
+from app.logging_config import sampled
+from app.models.game import ServerBusyPayload
+from app.routing import TRUST_PROXY_HEADERS
+
+logger = logging.getLogger(__name__)
+
+# 1013 = Try Again Later
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+class LoadLevel(IntEnum):
+    NORMAL = 0
+    SHED_ROOMS = 1   # 新規ルーム作成（create_room / quick_play）を断る
+    SHED_LOBBY = 2   # 新規のロビー接続を断る（進行中ゲームへの再接続は受け付ける）
+
+
+class AdmissionController:
+    """接続数とイベントループの遅延（LoopMonitor）から負荷段階を判定し、新規の接続・ルーム作成を断るクラス。
+
+    進行中のゲームのレイテンシを守るため、まず新規ルームを、次に新規のロビー接続を断る。
+    ?room= のルーム・トーナメントに席がある接続（ゲーム中の再接続）は上限に達するまで受け付ける。
+    """
+
+    def __init__(
+        self,
+        monitor: LoopMonitor,
+        max_connections: int = 90,
+        max_per_ip: int = 8,
+        room_shed_ratio: float = 0.8,
+        lag_shed_rooms_ms: float = 100.0,
+        lag_shed_lobby_ms: float = 250.0,
+        retry_after_ms: int = 5000,
+    ) -> None:
+        self.monitor = monitor
+        self.max_connections = max_connections
+        self.max_per_ip = max_per_ip
+        self.room_shed_ratio = room_shed_ratio
+        self.lag_shed_rooms_ms = lag_shed_rooms_ms
+        self.lag_shed_lobby_ms = lag_shed_lobby_ms
+        self.retry_after_ms = retry_after_ms
+        self.connections = 0
+        self.per_ip: dict[str, int] = {}
+
+    # ---------------------------------------------------------------------------
+    # 負荷判定
+    # ---------------------------------------------------------------------------
+
+    @property
+    def level(self) -> LoadLevel:
+        lag_ms = self.monitor.lag_ms
+        if lag_ms >= self.lag_shed_lobby_ms:
+            return LoadLevel.SHED_LOBBY
+        if (
+            lag_ms >= self.lag_shed_rooms_ms
+            or self.connections >= self.max_connections * self.room_shed_ratio
+        ):
+            return LoadLevel.SHED_ROOMS
+        return LoadLevel.NORMAL
+
+    @property
+    def shedding_rooms(self) -> bool:
+        return self.level >= LoadLevel.SHED_ROOMS
+
+    @property
+    def shedding_lobby(self) -> bool:
+        return self.level >= LoadLevel.SHED_LOBBY
+
+    # ---------------------------------------------------------------------------
+    # 接続の受付
+    # ---------------------------------------------------------------------------
+
+    @staticmethod
+    def client_ip(ws: WebSocket) -> str:
+        # fly.io のエッジが付与するヘッダーを優先する（エッジを経由しない接続では偽装できるため、
+        # TRUST_PROXY_HEADERS を有効にした場合のみ）
+        if TRUST_PROXY_HEADERS:
+            ip = ws.headers.get("fly-client-ip")
+            if ip:
+                return ip
+        return ws.client.host if ws.client else ""
+
+    def check(self, ip: str, reconnecting: bool) -> str | None:
+        """受け付けられない場合はその理由を返す。"""
+        if self.per_ip.get(ip, 0) >= self.max_per_ip:
+            return "too_many_connections"
+        if self.connections >= self.max_connections:
+            return "capacity"
+        if not reconnecting and self.level >= LoadLevel.SHED_LOBBY:
+            return "overloaded"
+        return None
+
+    def acquire(self, ip: str) -> None:
+        self.connections += 1
+        self.per_ip[ip] = self.per_ip.get(ip, 0) + 1
+
+    def release(self, ip: str) -> None:
+        self.connections -= 1
+        count = self.per_ip.get(ip, 0) - 1
+        if count > 0:
+            self.per_ip[ip] = count
+        else:
+            self.per_ip.pop(ip, None)
+
+    async def reject(self, ws: WebSocket, reason: str) -> None:
+        """server_busy を送ってから接続を閉じる（再接続までの時間はクライアントごとにばらける）。"""
+        if sampled("admission_reject"):
+            logger.warning(
+                "Connection rejected",
+                extra={
+                    "reason": reason,
+                    "connections": self.connections,
+                    "loop_lag_ms": round(self.monitor.lag_ms, 1),
+                },
+            )
+        retry_after_ms = self.retry_after_ms + random.randint(0, self.retry_after_ms)
+        try:
+            await ws.accept()
+            await ws.send_json({
+                "type": "server_busy",
+                "payload": ServerBusyPayload(
+                    reason=reason, retry_after_ms=retry_after_ms
+                ).model_dump(),
+            })
+            await ws.close(code=CLOSE_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+
+admission = AdmissionController(
+    loop_monitor,
+    max_connections=int(os.getenv("MAX_CONNECTIONS", "90")),
+    max_per_ip=int(os.getenv("MAX_CONNECTIONS_PER_IP", "8")),
+    room_shed_ratio=float(os.getenv("ROOM_SHED_RATIO", "0.8")),
+    lag_shed_rooms_ms=float(os.getenv("LAG_SHED_ROOMS_MS", "100")),
+    lag_shed_lobby_ms=float(os.getenv("LAG_SHED_LOBBY_MS", "250")),
+    retry_after_ms=int(os.getenv("BUSY_RETRY_AFTER_MS", "5000")),
+)
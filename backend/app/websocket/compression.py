@@ -0,0 +1,131 @@
+"""WebSocket の permessage-deflate 設定。
+
+uvicorn の既定（websockets の既定値そのまま: ウィンドウ 2^15・memLevel 8・全フレーム圧縮）の代わりに、
+環境変数で調整した設定で圧縮する uvicorn の WebSocket プロトコルクラスを作る。
+game_state は毎回同じキー（ニックネーム・フィールド名）の繰り返しなので、コンテキストを引き継ぐと
+前のフレームとの差分程度まで縮む（ウィンドウは直前の game_state が収まる 2^12 で足りる）。
+ping のような短いフレームは圧縮しても数バイトしか減らずCPUだけ使うため、
+WS_COMPRESSION_MIN_SIZE 未満はそのまま送る。コンテキストを引き継ぐ場合は短いフレームも
+よく縮むので、しきい値を上げるとCPUは減るが送信バイト数は大きく増える。
+
+設定ごとのフレームあたりの送信バイト数とCPU時間は python -m benchmarks.compression で比較できる。
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from websockets import frames
+from websockets.extensions.permessage_deflate import (
+    PerMessageDeflate,
+    ServerPerMessageDeflateFactory,
+)
+from websockets.typing import ExtensionParameter
+
+WS_COMPRESSION = os.getenv("WS_COMPRESSION", "1") != "0"
+WS_COMPRESSION_CONTEXT_TAKEOVER = os.getenv("WS_COMPRESSION_CONTEXT_TAKEOVER", "1") != "0"
+WS_COMPRESSION_WINDOW_BITS = int(os.getenv("WS_COMPRESSION_WINDOW_BITS", "12"))
+WS_COMPRESSION_MIN_SIZE = int(os.getenv("WS_COMPRESSION_MIN_SIZE", "64"))
+WS_COMPRESSION_LEVEL = int(os.getenv("WS_COMPRESSION_LEVEL", "6"))
+WS_COMPRESSION_MEM_LEVEL = int(os.getenv("WS_COMPRESSION_MEM_LEVEL", "5"))
+
+
+@dataclass(frozen=True)
+class DeflateSettings:
+    enabled: bool = WS_COMPRESSION
+    # False なら送信ごとに圧縮辞書を捨てる（接続ごとの zlib の状態をフレーム間で持たない）
+    context_takeover: bool = WS_COMPRESSION_CONTEXT_TAKEOVER
+    # 8〜15。送受信とも 2^window_bits バイトの履歴を使う
+    window_bits: int = WS_COMPRESSION_WINDOW_BITS
+    # これより短いフレーム（UTF-8のバイト数）は圧縮せずに送る
+    min_size: int = WS_COMPRESSION_MIN_SIZE
+    level: int = WS_COMPRESSION_LEVEL
+    mem_level: int = WS_COMPRESSION_MEM_LEVEL
+
+    def factory(self) -> ServerPerMessageDeflateFactory:
+        return _ThresholdDeflateFactory(self)
+
+    def extension(self) -> PerMessageDeflate:
+        """この設定でネゴシエーションした場合のサーバー側の拡張（ベンチマーク用）。"""
+        return _ThresholdDeflate(
+            False,
+            not self.context_takeover,
+            self.window_bits,
+            self.window_bits,
+            {"level": self.level, "memLevel": self.mem_level},
+            min_size=self.min_size,
+        )
+
+
+class _ThresholdDeflate(PerMessageDeflate):
+    """min_size 未満のメッセージを圧縮せずに送る permessage-deflate。
+
+    RFC 7692 では圧縮するかどうかをメッセージごとに選べる（RSV1 が立っていないものは非圧縮）。
+    コンテキストを引き継ぐ場合も、非圧縮で送ったメッセージは履歴に入らないだけで復元には影響しない。
+    """
+
+    def __init__(self, *args: Any, min_size: int, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        # 非圧縮で送り始めたメッセージの継続フレームも非圧縮のまま送る
+        self.skip_cont_data = False
+
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        if frame.opcode in frames.CTRL_OPCODES:
+            return frame
+        if frame.opcode is frames.OP_CONT:
+            if self.skip_cont_data:
+                if frame.fin:
+                    self.skip_cont_data = False
+                return frame
+        elif len(frame.data) < self.min_size:
+            self.skip_cont_data = not frame.fin
+            return frame
+        return super().encode(frame)
+
+
+class _ThresholdDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, settings: DeflateSettings) -> None:
+        super().__init__(
+            server_no_context_takeover=not settings.context_takeover,
+            server_max_window_bits=settings.window_bits,
+            # クライアントが client_max_window_bits を提示した場合のみ有効（受信側の履歴も同じ大きさに抑える）
+            client_max_window_bits=settings.window_bits,
+            compress_settings={"level": settings.level, "memLevel": settings.mem_level},
+        )
+        self.min_size = settings.min_size
+
+    def process_request_params(
+        self,
+        params: Any,
+        accepted_extensions: Any,
+    ) -> tuple[list[ExtensionParameter], PerMessageDeflate]:
+        response, ext = super().process_request_params(params, accepted_extensions)
+        return response, _ThresholdDeflate(
+            ext.remote_no_context_takeover,
+            ext.local_no_context_takeover,
+            ext.remote_max_window_bits,
+            ext.local_max_window_bits,
+            ext.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+def websocket_protocol(settings: DeflateSettings | None = None) -> type:
+    """settings の圧縮設定を使う uvicorn の WebSocket プロトコルクラスを返す（uvicorn.run の ws= に渡す）。"""
+    from uvicorn.protocols.websockets.websockets_impl import (  # noqa: PLC0415
+        WebSocketProtocol,
+    )
+
+    settings = settings or DeflateSettings()
+    # ファクトリーは状態を持たないので全接続で共有する
+    extensions = [settings.factory()] if settings.enabled else []
+
+    class DeflateWebSocketProtocol(WebSocketProtocol):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.available_extensions = extensions
+
+    return DeflateWebSocketProtocol
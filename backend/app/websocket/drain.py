@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import signal
+from collections.abc import Awaitable, Callable
+
+from fastapi import WebSocket
+
+from app.models.game import ServerDrainingPayload
+from app.websocket.manager import ConnectionManager, manager
+
+logger = logging.getLogger(__name__)
+
+# 1012 = Service Restart（クライアントに再接続を促すクローズコード）
+CLOSE_SERVICE_RESTART = 1012
+
+
+class DrainController:
+    """デプロイ時のドレイン（新規ルーム停止 → クライアント通知 → 状態フラッシュ → 切断）を担当するクラス。
+
+    ドレインで切断したソケットはプレイヤーをRedisから削除しないため、
+    クライアントは新しいインスタンスで join_room し直すだけでゲームを再開できる。
+    """
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        grace_seconds: float = 10.0,
+        reconnect_url: str | None = None,
+        reconnect_spread_ms: int = 5000,
+    ) -> None:
+        self.manager = manager
+        self.grace_seconds = grace_seconds
+        self.reconnect_url = reconnect_url or None
+        self.reconnect_spread_ms = reconnect_spread_ms
+        self.draining = False
+        # ドレインが再接続を促した・閉じたソケット（id(ws)）。これらの切断では席を残す
+        self._released: set[int] = set()
+        self._flush_hooks: list[Callable[[], Awaitable[None]]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def add_flush_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """ドレイン時に呼ばれる、メモリ上の状態を永続化するコールバックを登録する。"""
+        self._flush_hooks.append(hook)
+
+    def payload(self) -> dict:
+        """再接続のタイミングをクライアントごとにずらした server_draining イベントを返す。"""
+        return {
+            "type": "server_draining",
+            "payload": ServerDrainingPayload(
+                reconnect_url=self.reconnect_url,
+                retry_after_ms=random.randint(0, self.reconnect_spread_ms),
+            ).model_dump(),
+        }
+
+    async def notify(self, ws: WebSocket) -> None:
+        """ソケットに server_draining を送り、以降の切断で席を残す対象にする。"""
+        self._released.add(id(ws))
+        await self.manager.send_personal(ws, self.payload())
+
+    def take_released(self, ws: WebSocket) -> bool:
+        """ソケットがドレインで再接続を促した・閉じたものかを返し、記録から外す。"""
+        if id(ws) not in self._released:
+            return False
+        self._released.discard(id(ws))
+        return True
+
+    def install_signal_handler(self, sig: signal.Signals = signal.SIGUSR1) -> None:
+        """シグナル受信でドレインを開始し、完了後にSIGTERMでプロセスを終了させる。"""
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(sig, self.start, True)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows やメインスレッド外のイベントループでは /admin/drain のみ利用できる
+            logger.warning("Drain signal handler is not available on this loop")
+
+    def start(self, exit_after: bool = False) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.drain(exit_after))
+
+    async def drain(self, exit_after: bool = False) -> None:
+        if self.draining:
+            return
+        self.draining = True
+        logger.info("Drain started: connections=%d", sum(1 for _ in self.manager.connections()))
+
+        await self.flush()
+        for _, _, ws in self.manager.connections():
+            try:
+                await self.notify(ws)
+            except Exception:
+                pass
+
+        # 猶予期間内に自発的に再接続しなかったソケットを閉じる
+        deadline = asyncio.get_running_loop().time() + self.grace_seconds
+        while any(True for _ in self.manager.connections()):
+            if asyncio.get_running_loop().time() >= deadline:
+                break
+            await asyncio.sleep(0.5)
+        for _, _, ws in self.manager.connections():
+            self._released.add(id(ws))
+            try:
+                await ws.close(code=CLOSE_SERVICE_RESTART)
+            except Exception:
+                pass
+
+        await self.flush()
+        logger.info("Drain completed")
+        if exit_after:
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    async def flush(self) -> None:
+        for hook in self._flush_hooks:
+            try:
+                await hook()
+            except Exception:
+                logger.exception("Drain flush hook failed")
+
+
+drain_controller = DrainController(
+    manager,
+    grace_seconds=float(os.getenv("DRAIN_GRACE_SECONDS", "10")),
+    reconnect_url=os.getenv("DRAIN_RECONNECT_URL", ""),
+    reconnect_spread_ms=int(os.getenv("DRAIN_RECONNECT_SPREAD_MS", "5000")),
+)
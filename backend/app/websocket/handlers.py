@@ -1,30 +1,80 @@
 from __future__ import annotations
 
+import json
 import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, NamedTuple
 
 from fastapi import WebSocket
-from pydantic import ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from app.models.game import (
+    CancelQuickPlayPayload,
     ConfirmBurstPayload,
     CreateRoomPayload,
     DrawCardPayload,
+    EndTurnPayload,
     GameError,
     JoinRoomPayload,
+    JoinTournamentPayload,
     LeaveRoomPayload,
+    LeaveTournamentPayload,
+    PongPayload,
+    QuickPlayPayload,
     ScoreCardsPayload,
     SkipStealPayload,
     StartGamePayload,
     StealCardPayload,
+    WatchRoomPayload,
 )
+from app.routing import owns_room
 from app.services.game_service import GameService
+from app.services.matchmaking import matchmaker
+from app.services.tournament import tournaments
+from app.websocket.admission import admission
+from app.websocket.drain import drain_controller
 
 logger = logging.getLogger(__name__)
 
 
+def _require_owner(room_id: str) -> None:
+    """room_id を担当していないワーカーへの接続なら、担当ワーカーへ繋ぎ直すよう伝える。
+
+    ルームの状態変更通知・ソケット・トーナメントは担当ワーカーのプロセス内にしかないため、
+    別のワーカーでは参加・観戦できない。ルーターは ?room= で担当ワーカーに振り分ける。
+    """
+    if not owns_room(room_id):
+        raise GameError(
+            "WRONG_WORKER",
+            f"ルーム '{room_id}' は別のワーカーが担当しています。?room={room_id} を付けて接続し直してください",
+        )
+
+
+class _Route(NamedTuple):
+    # Noneはフィールドを持たないペイロード（検証・モデル生成を省略する）
+    validate: Callable[[Any], Any] | None
+    handler: Callable[..., Awaitable[str | None]]
+
+
+def _route(model: type[BaseModel], handler: Callable[..., Awaitable[str | None]]) -> _Route:
+    if not model.model_fields:
+        return _Route(None, handler)
+    return _Route(TypeAdapter(model).validate_python, handler)
+
+
+def _validation_message(e: ValidationError) -> str:
+    """ValidationErrorの全文整形（str(e)）を避け、最初のエラーだけを短く返す。"""
+    err = e.errors(include_url=False, include_context=False, include_input=False)[0]
+    loc = ".".join(str(part) for part in err["loc"])
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
 class EventHandler:
     """WebSocketイベントのルーティングとGameServiceへの委譲を担当するクラス。"""
 
+    # イベントタイプ -> (検証関数, ハンドラー)。クラス定義後に一度だけ構築する
+    routes: dict[str, _Route] = {}
+
     def __init__(self, game_service: GameService) -> None:
         self.service = game_service
 
@@ -41,54 +91,61 @@ class EventHandler:
         エラー時はerrorイベントをクライアントに送信する。
         """
         event_type: str = event.get("type", "")
-        payload: dict = event.get("payload", {})
+        route = self.routes.get(event_type)
+        if route is None:
+            await self._send_error(ws, f"未知のイベント: {event_type}", "UNKNOWN_EVENT")
+            return None
 
+        payload = event.get("payload", {})
         try:
-            match event_type:
-                case "create_room":
-                    return await self._handle_create_room(ws, player_id, payload)
-                case "join_room":
-                    return await self._handle_join_room(ws, player_id, room_id, payload)
-                case "start_game":
-                    await self._handle_start_game(ws, player_id, room_id, payload)
-                case "score_cards":
-                    await self._handle_score_cards(player_id, room_id, payload)
-                case "draw_card":
-                    await self._handle_draw_card(player_id, room_id, payload)
-                case "steal_card":
-                    await self._handle_steal_card(player_id, room_id, payload)
-                case "skip_steal":
-                    await self._handle_skip_steal(player_id, room_id, payload)
-                case "confirm_burst":
-                    await self._handle_confirm_burst(player_id, room_id, payload)
-                case "end_turn":
-                    await self._handle_end_turn(player_id, room_id, payload)
-                case "leave_room":
-                    await self._handle_leave_room(player_id, room_id, payload)
-                case _:
-                    await self._send_error(
-                        ws,
-                        f"未知のイベント: {event_type}",
-                        "UNKNOWN_EVENT",
-                    )
+            if route.validate is not None:
+                data = route.validate(payload)
+            elif isinstance(payload, dict):
+                data = None
+            else:
+                raise GameError("VALIDATION_ERROR", "payload: Input should be a valid dictionary")
+            return await route.handler(self, ws, player_id, room_id, data)
         except GameError as e:
             await self._send_error(ws, e.message, e.code)
         except ValidationError as e:
-            await self._send_error(ws, str(e), "VALIDATION_ERROR")
+            await self._send_error(ws, _validation_message(e), "VALIDATION_ERROR")
         except Exception:
             logger.exception("Unexpected error: player=%s event=%s", player_id, event_type)
             await self._send_error(ws, "内部エラーが発生しました", "INTERNAL_ERROR")
 
         return None
 
+    async def disconnect(self, ws: WebSocket, player_id: str, room_id: str) -> None:
+        """切断された接続を片付ける（受信ループの終了時とハートビートでの切断時に共通）。
+
+        同じ接続に対して複数回呼ばれても、席の解放は一度だけ行う。
+        """
+        manager = self.service.manager
+        matchmaker.cancel(player_id)
+        room_id = manager.room_of(ws, room_id)
+        if manager.is_spectator(room_id, player_id):
+            manager.unwatch(room_id, player_id)
+            return
+        if not manager.disconnect(room_id, player_id, ws):
+            # 片付け済み、または同じplayer_idで再接続済み（新しいソケットが席を引き継いでいる）
+            return
+        # ドレインが再接続を促した・閉じたソケットの切断では席を残し、新しいインスタンスでの再接続を待つ
+        # （ドレイン開始後に接続したソケットは、ドレイン中でも通常どおり片付ける）
+        released = drain_controller.take_released(ws)
+        if room_id != "lobby" and not released:
+            await self.service.handle_disconnect(player_id, room_id)
+
     # ---------------------------------------------------------------------------
     # 各イベントハンドラー
     # ---------------------------------------------------------------------------
 
     async def _handle_create_room(
-        self, ws: WebSocket, player_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: CreateRoomPayload
     ) -> str:
-        data = CreateRoomPayload(**payload)
+        if drain_controller.draining:
+            raise GameError("SERVER_DRAINING", "サーバーのメンテナンス中のため新しいルームは作成できません")
+        if admission.shedding_rooms:
+            raise GameError("SERVER_BUSY", "サーバーが混み合っているため新しいルームは作成できません")
         new_room_id = await self.service.create_room(
             ws=ws,
             player_id=player_id,
@@ -98,9 +155,9 @@ class EventHandler:
         return new_room_id
 
     async def _handle_join_room(
-        self, ws: WebSocket, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: JoinRoomPayload
     ) -> str:
-        data = JoinRoomPayload(**payload)
+        _require_owner(data.room_id)
         await self.service.join_room(
             ws=ws,
             player_id=player_id,
@@ -110,52 +167,105 @@ class EventHandler:
         return data.room_id
 
     async def _handle_start_game(
-        self, ws: WebSocket, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        StartGamePayload(**payload)
         await self.service.start_game(ws=ws, player_id=player_id, room_id=room_id)
 
     async def _handle_score_cards(
-        self, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        ScoreCardsPayload(**payload)
         await self.service.score_cards(player_id=player_id, room_id=room_id)
 
     async def _handle_draw_card(
-        self, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        DrawCardPayload(**payload)
         await self.service.draw_card(player_id=player_id, room_id=room_id)
 
     async def _handle_steal_card(
-        self, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        StealCardPayload(**payload)  # 空ペイロード検証のみ
         await self.service.steal_card(player_id=player_id, room_id=room_id)
 
     async def _handle_skip_steal(
-        self, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        SkipStealPayload(**payload)
         await self.service.skip_steal(player_id=player_id, room_id=room_id)
 
     async def _handle_confirm_burst(
-        self, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        ConfirmBurstPayload(**payload)
         await self.service.confirm_burst(player_id=player_id, room_id=room_id)
 
     async def _handle_end_turn(
-        self, player_id: str, room_id: str, payload: dict
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
     ) -> None:
-        StartGamePayload(**payload)  # 空ペイロード検証
         await self.service.end_turn(player_id=player_id, room_id=room_id)
 
     async def _handle_leave_room(
-        self, player_id: str, room_id: str, payload: dict
-    ) -> None:
-        LeaveRoomPayload(**payload)
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
+    ) -> str | None:
+        if self.service.manager.is_spectator(room_id, player_id):
+            # 観戦者はロビーへ戻るだけ（席を持たないためGameServiceの処理は不要）
+            self.service.manager.unwatch(room_id, player_id)
+            await self.service.manager.move_player(room_id, "lobby", player_id, ws)
+            return "lobby"
         await self.service.handle_disconnect(player_id=player_id, room_id=room_id)
+        return None
+
+    async def _handle_watch_room(
+        self, ws: WebSocket, player_id: str, room_id: str, data: WatchRoomPayload
+    ) -> str:
+        _require_owner(data.room_id)
+        await self.service.watch_room(
+            ws=ws, player_id=player_id, from_room=room_id, room_id=data.room_id
+        )
+        return data.room_id
+
+    async def _handle_quick_play(
+        self, ws: WebSocket, player_id: str, room_id: str, data: QuickPlayPayload
+    ) -> None:
+        if drain_controller.draining:
+            raise GameError("SERVER_DRAINING", "サーバーのメンテナンス中のためクイックプレイは利用できません")
+        if admission.shedding_rooms:
+            raise GameError("SERVER_BUSY", "サーバーが混み合っているためクイックプレイは利用できません")
+        # ルームへの移動はマッチング成立時にMatchmakerが行う（受信ループはmanager.room_ofで追従する）
+        await matchmaker.enqueue(
+            ws=ws,
+            player_id=player_id,
+            room_id=room_id,
+            nickname=data.nickname,
+            size=data.max_players,
+        )
+
+    async def _handle_cancel_quick_play(
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
+    ) -> None:
+        matchmaker.cancel(player_id)
+
+    async def _handle_join_tournament(
+        self, ws: WebSocket, player_id: str, room_id: str, data: JoinTournamentPayload
+    ) -> None:
+        _require_owner(data.tournament_id)
+        # 卓への移動はラウンド開始時にTournamentDirectorが行う（受信ループはmanager.room_ofで追従する）
+        matchmaker.cancel(player_id)
+        await tournaments.register(
+            ws=ws,
+            player_id=player_id,
+            room_id=room_id,
+            tournament_id=data.tournament_id,
+            nickname=data.nickname,
+        )
+
+    async def _handle_leave_tournament(
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
+    ) -> None:
+        tournaments.withdraw(player_id)
+
+    async def _handle_pong(
+        self, ws: WebSocket, player_id: str, room_id: str, data: None
+    ) -> None:
+        # 受信時刻の更新は受信ループ側で全メッセージに対して行う
+        return None
 
     # ---------------------------------------------------------------------------
     # エラー送信
@@ -164,10 +274,30 @@ class EventHandler:
     async def _send_error(self, ws: WebSocket, message: str, code: str) -> None:
         try:
             await ws.send_text(
-                __import__("json").dumps(
+                json.dumps(
                     {"type": "error", "payload": {"message": message, "code": code}},
                     ensure_ascii=False,
                 )
             )
         except Exception:
             pass
+
+
+EventHandler.routes = {
+    "create_room": _route(CreateRoomPayload, EventHandler._handle_create_room),
+    "join_room": _route(JoinRoomPayload, EventHandler._handle_join_room),
+    "start_game": _route(StartGamePayload, EventHandler._handle_start_game),
+    "score_cards": _route(ScoreCardsPayload, EventHandler._handle_score_cards),
+    "draw_card": _route(DrawCardPayload, EventHandler._handle_draw_card),
+    "steal_card": _route(StealCardPayload, EventHandler._handle_steal_card),
+    "skip_steal": _route(SkipStealPayload, EventHandler._handle_skip_steal),
+    "confirm_burst": _route(ConfirmBurstPayload, EventHandler._handle_confirm_burst),
+    "end_turn": _route(EndTurnPayload, EventHandler._handle_end_turn),
+    "leave_room": _route(LeaveRoomPayload, EventHandler._handle_leave_room),
+    "watch_room": _route(WatchRoomPayload, EventHandler._handle_watch_room),
+    "quick_play": _route(QuickPlayPayload, EventHandler._handle_quick_play),
+    "cancel_quick_play": _route(CancelQuickPlayPayload, EventHandler._handle_cancel_quick_play),
+    "join_tournament": _route(JoinTournamentPayload, EventHandler._handle_join_tournament),
+    "leave_tournament": _route(LeaveTournamentPayload, EventHandler._handle_leave_tournament),
+    "pong": _route(PongPayload, EventHandler._handle_pong),
+}
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+from fastapi import WebSocket
+
+from app.logging_config import sampled
+from app.websocket.handlers import EventHandler
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "20"))
+HEARTBEAT_TIMEOUT = float(os.getenv("HEARTBEAT_TIMEOUT", "60"))
+HEARTBEAT_SEND_TIMEOUT = float(os.getenv("HEARTBEAT_SEND_TIMEOUT", "5"))
+
+_PING = '{"type":"ping","payload":{}}'
+
+
+class _Watched:
+    """監視中の接続1本ぶんの記録（接続数だけ作られるので __slots__ で小さく保つ）。"""
+
+    __slots__ = ("ws", "player_id", "last_seen")
+
+    def __init__(self, ws: WebSocket, player_id: str, last_seen: float) -> None:
+        self.ws = ws
+        self.player_id = player_id
+        self.last_seen = last_seen
+
+
+class HeartbeatScheduler:
+    """全接続の生存確認を1つのタスクでまとめて行うクラス。
+
+    受信ループは touch() で最終受信時刻を更新するだけで、タイマーは持たない。
+    interval ごとに、しばらく何も受信していない接続へpingを送り、
+    timeout を超えても応答のない接続（スリープした端末などのハーフオープン）を切断して席を解放する。
+    """
+
+    def __init__(
+        self,
+        interval: float = HEARTBEAT_INTERVAL,
+        timeout: float = HEARTBEAT_TIMEOUT,
+        send_timeout: float = HEARTBEAT_SEND_TIMEOUT,
+    ) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.send_timeout = send_timeout
+        # id(ws) -> 監視中の接続
+        self._sockets: dict[int, _Watched] = {}
+        self._handler: EventHandler | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self, handler: EventHandler) -> None:
+        self._handler = handler
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def register(self, ws: WebSocket, player_id: str) -> None:
+        self._sockets[id(ws)] = _Watched(ws, player_id, asyncio.get_running_loop().time())
+
+    def unregister(self, ws: WebSocket) -> None:
+        self._sockets.pop(id(ws), None)
+
+    def touch(self, ws: WebSocket) -> None:
+        entry = self._sockets.get(id(ws))
+        if entry is not None:
+            entry.last_seen = asyncio.get_running_loop().time()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Heartbeat sweep failed")
+
+    async def sweep(self) -> None:
+        """無応答の接続を切断し、しばらく受信のない接続へpingを送る。"""
+        now = asyncio.get_running_loop().time()
+        dead: list[tuple[WebSocket, str]] = []
+        idle: list[tuple[WebSocket, str]] = []
+        for entry in self._sockets.values():
+            silent = now - entry.last_seen
+            if silent >= self.timeout:
+                dead.append((entry.ws, entry.player_id))
+            elif silent >= self.interval:
+                idle.append((entry.ws, entry.player_id))
+
+        results = await asyncio.gather(*(self._ping(ws) for ws, _ in idle))
+        dead.extend(entry for entry, ok in zip(idle, results) if not ok)
+        for ws, player_id in dead:
+            await self._evict(ws, player_id)
+
+    async def _ping(self, ws: WebSocket) -> bool:
+        try:
+            await asyncio.wait_for(ws.send_text(_PING), self.send_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _evict(self, ws: WebSocket, player_id: str) -> None:
+        self.unregister(ws)
+        if sampled("heartbeat_evict"):
+            logger.info("Heartbeat timeout", extra={"player": player_id})
+        assert self._handler is not None
+        # 受信ループはクローズ後に WebSocketDisconnect で抜けるが、片付けは一度しか行われない
+        await self._handler.disconnect(ws, player_id, "lobby")
+        try:
+            await asyncio.wait_for(ws.close(code=1001), self.send_timeout)
+        except Exception:
+            pass
+
+
+heartbeat = HeartbeatScheduler()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import sys
+from collections.abc import Iterator
+
+from fastapi import WebSocket
+
+from app.logging_config import sampled
+from app.websocket.spectators import SPECTATOR_MAX_PER_ROOM, SpectatorGroup
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# WebSocket 接続管理
+# ---------------------------------------------------------------------------
+
+class ConnectionManager:
+    def __init__(self) -> None:
+        # room_id -> {player_id -> WebSocket}
+        # IDは sys.intern() して保持する（ペイロードから来る同じ値の文字列を接続ごとに持たない）
+        self.rooms: dict[str, dict[str, WebSocket]] = {}
+        # room_id -> 観戦者グループ（席を持たない読み取り専用の接続）
+        self.spectators: dict[str, SpectatorGroup] = {}
+        # id(ws) -> 現在のroom_id（マッチメイキングなど受信ループの外でルームが変わる場合に参照する）
+        self.locations: dict[int, str] = {}
+
+    async def connect(self, room_id: str, player_id: str, ws: WebSocket) -> None:
+        await ws.accept()
+        room_id = sys.intern(room_id)
+        player_id = sys.intern(player_id)
+        if room_id not in self.rooms:
+            self.rooms[room_id] = {}
+        self.rooms[room_id][player_id] = ws
+        self.locations[id(ws)] = room_id
+        if sampled("connect"):
+            logger.info("Connected", extra={"player": player_id, "room": room_id})
+
+    def disconnect(
+        self, room_id: str, player_id: str, ws: WebSocket | None = None
+    ) -> bool:
+        """接続をルームから外す。
+
+        wsを指定した場合、同じplayer_idの別の接続（再接続後の新しいソケット）に
+        置き換わっていれば何もせずFalseを返す。
+        """
+        players = self.rooms.get(room_id)
+        current = players.get(player_id) if players else None
+        if current is None or (ws is not None and current is not ws):
+            if ws is not None and self.locations.get(id(ws)) == room_id:
+                del self.locations[id(ws)]
+            return False
+        del players[player_id]  # type: ignore[union-attr]
+        if not players:
+            del self.rooms[room_id]
+        if self.locations.get(id(current)) == room_id:
+            del self.locations[id(current)]
+        if sampled("disconnect"):
+            logger.info("Disconnected", extra={"player": player_id, "room": room_id})
+        return True
+
+    def room_of(self, ws: WebSocket, default: str) -> str:
+        return self.locations.get(id(ws), default)
+
+    async def move_player(
+        self,
+        from_room: str,
+        to_room: str,
+        player_id: str,
+        ws: WebSocket,
+    ) -> None:
+        """プレイヤーをfrom_roomからto_roomに移動する（lobby→実ルームID）。"""
+        self.disconnect(from_room, player_id, ws)
+        to_room = sys.intern(to_room)
+        player_id = sys.intern(player_id)
+        if to_room not in self.rooms:
+            self.rooms[to_room] = {}
+        self.rooms[to_room][player_id] = ws
+        self.locations[id(ws)] = to_room
+        if sampled("move"):
+            logger.info(
+                "Moved",
+                extra={"player": player_id, "from_room": from_room, "room": to_room},
+            )
+
+    def connections(self) -> Iterator[tuple[str, str, WebSocket]]:
+        """全接続を (room_id, player_id, ws) で列挙する（観戦者を含む）。"""
+        for room_id, players in list(self.rooms.items()):
+            for player_id, ws in list(players.items()):
+                yield room_id, player_id, ws
+        for room_id, group in list(self.spectators.items()):
+            for player_id, ws in list(group.watchers.items()):
+                yield room_id, player_id, ws
+
+    # ---------------------------------------------------------------------------
+    # 観戦
+    # ---------------------------------------------------------------------------
+
+    def watch(self, from_room: str, room_id: str, player_id: str, ws: WebSocket) -> bool:
+        """接続を観戦者としてroom_idに登録する。満員の場合はFalseを返す。"""
+        room_id = sys.intern(room_id)
+        group = self.spectators.get(room_id)
+        if group is None:
+            group = self.spectators[room_id] = SpectatorGroup(
+                room_id, on_drop=functools.partial(self.unwatch, room_id)
+            )
+        elif len(group) >= SPECTATOR_MAX_PER_ROOM:
+            return False
+        if self.is_spectator(from_room, player_id):
+            self.unwatch(from_room, player_id)
+        else:
+            self.disconnect(from_room, player_id, ws)
+        group.add(player_id, ws)
+        self.locations[id(ws)] = room_id
+        return True
+
+    def unwatch(self, room_id: str, player_id: str) -> None:
+        group = self.spectators.get(room_id)
+        if group is None:
+            return
+        ws = group.watchers.get(player_id)
+        if ws is not None and self.locations.get(id(ws)) == room_id:
+            del self.locations[id(ws)]
+        group.remove(player_id)
+        if not group:
+            del self.spectators[room_id]
+
+    def is_spectator(self, room_id: str, player_id: str) -> bool:
+        group = self.spectators.get(room_id)
+        return group is not None and player_id in group.watchers
+
+    async def broadcast(self, room_id: str, message: dict) -> None:
+        players = self.rooms.get(room_id)
+        group = self.spectators.get(room_id)
+        if players is None and group is None:
+            return
+        data = json.dumps(message, ensure_ascii=False)
+        if group is not None:
+            group.publish(message["type"], data)
+        for ws in list(players.values()) if players else ():
+            try:
+                await ws.send_text(data)
+            except Exception:
+                pass
+
+    async def send_personal(self, ws: WebSocket, message: dict) -> None:
+        await ws.send_text(json.dumps(message, ensure_ascii=False))
+
+
+manager = ConnectionManager()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from collections.abc import Callable
+
+from fastapi import WebSocket
+
+SPECTATOR_DELAY = float(os.getenv("SPECTATOR_DELAY_SECONDS", "0"))
+SPECTATOR_STATE_INTERVAL = float(os.getenv("SPECTATOR_STATE_INTERVAL", "1.0"))
+SPECTATOR_SEND_TIMEOUT = float(os.getenv("SPECTATOR_SEND_TIMEOUT", "2.0"))
+SPECTATOR_MAX_PER_ROOM = int(os.getenv("SPECTATOR_MAX_PER_ROOM", "500"))
+# 観戦者が追いつけない場合に保持する game_state 以外の最大フレーム数（超えたら古いものから捨てる）
+SPECTATOR_MAX_BACKLOG = 256
+# 1008 = Policy Violation（送信が詰まって外した観戦者の接続を閉じる）
+CLOSE_POLICY_VIOLATION = 1008
+
+
+class SpectatorGroup:
+    """1ルーム分の観戦者へのファンアウトを担当するクラス。
+
+    プレイヤー向けbroadcastでエンコード済みのフレームを publish() で受け取り、
+    ルームごとに1つのタスクが遅延・game_stateの間引きを適用して全観戦者へ送る。
+    publish() はキューに積むだけなので、観戦者の数や遅さがプレイヤーの処理を待たせることはない。
+
+    game_state はキューに入れず、未送信の最新1件だけを持つ（新しいものが来たら古いものは捨てる）。
+    それより前に publish されたイベントを送り終えてから送り、間引きで待っている間も
+    後ろのイベントは先に送る（game_state の待ちでイベントが溜まり続けることはない）。
+    """
+
+    def __init__(
+        self,
+        room_id: str,
+        delay: float = SPECTATOR_DELAY,
+        state_interval: float = SPECTATOR_STATE_INTERVAL,
+        send_timeout: float = SPECTATOR_SEND_TIMEOUT,
+        on_drop: Callable[[str], None] | None = None,
+    ) -> None:
+        self.room_id = room_id
+        # 詰まった観戦者を外すときに呼ぶ（ConnectionManager.unwatch。空になったグループごと片付ける）
+        self.on_drop = on_drop or self.remove
+        self.delay = delay
+        self.state_interval = state_interval
+        self.send_timeout = send_timeout
+        self.watchers: dict[str, WebSocket] = {}
+        # game_state 以外のフレーム: (配信可能時刻, 通し番号, エンコード済みフレーム)
+        self._backlog: deque[tuple[float, int, str]] = deque(maxlen=SPECTATOR_MAX_BACKLOG)
+        # 未送信の最新の game_state: (配信可能時刻, それより前のイベントの通し番号, エンコード済みフレーム)
+        self._state: tuple[float, int, str] | None = None
+        self._published = 0   # publish したイベントの数（通し番号）
+        self._wakeup = asyncio.Event()
+        self._last_state_sent = float("-inf")
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.watchers)
+
+    def add(self, player_id: str, ws: WebSocket) -> None:
+        self.watchers[player_id] = ws
+        if self._task is None:
+            self._task = asyncio.create_task(self._pump())
+
+    def remove(self, player_id: str) -> None:
+        self.watchers.pop(player_id, None)
+        if not self.watchers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, event_type: str, data: str) -> None:
+        deliver_at = asyncio.get_running_loop().time() + self.delay
+        if event_type == "game_state":
+            # 未送信の game_state は最新のスナップショットで置き換える
+            self._state = (deliver_at, self._published, data)
+        else:
+            self._published += 1
+            self._backlog.append((deliver_at, self._published, data))
+        self._wakeup.set()
+
+    async def _pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            event_at = self._backlog[0][0] if self._backlog else None
+            state_at = None
+            if self._state is not None:
+                deliver_at, after, _ = self._state
+                # 満杯で捨てられたイベントは送り終えたものとみなす
+                sent = self._backlog[0][1] - 1 if self._backlog else self._published
+                if sent >= after:
+                    state_at = max(deliver_at, self._last_state_sent + self.state_interval)
+            if event_at is None and state_at is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            send_state = state_at is not None and (event_at is None or state_at <= event_at)
+            due = state_at if send_state else event_at
+            now = loop.time()
+            if due > now:  # type: ignore[operator]
+                # 待っている間に publish されたフレームのほうが先に送れる場合があるので起こしてもらう
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due - now)  # type: ignore[operator]
+                except TimeoutError:
+                    pass
+                continue
+            if send_state:
+                data = self._state[2]  # type: ignore[index]
+                self._state = None
+                self._last_state_sent = now
+            else:
+                data = self._backlog.popleft()[2]
+            await self._send_all(data)
+
+    async def _send_all(self, data: str) -> None:
+        watchers = list(self.watchers.items())
+        results = await asyncio.gather(
+            *(self._send(ws, data) for _, ws in watchers)
+        )
+        dropped = [(player_id, ws) for (player_id, ws), ok in zip(watchers, results) if not ok]
+        if not dropped:
+            return
+        # 送信が詰まった・切断済みの観戦者は接続を閉じてから外す
+        # （最後の観戦者を外すとこのタスク自身がキャンセルされるので、閉じるのを先に済ませる）
+        await asyncio.gather(*(self._close(ws) for _, ws in dropped))
+        for player_id, ws in dropped:
+            # 受信ループ側の切断処理・再接続で入れ替わっていれば何もしない
+            if self.watchers.get(player_id) is ws:
+                self.on_drop(player_id)
+
+    async def _close(self, ws: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(ws.close(code=CLOSE_POLICY_VIOLATION), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _send(self, ws: WebSocket, data: str) -> bool:
+        try:
+            await asyncio.wait_for(ws.send_text(data), self.send_timeout)
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+GAME_STATE_INTERVAL = float(os.getenv("GAME_STATE_INTERVAL", "0.033"))
+# 最終送信時刻を保持するルーム数の上限（超えたら interval より古いものを捨てる）
+_MAX_TRACKED_ROOMS = 4096
+
+
+class StatePublisher:
+    """ルームごとのgame_state送信を interval 秒に1回までに間引くクラス。
+
+    mark_dirty() は直前の送信から interval 以上経っていればその場で送信し、
+    そうでなければ interval 経過時点に1回だけ送信を予約する。予約中に何度呼ばれても送信は1回で、
+    スナップショットは送信直前に組み立てるので常に最新の状態が届く。
+    burst / turn_changed などの個別イベントは間引かずに即時送る（game_stateが遅れて
+    届くだけで、イベント同士の順序は入れ替わらない）。
+    """
+
+    def __init__(self, interval: float = GAME_STATE_INTERVAL) -> None:
+        self.interval = interval
+        self._last_emit: dict[str, float] = {}
+        self._pending: dict[str, asyncio.Task[None]] = {}
+        # cancel() 済み（ゲームが終わった）ルーム。挿入順に _MAX_TRACKED_ROOMS 件まで残す
+        self._ended: dict[str, None] = {}
+
+    async def mark_dirty(
+        self, room_id: str, emit: Callable[[str], Awaitable[None]]
+    ) -> None:
+        if self.interval <= 0:
+            await emit(room_id)
+            return
+        if room_id in self._pending:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        due = self._last_emit.get(room_id, float("-inf")) + self.interval
+        if due <= now:
+            self._remember(room_id, now)
+            await emit(room_id)
+            return
+        self._pending[room_id] = asyncio.create_task(
+            self._emit_later(room_id, emit, due - now)
+        )
+
+    def cancel(self, room_id: str) -> None:
+        """予約中の送信を取り消す（ゲーム終了・ルーム削除時）。
+
+        すでに組み立て中の送信は取り消せないため、ended() が True になったルームには
+        送信側（GameService._emit_game_state）が送らない。
+        """
+        task = self._pending.pop(room_id, None)
+        if task is not None:
+            task.cancel()
+        self._last_emit.pop(room_id, None)
+        self._ended[room_id] = None
+        if len(self._ended) > _MAX_TRACKED_ROOMS:
+            del self._ended[next(iter(self._ended))]
+
+    def reopen(self, room_id: str) -> None:
+        """同じルームで新しいゲームを始める（ゲーム開始時）。"""
+        self._ended.pop(room_id, None)
+
+    def ended(self, room_id: str) -> bool:
+        return room_id in self._ended
+
+    async def _emit_later(
+        self, room_id: str, emit: Callable[[str], Awaitable[None]], delay: float
+    ) -> None:
+        await asyncio.sleep(delay)
+        # 送信中に変更されたルームは新たに予約できるよう、組み立て前に予約を外す
+        self._pending.pop(room_id, None)
+        self._remember(room_id, asyncio.get_running_loop().time())
+        try:
+            await emit(room_id)
+        except Exception:
+            logger.exception("game_state emit failed", extra={"room": room_id})
+
+    def _remember(self, room_id: str, now: float) -> None:
+        if len(self._last_emit) >= _MAX_TRACKED_ROOMS:
+            cutoff = now - self.interval
+            self._last_emit = {
+                r: t for r, t in self._last_emit.items() if t > cutoff
+            }
+        self._last_emit[room_id] = now
+
+
+state_publisher = StatePublisher()
@@ -0,0 +1,19 @@
+"""Redis・ゲームサービスのホットパスのマイクロベンチマーク。
+
+使い方（backend/ で実行）:
+    python -m benchmarks                                   # プロセス内のfakeredisで計測
+    python -m benchmarks --redis-url redis://localhost:6379/15 --flush
+    python -m benchmarks --only draw_card --only steal_card
+    python -m benchmarks --check                           # ベースラインより悪化したら終了コード1
+    python -m benchmarks --update-baseline                 # baseline.json を書き換える
+    python -m benchmarks --rtt-ms 2 --jitter-ms 0.5        # Redisとの往復遅延を模擬して計測
+
+起動時間（import の内訳、起動から最初のフレームまで）は python -m benchmarks.startup、
+1接続あたりのメモリ（ロビー待機中・ゲーム中）は python -m benchmarks.memory で計測する。
+競合するイベントを同時に投げてゲームの不変条件を検査するストレステストは python -m benchmarks.stress。
+WebSocket圧縮（permessage-deflate）の設定ごとの送信バイト数とCPU時間は python -m benchmarks.compression で比較する。
+Redisとの間の遅延・帯域・切断の模擬（--rtt-ms など、サーバーごと試すTCPプロキシ）は benchmarks.netem にある。
+
+Redisコマンド数は環境に依存しないため厳密に比較し、所要時間は --tolerance の割合まで許容する。
+所要時間の比較は同じマシン・同じRedis（fakeredis同士など）で取ったベースラインに対してのみ意味がある。
+"""
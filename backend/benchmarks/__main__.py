@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import os
+
+# app の import 前に設定する（計測中にリプレイログ・アーカイブ・分析イベントを書かない）
+os.environ.setdefault("REPLAY_DIR", "")
+os.environ.setdefault("ARCHIVE_PATH", "")
+os.environ.setdefault("ANALYTICS_DIR", "")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import sys  # noqa: E402
+from dataclasses import asdict  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from benchmarks.cases import CASES, run_case  # noqa: E402
+from benchmarks.harness import Result, make_redis  # noqa: E402
+from benchmarks.netem import add_link_arguments, link_from_args  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def _load_baseline(path: Path) -> dict[str, dict]:
+    try:
+        return json.loads(path.read_text())["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def _save_baseline(path: Path, results: list[Result], backend: str) -> None:
+    # --only で一部だけ計測した場合も他のケースのベースラインは残す
+    merged = _load_baseline(path)
+    merged.update({r.name: asdict(r) for r in results})
+    data = {"backend": backend, "results": merged}
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+
+
+def _compare(
+    results: list[Result], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """結果を表形式で出力し、ベースラインからの悪化を返す。"""
+    regressions: list[str] = []
+    print(
+        f"{'benchmark':<32} {'us/call':>10} {'base':>10} {'ratio':>7} "
+        f"{'cmds':>7} {'base':>7} {'rtts':>6}"
+    )
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None:
+            print(
+                f"{r.name:<32} {r.us_per_call:>10.1f} {'-':>10} {'-':>7} "
+                f"{r.commands:>7.1f} {'-':>7} {r.round_trips:>6.1f}"
+            )
+            continue
+        ratio = r.us_per_call / base["us_per_call"] if base["us_per_call"] else 1.0
+        flag = ""
+        # 平均値なので、表示している小数1桁で比較する
+        if round(r.commands, 1) != round(base["commands"], 1):
+            regressions.append(
+                f"{r.name}: redis commands {base['commands']:.1f} -> {r.commands:.1f}"
+            )
+            flag = " !cmds"
+        if ratio > 1 + tolerance:
+            regressions.append(f"{r.name}: {ratio:.2f}x slower than baseline")
+            flag += " !time"
+        print(
+            f"{r.name:<32} {r.us_per_call:>10.1f} {base['us_per_call']:>10.1f} "
+            f"{ratio:>6.2f}x {r.commands:>7.1f} {base['commands']:>7.1f} "
+            f"{r.round_trips:>6.1f}{flag}"
+        )
+    return regressions
+
+
+async def _run(args: argparse.Namespace) -> list[Result]:
+    client = make_redis(args.redis_url, link=link_from_args(args))
+    try:
+        if args.redis_url and not args.flush and await client.dbsize():
+            raise SystemExit(
+                "error: target database is not empty (use --flush to clear it)"
+            )
+        results: list[Result] = []
+        for name in args.only or CASES:
+            results.extend(await run_case(CASES[name], client))
+        await client.flushdb()
+        return results
+    finally:
+        await client.aclose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ マイクロベンチマーク")
+    parser.add_argument(
+        "--redis-url", default=None, help="計測に使うRedis（未指定ならfakeredis）"
+    )
+    parser.add_argument(
+        "--flush", action="store_true", help="空でないDBでも実行する（計測前後にFLUSHDB）"
+    )
+    parser.add_argument(
+        "--only", action="append", choices=sorted(CASES), help="実行するケース（複数指定可）"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="結果をベースラインとして保存する"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="許容する所要時間の悪化率"
+    )
+    parser.add_argument("--check", action="store_true", help="悪化があれば終了コード1を返す")
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+
+    link = link_from_args(args)
+    if link is not None and args.update_baseline:
+        parser.error("--update-baseline cannot be combined with a simulated link")
+    tolerance = args.tolerance
+    if link is not None:
+        # 模擬した往復遅延の分だけ遅くなるので、ベースラインとはコマンド数だけを比べる
+        print(f"link: {link.describe()}")
+        tolerance = float("inf")
+
+    results = asyncio.run(_run(args))
+    regressions = _compare(results, _load_baseline(args.baseline), tolerance)
+
+    if args.update_baseline:
+        backend = "redis" if args.redis_url else "fakeredis"
+        _save_baseline(args.baseline, results, backend)
+        print(f"baseline written: {args.baseline}")
+        return 0
+    if regressions:
+        print("\nregressions:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
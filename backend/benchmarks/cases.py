@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+
+import redis.asyncio as aioredis
+
+from app.models.game import GamePhase
+from app.redis.client import RedisClient
+from app.services.game_service import GameService
+from app.websocket.manager import ConnectionManager
+from app.websocket.state_publisher import state_publisher
+from benchmarks.harness import Result, measure, seat_players
+
+ROOM = "bench0001"
+PLAYERS = [(f"p{i}", f"P{i}") for i in range(4)]
+NICKNAMES = [nick for _, nick in PLAYERS]
+# 各プレイヤーの場（get_all_fields / _end_game / game_state の規模を揃える）
+FIELD = [1, 2, 3, 4, 5]
+DECK_SEED = 1
+
+
+async def _playing_room(redis: RedisClient, service: GameService) -> None:
+    await redis.create_rooms_bulk([(ROOM, len(PLAYERS), PLAYERS)])
+    await seat_players(service.manager, ROOM, [pid for pid, _ in PLAYERS])
+    await service.begin_game(ROOM, NICKNAMES)
+    await redis.initialize_deck(ROOM, seed=DECK_SEED)
+
+
+async def _fill_fields(redis: RedisClient) -> None:
+    for nickname in NICKNAMES:
+        await redis.clear_field(ROOM, nickname)
+        for card in FIELD:
+            await redis.add_to_field(ROOM, nickname, card)
+
+
+async def bench_get_all_fields(redis: RedisClient, service: GameService) -> list[Result]:
+    await _playing_room(redis, service)
+    await _fill_fields(redis)
+    return [await measure("redis.get_all_fields", lambda: redis.get_all_fields(ROOM))]
+
+
+async def bench_list_waiting_rooms(
+    redis: RedisClient, service: GameService
+) -> list[Result]:
+    results = []
+    created = 0
+    for size in (10, 1000, 10000):
+        await _create_waiting_rooms_range(redis, created, size)
+        created = size
+        results.append(
+            await measure(
+                f"redis.list_waiting_rooms[{size}]",
+                redis.list_waiting_rooms,
+                min_iterations=3 if size >= 10000 else 5,
+            )
+        )
+    return results
+
+
+async def _create_waiting_rooms_range(redis: RedisClient, start: int, stop: int) -> None:
+    chunk = 1000
+    for lo in range(start, stop, chunk):
+        await redis.create_rooms_bulk([
+            (f"w{i:07d}", 4, [(f"w{i}a", "A"), (f"w{i}b", "B")])
+            for i in range(lo, min(lo + chunk, stop))
+        ])
+
+
+async def bench_draw_card(redis: RedisClient, service: GameService) -> list[Result]:
+    await _playing_room(redis, service)
+
+    async def prepare() -> None:
+        # 全員の場を空にしておくとバースト・横取りが起きず、毎回同じ経路を通る
+        for nickname in NICKNAMES:
+            await redis.clear_field(ROOM, nickname)
+        if await redis.get_deck_count(ROOM) < 2:
+            await redis.initialize_deck(ROOM, seed=DECK_SEED)
+        await redis.set_turn(ROOM, NICKNAMES[0], GamePhase.DRAW)
+
+    return [
+        await measure(
+            "game.draw_card",
+            lambda: service.draw_card(PLAYERS[0][0], ROOM),
+            prepare=prepare,
+        )
+    ]
+
+
+async def bench_steal_card(redis: RedisClient, service: GameService) -> list[Result]:
+    await _playing_room(redis, service)
+    card = 7
+
+    async def prepare() -> None:
+        for nickname in NICKNAMES:
+            await redis.clear_field(ROOM, nickname)
+        await redis.add_to_field(ROOM, NICKNAMES[0], card)
+        await redis.add_to_field(ROOM, NICKNAMES[1], card)
+        await redis.add_to_field(ROOM, NICKNAMES[1], card)
+        await redis.add_to_field(ROOM, NICKNAMES[2], card)
+        await redis.set_turn(ROOM, NICKNAMES[0], GamePhase.STEAL, drawn_card=card)
+
+    return [
+        await measure(
+            "game.steal_card",
+            lambda: service.steal_card(PLAYERS[0][0], ROOM),
+            prepare=prepare,
+        )
+    ]
+
+
+async def bench_end_game(redis: RedisClient, service: GameService) -> list[Result]:
+    await _playing_room(redis, service)
+    return [
+        await measure(
+            "game._end_game",
+            lambda: service._end_game(ROOM),
+            prepare=lambda: _fill_fields(redis),
+        )
+    ]
+
+
+async def bench_broadcast_game_state(
+    redis: RedisClient, service: GameService
+) -> list[Result]:
+    await _playing_room(redis, service)
+    await _fill_fields(redis)
+    return [
+        await measure(
+            "game._broadcast_game_state",
+            lambda: service._broadcast_game_state(ROOM),
+        )
+    ]
+
+
+async def bench_begin_games(redis: RedisClient, service: GameService) -> list[Result]:
+    # トーナメントの1ラウンド規模（200卓 × 4人）を一括で開始する
+    tables = [f"t{i:04d}" for i in range(200)]
+    await redis.create_rooms_bulk([
+        (room_id, len(PLAYERS), [(f"{room_id}{pid}", nick) for pid, nick in PLAYERS])
+        for room_id in tables
+    ])
+    for room_id in tables:
+        await seat_players(service.manager, room_id, [f"{room_id}{pid}" for pid, _ in PLAYERS])
+    return [
+        await measure(
+            f"game.begin_games[{len(tables)}]",
+            lambda: service.begin_games([(room_id, NICKNAMES) for room_id in tables]),
+        )
+    ]
+
+
+BenchCase = Callable[[RedisClient, GameService], Awaitable[list[Result]]]
+
+CASES: dict[str, BenchCase] = {
+    "get_all_fields": bench_get_all_fields,
+    "list_waiting_rooms": bench_list_waiting_rooms,
+    "draw_card": bench_draw_card,
+    "steal_card": bench_steal_card,
+    "end_game": bench_end_game,
+    "broadcast_game_state": bench_broadcast_game_state,
+    "begin_games": bench_begin_games,
+}
+
+
+async def run_case(case: BenchCase, client: aioredis.Redis) -> list[Result]:
+    """空のDBと新しいサービスで1ケースを実行する。"""
+    await client.flushdb()
+    # 間引きを無効にし、game_state の組み立てと送信を毎回計測する
+    state_publisher.interval = 0
+    redis = RedisClient(client)
+    service = GameService(redis, ConnectionManager())
+    return await case(redis, service)
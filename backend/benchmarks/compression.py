@@ -0,0 +1,256 @@
+"""permessage-deflate の設定ごとの送信バイト数とCPU時間の比較。
+
+使い方（backend/ で実行）:
+    python -m benchmarks.compression                           # 既定の組み合わせで比較
+    python -m benchmarks.compression --games 50 --players 6
+    python -m benchmarks.compression --window-bits 9 12 15 --min-size 0 128 256 --level 1 6
+    python -m benchmarks.compression --json
+
+プロセス内のfakeredisで実際のゲームを進め、1人のプレイヤーが受け取るフレーム列
+（game_state・turn_changed・card_drawn・エラーなど）を記録する。そのフレーム列を
+各設定の permessage-deflate（app.websocket.compression と同じ拡張）で1接続ぶん順に圧縮し、
+フレームあたりの送信バイト数（フレームヘッダーを含む）と圧縮にかかったCPU時間を表示する。
+
+- off:      圧縮なし（WS_COMPRESSION=0）
+- uvicorn:  これまでの uvicorn の既定（ウィンドウ 2^15・memLevel 8・全フレーム圧縮）
+- current:  現在の WS_COMPRESSION_* の設定
+- 以降:     --context-takeover × --window-bits × --min-size × --level の全組み合わせ
+
+enc KB は接続ごとに持ち続ける圧縮側 zlib の状態の目安（コンテキストを引き継がない場合は送信時だけ確保）。
+"""
+
+from __future__ import annotations
+
+import os
+
+# app の import 前に設定する（記録中にリプレイログ・アーカイブ・分析イベントを書かない）。
+# game_state は間引かずに状態が変わるたびに送る（人が操作する間隔では間引きはほぼ効かない）
+os.environ.setdefault("REPLAY_DIR", "")
+os.environ.setdefault("ARCHIVE_PATH", "")
+os.environ.setdefault("ANALYTICS_DIR", "")
+os.environ.setdefault("GAME_STATE_INTERVAL", "0")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import itertools  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from dataclasses import asdict, dataclass  # noqa: E402
+
+from websockets import frames  # noqa: E402
+
+from app.models.game import RoomStatus  # noqa: E402
+from app.redis.client import RedisClient  # noqa: E402
+from app.services.game_service import GameService  # noqa: E402
+from app.websocket.compression import DeflateSettings  # noqa: E402
+from app.websocket.handlers import EventHandler  # noqa: E402
+from app.websocket.manager import ConnectionManager  # noqa: E402
+from benchmarks.harness import FakeSocket, make_redis  # noqa: E402
+from benchmarks.stress import _EXPECTED  # noqa: E402
+
+NICKNAMES = ("たろう", "はなこ", "Kenta_92", "みさき", "DarumaMaster", "ゆうと")
+# 1ゲームの操作数の上限（進まなくなったゲームで止まらないように）
+MAX_ACTIONS = 2000
+
+
+class CaptureSocket(FakeSocket):
+    """受け取ったテキストフレームをそのまま残すソケット。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[str] = []
+
+    async def send_text(self, data: str) -> None:
+        await super().send_text(data)
+        self.sent.append(data)
+
+
+async def record_frames(games: int, players: int, seed: int) -> list[str]:
+    """games ゲームを最後まで進め、各ゲームの最初のプレイヤーが受け取ったフレームを返す。"""
+    redis = RedisClient(make_redis(None), {})
+    manager = ConnectionManager()
+    service = GameService(redis, manager)
+    handler = EventHandler(service)
+    rng = random.Random(seed)
+    captured: list[str] = []
+    for game in range(games):
+        room_id = f"deflate{game:05d}"
+        player_ids = [f"{room_id}-p{i}" for i in range(players)]
+        nicknames = list(NICKNAMES[:players])
+        await redis.create_rooms_bulk([(room_id, players, list(zip(player_ids, nicknames)))])
+        capture = CaptureSocket()
+        sockets = [capture] + [FakeSocket() for _ in range(players - 1)]
+        for player_id, ws in zip(player_ids, sockets):
+            await manager.move_player("lobby", room_id, player_id, ws)  # type: ignore[arg-type]
+        await service.begin_game(room_id, nicknames)
+        for _ in range(MAX_ACTIONS):
+            room = await redis.get_room(room_id)
+            turn = await redis.get_turn(room_id)
+            if room is None or room.status != RoomStatus.PLAYING or turn is None:
+                break
+            holder = nicknames.index(turn.current_nickname)
+            await handler.handle(
+                sockets[holder],  # type: ignore[arg-type]
+                player_ids[holder],
+                room_id,
+                {"type": rng.choice(_EXPECTED[turn.phase]), "payload": {}},
+            )
+        captured += capture.sent
+    return captured
+
+
+def _header_size(length: int) -> int:
+    # サーバーからの送信はマスクなし
+    return 2 if length < 126 else 4 if length < 65536 else 10
+
+
+def _encoder_kb(settings: DeflateSettings) -> float:
+    # zlib の deflate が確保する量の目安: (1 << (windowBits + 2)) + (1 << (memLevel + 9))
+    return ((1 << (settings.window_bits + 2)) + (1 << (settings.mem_level + 9))) / 1024
+
+
+@dataclass
+class Row:
+    name: str
+    context_takeover: bool
+    window_bits: int
+    min_size: int
+    level: int
+    mem_level: int
+    bytes_per_frame: float
+    ratio: float                 # 圧縮なしに対する送信バイト数の割合
+    game_state_bytes: float      # game_state フレームの平均
+    compressed_frames: float     # 圧縮して送ったフレームの割合
+    us_per_frame: float          # 中央値（--repeat 回のうち）
+    encoder_kb: float
+
+
+def _measure(
+    name: str, settings: DeflateSettings, payloads: list[bytes], is_state: list[bool],
+    plain_total: int, repeat: int,
+) -> Row:
+    timings = []
+    for _ in range(repeat):
+        # 1接続ぶんの拡張で最初から順に送る（コンテキストの引き継ぎは接続内の送信順に依存する）
+        ext = settings.extension()
+        sizes = []
+        compressed = 0
+        started = time.process_time()
+        for data in payloads:
+            frame = ext.encode(frames.Frame(frames.Opcode.TEXT, data))
+            sizes.append(len(frame.data))
+            compressed += frame.rsv1
+        timings.append(time.process_time() - started)
+    wire = [size + _header_size(size) for size in sizes]
+    state_wire = [w for w, state in zip(wire, is_state) if state]
+    return Row(
+        name=name,
+        context_takeover=settings.context_takeover,
+        window_bits=settings.window_bits,
+        min_size=settings.min_size,
+        level=settings.level,
+        mem_level=settings.mem_level,
+        bytes_per_frame=sum(wire) / len(wire),
+        ratio=sum(wire) / plain_total,
+        game_state_bytes=statistics.fmean(state_wire) if state_wire else 0.0,
+        compressed_frames=compressed / len(payloads),
+        us_per_frame=statistics.median(timings) / len(payloads) * 1e6,
+        encoder_kb=_encoder_kb(settings) if settings.context_takeover else 0.0,
+    )
+
+
+def _plain_row(payloads: list[bytes], is_state: list[bool]) -> Row:
+    wire = [len(data) + _header_size(len(data)) for data in payloads]
+    state_wire = [w for w, state in zip(wire, is_state) if state]
+    return Row(
+        name="off", context_takeover=False, window_bits=0, min_size=0, level=0, mem_level=0,
+        bytes_per_frame=sum(wire) / len(wire), ratio=1.0,
+        game_state_bytes=statistics.fmean(state_wire) if state_wire else 0.0,
+        compressed_frames=0.0, us_per_frame=0.0, encoder_kb=0.0,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ WebSocket圧縮設定の比較")
+    parser.add_argument("--games", type=int, default=20, help="フレームを記録するゲーム数")
+    parser.add_argument("--players", type=int, default=4, choices=range(2, len(NICKNAMES) + 1))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--context-takeover",
+        choices=("on", "off", "both"),
+        default="both",
+        help="コンテキストを引き継ぐか（both は両方を比較）",
+    )
+    parser.add_argument("--window-bits", type=int, nargs="+", default=[9, 12, 15])
+    parser.add_argument("--min-size", type=int, nargs="+", default=[0, 128])
+    parser.add_argument("--level", type=int, nargs="+", default=[1, 6])
+    parser.add_argument("--mem-level", type=int, default=DeflateSettings().mem_level)
+    parser.add_argument("--repeat", type=int, default=5, help="各設定で圧縮を繰り返す回数")
+    parser.add_argument("--json", action="store_true", help="JSONで出力する")
+    args = parser.parse_args(argv)
+
+    messages = asyncio.run(record_frames(args.games, args.players, args.seed))
+    if not messages:
+        print("error: no frames recorded", file=sys.stderr)
+        return 1
+    payloads = [m.encode() for m in messages]
+    is_state = [m.startswith('{"type": "game_state"') for m in messages]
+    plain_total = sum(len(data) + _header_size(len(data)) for data in payloads)
+
+    takeovers = {"on": [True], "off": [False], "both": [True, False]}[args.context_takeover]
+    candidates = [
+        ("uvicorn", DeflateSettings(
+            context_takeover=True, window_bits=15, min_size=0, level=-1, mem_level=8
+        )),
+        ("current", DeflateSettings()),
+    ] + [
+        ("", DeflateSettings(
+            context_takeover=takeover, window_bits=bits, min_size=min_size,
+            level=level, mem_level=args.mem_level,
+        ))
+        for takeover, bits, min_size, level in itertools.product(
+            takeovers, args.window_bits, args.min_size, args.level
+        )
+    ]
+    rows = [_plain_row(payloads, is_state)] + [
+        _measure(name, settings, payloads, is_state, plain_total, args.repeat)
+        for name, settings in candidates
+    ]
+
+    if args.json:
+        print(json.dumps({
+            "frames": len(payloads),
+            "game_state_frames": sum(is_state),
+            "rows": [asdict(row) for row in rows],
+        }))
+        return 0
+
+    print(
+        f"frames={len(payloads)} (game_state {sum(is_state)}) from {args.games} games, "
+        f"{args.players} players; uncompressed {plain_total / len(payloads):.1f} B/frame"
+    )
+    print(
+        f"\n{'':<8} {'ctx':>3} {'wbits':>5} {'min':>5} {'lvl':>3} "
+        f"{'B/frame':>8} {'ratio':>6} {'state B':>8} {'compr%':>7} {'us/frame':>9} {'enc KB':>7}"
+    )
+    for row in rows:
+        if row.name == "off":
+            settings_cols = f"{'-':>3} {'-':>5} {'-':>5} {'-':>3}"
+        else:
+            settings_cols = (
+                f"{'on' if row.context_takeover else 'off':>3} {row.window_bits:>5} "
+                f"{row.min_size:>5} {row.level:>3}"
+            )
+        print(
+            f"{row.name:<8} {settings_cols} {row.bytes_per_frame:>8.1f} {row.ratio:>6.1%} "
+            f"{row.game_state_bytes:>8.1f} {row.compressed_frames:>7.1%} "
+            f"{row.us_per_frame:>9.2f} {row.encoder_kb:>7.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
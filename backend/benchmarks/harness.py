@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import redis.asyncio as aioredis
+
+from app.redis.instrumented import CountingRedis, count_redis_calls
+from app.websocket.manager import ConnectionManager
+from benchmarks.netem import Link, LinkProfile, linked
+
+
+class FakeSocket:
+    """送信内容を捨てるだけのWebSocket代わり（エンコードと送信呼び出しのコストは残る）。"""
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.bytes = 0
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, data: str) -> None:
+        self.frames += 1
+        self.bytes += len(data)
+
+    async def close(self, code: int = 1000) -> None:
+        return None
+
+
+def make_redis(
+    url: str | None, interleave: bool = False, link: LinkProfile | None = None
+) -> aioredis.Redis:
+    """url未指定ならプロセス内のfakeredis、指定すれば実際のRedisに接続する。
+
+    fakeredis はコマンドの途中でイベントループに制御を返さないため、同時に投げた処理も
+    1つずつ最後まで実行される。interleave=True ではコマンドごとに一度制御を返し、
+    実際のRedisの往復と同じように他のタスクの処理が割り込むようにする（パイプラインの途中には割り込まない）。
+    link を指定すると、その遅延・帯域・切断の通信路越しに実行する（benchmarks.netem、集計は client.netem）。
+    """
+    if url:
+        cls: type[CountingRedis] = CountingRedis
+        if link is not None:
+            cls = linked(cls, Link(link))
+        return cls.from_url(url, decode_responses=True)
+    from fakeredis import FakeAsyncRedis  # noqa: PLC0415
+
+    # fakeredis と redis-py のスタブで from_url / command_info のシグネチャが食い違うだけなので無視する
+    class FakeCountingRedis(CountingRedis, FakeAsyncRedis):  # type: ignore[misc]
+        pass
+
+    if link is not None:
+        # 往復ごとに待つので interleave を指定しなくても他のタスクが割り込む
+        return linked(FakeCountingRedis, Link(link))(decode_responses=True)
+
+    class InterleavingRedis(FakeCountingRedis):
+        async def execute_command(self, *args: object, **options: object) -> object:
+            await asyncio.sleep(0)
+            return await super().execute_command(*args, **options)
+
+    cls = InterleavingRedis if interleave else FakeCountingRedis
+    return cls(decode_responses=True)
+
+
+async def seat_players(
+    manager: ConnectionManager, room_id: str, player_ids: list[str]
+) -> list[FakeSocket]:
+    sockets = []
+    for player_id in player_ids:
+        ws = FakeSocket()
+        await manager.move_player("lobby", room_id, player_id, ws)  # type: ignore[arg-type]
+        sockets.append(ws)
+    return sockets
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    us_per_call: float       # 中央値
+    commands: float          # 1回あたりのRedisコマンド数
+    round_trips: float       # 1回あたりのRedis往復回数
+
+
+async def measure(
+    name: str,
+    run: Callable[[], Awaitable[object]],
+    prepare: Callable[[], Awaitable[object]] | None = None,
+    min_time: float = 0.5,
+    min_iterations: int = 5,
+    max_iterations: int = 10000,
+) -> Result:
+    """prepare（計測対象外）→ run（計測対象）を繰り返し、所要時間とRedis呼び出し数を集計する。"""
+    samples: list[float] = []
+    commands = round_trips = 0
+    total = 0.0
+    # 初回だけ通る経路（キャッシュの読み込みなど）を除く。回数の少ない計測（往復遅延の模擬など）で
+    # 1回あたりのコマンド数がずれないようにする
+    if prepare is not None:
+        await prepare()
+    await run()
+    while len(samples) < max_iterations and (
+        len(samples) < min_iterations or total < min_time
+    ):
+        if prepare is not None:
+            await prepare()
+        with count_redis_calls() as calls:
+            started = time.perf_counter()
+            await run()
+            elapsed = time.perf_counter() - started
+        samples.append(elapsed)
+        total += elapsed
+        commands += calls.commands
+        round_trips += calls.round_trips
+    n = len(samples)
+    return Result(
+        name=name,
+        iterations=n,
+        us_per_call=statistics.median(samples) * 1e6,
+        commands=commands / n,
+        round_trips=round_trips / n,
+    )
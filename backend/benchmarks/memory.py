@@ -0,0 +1,225 @@
+"""1接続あたりのメモリ使用量の計測。
+
+使い方（backend/ で実行）:
+    python -m benchmarks.memory --sockets 1000
+    python -m benchmarks.memory --sockets 1000 --compression none
+    python -m benchmarks.memory --sockets 2000 --redis-url redis://:pass@localhost:6379
+
+本番と同じ ``python -m app.router`` を別プロセスで起動し、そのRSSの増分を
+ロビーで待機しているだけの接続数、ゲーム中（4人卓）の接続数で割って表示する。
+--compression none で permessage-deflate（接続ごとの zlib の状態）を除いた分が分かる。
+--redis-url 未指定時はこのプロセス内で fakeredis のTCPサーバーを動かす
+（Redisのデータはサーバープロセスのメモリに含まれない）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import websockets
+
+from benchmarks.startup import _free_port, _wait_for
+
+TABLE_SIZE = 4
+# 計測前に一度通しておく接続数（import・アロケーターの初期確保を計測に含めない）
+WARMUP_SOCKETS = 50
+
+
+def _rss(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("VmRSS not found")
+
+
+def _start_fake_redis() -> str:
+    from fakeredis import TcpFakeServer  # noqa: PLC0415
+
+    class Server(TcpFakeServer):
+        # 既定の5では接続プールが一斉に接続したときに取りこぼす
+        request_queue_size = 1024
+
+    port = _free_port()
+    server = Server(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}"
+
+
+class Client:
+    """受信したフレームを読み捨てつつ、種類ごとに待ち合わせできるテスト用クライアント。"""
+
+    def __init__(self, ws: Any) -> None:
+        self.ws = ws
+        self.waiters: dict[str, asyncio.Future[dict]] = {}
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        try:
+            async for raw in self.ws:
+                event = json.loads(raw)
+                if event["type"] == "error":
+                    for pending in self.waiters.values():
+                        if not pending.done():
+                            pending.set_exception(RuntimeError(event["payload"]["message"]))
+                    self.waiters.clear()
+                    continue
+                waiter = self.waiters.pop(event["type"], None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(event["payload"])
+        except websockets.ConnectionClosed:
+            pass
+
+    async def request(self, event: str, payload: dict, reply: str) -> dict:
+        waiter = self.waiters[reply] = asyncio.get_running_loop().create_future()
+        await self.ws.send(json.dumps({"type": event, "payload": payload}))
+        return await asyncio.wait_for(waiter, timeout=30)
+
+    async def close(self) -> None:
+        await self.ws.close()
+        await self.reader
+
+
+async def _open(
+    port: int, prefix: str, count: int, compression: str | None = "deflate"
+) -> list[Client]:
+    async def one(i: int) -> Client:
+        ws = await websockets.connect(
+            f"ws://127.0.0.1:{port}/ws/{prefix}-{i}",
+            compression=compression,
+            max_queue=None,
+            open_timeout=30,
+        )
+        return Client(ws)
+
+    clients: list[Client] = []
+    # 同時に張る接続数を抑える（accept キューあふれを避ける）
+    for start in range(0, count, 200):
+        clients += await asyncio.gather(*(one(i) for i in range(start, min(start + 200, count))))
+    return clients
+
+
+async def _seat(clients: list[Client]) -> None:
+    """TABLE_SIZE 人ずつルームを作ってゲームを開始する。"""
+
+    async def table(players: list[Client], index: int) -> None:
+        host, *guests = players
+        created = await host.request(
+            "create_room", {"nickname": f"h{index}", "max_players": TABLE_SIZE}, "room_created"
+        )
+        for n, guest in enumerate(guests):
+            await guest.request(
+                "join_room",
+                {"room_id": created["room_id"], "nickname": f"g{index}-{n}"},
+                "player_joined",
+            )
+        await host.request("start_game", {}, "game_started")
+
+    tables = [clients[i:i + TABLE_SIZE] for i in range(0, len(clients), TABLE_SIZE)]
+    for start in range(0, len(tables), 10):
+        await asyncio.gather(*(
+            table(players, start + i)
+            for i, players in enumerate(tables[start:start + 10])
+            if len(players) == TABLE_SIZE
+        ))
+
+
+async def _settle(pid: int) -> int:
+    await asyncio.sleep(1.0)
+    return _rss(pid)
+
+
+async def _measure(
+    port: int, pid: int, sockets: int, compression: str | None
+) -> dict[str, float]:
+    warmup = await _open(port, "warmup", WARMUP_SOCKETS, compression)
+    await _seat(warmup)
+    await asyncio.gather(*(c.close() for c in warmup))
+
+    base = await _settle(pid)
+    idle = await _open(port, "idle", sockets, compression)
+    after_idle = await _settle(pid)
+
+    playing = await _open(port, "game", sockets, compression)
+    await _seat(playing)
+    after_game = await _settle(pid)
+
+    await asyncio.gather(*(c.close() for c in idle + playing))
+    return {
+        "rss_base_mb": base / 2**20,
+        "rss_peak_mb": after_game / 2**20,
+        "idle_bytes_per_socket": (after_idle - base) / sockets,
+        "in_game_bytes_per_socket": (after_game - after_idle) / sockets,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ 接続あたりのメモリ計測")
+    parser.add_argument("--sockets", type=int, default=1000, help="各段階で張る接続数")
+    parser.add_argument("--redis-url", default=None, help="使用するRedis（未指定ならfakeredis）")
+    parser.add_argument(
+        "--compression",
+        choices=("deflate", "none"),
+        default="deflate",
+        help="クライアントが permessage-deflate を要求するか（ブラウザは要求する）",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+    compression = None if args.compression == "none" else args.compression
+
+    redis_url = args.redis_url or _start_fake_redis()
+    url = urlsplit(redis_url)
+    port = _free_port()
+    env = {
+        **os.environ,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "WEB_WORKERS": "1",
+        "REDIS_HOST": url.hostname or "localhost",
+        "REDIS_PORT": str(url.port or 6379),
+        "REDIS_PASSWORD": url.password or "",
+        "REPLAY_DIR": "",
+        "ARCHIVE_PATH": "",
+        "ANALYTICS_DIR": "",
+        "LOG_LEVEL": "warning",
+        # 計測のため受付制御は上限に掛からないようにする
+        "MAX_CONNECTIONS": str(args.sockets * 4),
+        "MAX_CONNECTIONS_PER_IP": str(args.sockets * 4),
+        "ROOM_SHED_RATIO": "1",
+        "LAG_SHED_ROOMS_MS": "1000000",
+        "LAG_SHED_LOBBY_MS": "1000000",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.router"], env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        _wait_for(port, "/ready", time.monotonic() + args.timeout)
+        result = asyncio.run(_measure(port, proc.pid, args.sockets, compression))
+    except (TimeoutError, OSError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    print(f"sockets per phase        {args.sockets} (compression: {args.compression})")
+    print(f"server rss (base/peak)   {result['rss_base_mb']:.1f} / {result['rss_peak_mb']:.1f} MB")
+    print(f"idle lobby socket        {result['idle_bytes_per_socket'] / 1024:.1f} KiB")
+    print(f"in-game socket           {result['in_game_bytes_per_socket'] / 1024:.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
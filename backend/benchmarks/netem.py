@@ -0,0 +1,281 @@
+"""Redisとの間の通信路（往復遅延・ゆらぎ・帯域・切断）の模擬。
+
+使い方（backend/ で実行）:
+    python -m benchmarks --rtt-ms 1 --jitter-ms 0.2            # ベンチマークを遅いRedis越しに計測
+    python -m benchmarks.stress --rtt-ms 0.5 --drop-rate 0.001  # ストレステストに遅延と切断を加える
+    python -m benchmarks.netem --upstream localhost:6379 --port 6380 --rtt-ms 2 --bandwidth-kbps 10000
+    REDIS_HOST=localhost REDIS_PORT=6380 uvicorn app.main:app   # サーバー全体を遅いRedis越しに動かす
+
+ローカルのRedis（やfakeredis）は往復がほぼ0なので、1操作あたりの往復回数の差が所要時間に表れない。
+ベンチマーク・ストレステストでは make_redis(link=...) がクライアントをラップし、コマンド（パイプラインは
+まとめて1回）ごとに片道分待ってから実行し、応答の片道分待ってから返す。送受信のバイト数は
+RESPでの大きさの目安で、帯域は送信・受信の向きごとに1本の回線を共有する（前の転送が終わるまで待つ）。
+切断は ConnectionError として返し、半分は送る前（未実行）、半分は応答を失った場合（実行済み）とする。
+
+python -m benchmarks.netem は同じ模擬をするTCPプロキシで、実際のRedisの手前に置いてサーバーごと試す。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.redis.instrumented import CountingPipeline, CountingRedis
+
+# True の間は模擬せずにそのまま実行する（ストレステストの不変条件の検査など、計測対象外の読み取り）
+_suspended: ContextVar[bool] = ContextVar("netem_suspended", default=False)
+
+
+@contextmanager
+def link_suspended(suspended: bool = True) -> Iterator[None]:
+    """ブロック内のRedis呼び出しを模擬せずに実行する（suspended=False で内側だけ再び模擬する）。"""
+    token = _suspended.set(suspended)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+@dataclass(frozen=True)
+class LinkProfile:
+    rtt_ms: float = 0.0
+    jitter_ms: float = 0.0           # 往復遅延の標準偏差
+    bandwidth_kbps: float = 0.0      # 向きごとの帯域（0で無制限）
+    drop_rate: float = 0.0           # 1往復（プロキシでは1回の読み取り）ごとに切断する確率
+    seed: int | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rtt_ms or self.jitter_ms or self.bandwidth_kbps or self.drop_rate)
+
+    def describe(self) -> str:
+        bandwidth = f"{self.bandwidth_kbps:g}kbps" if self.bandwidth_kbps else "unlimited"
+        return (
+            f"rtt {self.rtt_ms:g}ms ±{self.jitter_ms:g}ms, bandwidth {bandwidth}, "
+            f"drop {self.drop_rate:g}"
+        )
+
+
+class Link:
+    """1本の通信路の状態（帯域の空き時刻・乱数・集計）。"""
+
+    def __init__(self, profile: LinkProfile) -> None:
+        self.profile = profile
+        self.rng = random.Random(profile.seed)
+        # 向き（0: 送信, 1: 受信）ごとに回線が空く時刻
+        self._free_at = [0.0, 0.0]
+        self.round_trips = 0
+        self.drops = 0
+        self.delay = 0.0             # 模擬で待った合計（秒）
+
+    def one_way(self) -> float:
+        """片道の遅延（秒）。往復で標準偏差が jitter_ms になるよう片道ごとにゆらす。"""
+        p = self.profile
+        return max(0.0, self.rng.gauss(p.rtt_ms / 2, p.jitter_ms / 2**0.5)) / 1000
+
+    def transfer(self, direction: int, size: int) -> float:
+        """size バイトを送り終えるまでの時間（秒、同じ向きの前の転送の待ちを含む）。"""
+        if not self.profile.bandwidth_kbps:
+            return 0.0
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._free_at[direction])
+        self._free_at[direction] = start + size * 8 / (self.profile.bandwidth_kbps * 1000)
+        return self._free_at[direction] - now
+
+    def dropped(self) -> bool:
+        if self.profile.drop_rate and self.rng.random() < self.profile.drop_rate:
+            self.drops += 1
+            return True
+        return False
+
+    async def wait(self, seconds: float) -> None:
+        self.delay += seconds
+        await asyncio.sleep(seconds)
+
+    async def round_trip(self, sent: int, execute: Any) -> Any:
+        """sent バイトのリクエストを送り、execute() の応答を受け取るまでを模擬する。
+
+        応答側の待ちは送り始めからの時刻で決め、行きの待ちでタイマーが遅れた分を吸収する。
+        それでもイベントループのタイマー（epoll）はミリ秒単位で切り上げるため、往復は実際には
+        1ms弱長くなる。往復回数の影響を見るには --rtt-ms を数ms以上にして比べる。
+        """
+        self.round_trips += 1
+        drop = self.dropped()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        arrive = self.one_way() + self.transfer(0, sent)
+        await self.wait(arrive)
+        if drop and self.rng.random() < 0.5:
+            raise RedisConnectionError("injected: connection dropped before the request arrived")
+        result = await execute()
+        reply = self.one_way() + self.transfer(1, _resp_size(result))
+        await self.wait(max(0.0, started + arrive + reply - loop.time()))
+        if drop:
+            raise RedisConnectionError("injected: connection dropped before the reply arrived")
+        return result
+
+
+def _resp_size(value: Any) -> int:
+    """RESPで送ったときのおおよそのバイト数。"""
+    if isinstance(value, (list, tuple, set)):
+        return 4 + sum(_resp_size(v) for v in value)
+    if isinstance(value, dict):
+        return 4 + sum(_resp_size(k) + _resp_size(v) for k, v in value.items())
+    if value is None:
+        return 5
+    if isinstance(value, bytes):
+        return len(value) + 8
+    return len(str(value).encode()) + 8
+
+
+def linked(cls: type[CountingRedis], link: Link) -> type[CountingRedis]:
+    """cls のコマンド・パイプラインを link 越しに実行するサブクラスを返す。"""
+
+    class LinkedPipeline(CountingPipeline):
+        async def execute(self, raise_on_error: bool = True) -> list[Any]:
+            if not self.command_stack or _suspended.get():
+                return await super().execute(raise_on_error)
+            sent = sum(_resp_size(args) for args, _ in self.command_stack)
+            execute = super().execute
+            return await link.round_trip(sent, lambda: execute(raise_on_error))
+
+    class LinkedRedis(cls):  # type: ignore[valid-type, misc]
+        # 集計（round_trips / drops / delay）を参照できるようにする
+        netem = link
+
+        async def execute_command(self, *args: Any, **options: Any) -> Any:
+            if _suspended.get():
+                return await super().execute_command(*args, **options)
+            execute_command = super().execute_command
+            return await link.round_trip(
+                _resp_size(args), lambda: execute_command(*args, **options)
+            )
+
+        def pipeline(
+            self, transaction: bool = True, shard_hint: str | None = None
+        ) -> LinkedPipeline:
+            return LinkedPipeline(
+                self.connection_pool, self.response_callbacks, transaction, shard_hint
+            )
+
+    return LinkedRedis
+
+
+# ---------------------------------------------------------------------------
+# コマンドライン引数（ベンチマーク・ストレステスト・プロキシで共通）
+# ---------------------------------------------------------------------------
+
+def add_link_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("通信路の模擬（benchmarks.netem）")
+    group.add_argument("--rtt-ms", type=float, default=0.0, help="Redisとの往復遅延（ミリ秒）")
+    group.add_argument("--jitter-ms", type=float, default=0.0, help="往復遅延の標準偏差（ミリ秒）")
+    group.add_argument("--bandwidth-kbps", type=float, default=0.0, help="向きごとの帯域（0で無制限）")
+    group.add_argument("--drop-rate", type=float, default=0.0, help="1往復ごとに接続が切れる確率")
+    group.add_argument("--link-seed", type=int, default=None, help="ゆらぎ・切断の乱数シード")
+
+
+def link_from_args(args: argparse.Namespace) -> LinkProfile | None:
+    profile = LinkProfile(
+        rtt_ms=args.rtt_ms,
+        jitter_ms=args.jitter_ms,
+        bandwidth_kbps=args.bandwidth_kbps,
+        drop_rate=args.drop_rate,
+        seed=args.link_seed,
+    )
+    return profile if profile.enabled else None
+
+
+# ---------------------------------------------------------------------------
+# TCPプロキシ
+# ---------------------------------------------------------------------------
+
+async def _pump(
+    link: Link,
+    direction: int,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    peer: asyncio.StreamWriter,
+) -> None:
+    """reader から読んだデータを片道の遅延と帯域の分だけ遅らせて writer に書く（順序は保つ）。"""
+    queue: asyncio.Queue[tuple[float, bytes] | None] = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    async def deliver() -> None:
+        while (item := await queue.get()) is not None:
+            deliver_at, data = item
+            await asyncio.sleep(max(0.0, deliver_at - loop.time()))
+            writer.write(data)
+            await writer.drain()
+
+    sender = asyncio.create_task(deliver())
+    last = 0.0
+    try:
+        while data := await reader.read(65536):
+            if link.dropped():
+                break
+            link.round_trips += direction
+            # TCPなので後から読んだデータが先に届くことはない
+            last = max(last, loop.time() + link.one_way() + link.transfer(direction, len(data)))
+            queue.put_nowait((last, data))
+        queue.put_nowait(None)
+        await sender
+    except ConnectionError:
+        pass
+    finally:
+        sender.cancel()
+        writer.close()
+        peer.close()
+
+
+async def serve_proxy(host: str, port: int, upstream: tuple[str, int], profile: LinkProfile) -> None:
+    link = Link(profile)
+
+    async def handle(client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter) -> None:
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(*upstream)
+        except OSError as e:
+            print(f"upstream connection failed: {e}", file=sys.stderr)
+            client_writer.close()
+            return
+        await asyncio.gather(
+            _pump(link, 0, client_reader, upstream_writer, client_writer),
+            _pump(link, 1, upstream_reader, client_writer, upstream_writer),
+        )
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f"proxy {host}:{port} -> {upstream[0]}:{upstream[1]} ({profile.describe()})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        print(f"replies {link.round_trips}, drops {link.drops}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ Redis通信路の模擬プロキシ")
+    parser.add_argument("--upstream", default="localhost:6379", help="転送先のRedis（host:port）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+
+    host, _, port = args.upstream.rpartition(":")
+    profile = link_from_args(args) or LinkProfile()
+    try:
+        asyncio.run(serve_proxy(args.host, args.port, (host or "localhost", int(port)), profile))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
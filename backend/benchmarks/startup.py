@@ -0,0 +1,193 @@
+"""コールドスタートの計測。
+
+使い方（backend/ で実行）:
+    python -m benchmarks.startup imports --top 25          # import時間の内訳（-X importtime）
+    python -m benchmarks.startup boot --runs 5             # 起動〜最初のフレームまでの時間
+    python -m benchmarks.startup boot --redis-url redis://:pass@localhost:6379
+
+boot は本番と同じ ``python -m app.router`` を起動し、プロセス起動から
+/health が応答するまで（待ち受け開始）、WebSocket で最初のフレームを受け取るまで、
+/ready が200を返すまで（Redisの準備完了）をそれぞれ計測する。
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+from websockets.sync.client import connect
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_report(target: str, top: int) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "REPLAY_DIR": "", "ARCHIVE_PATH": "", "ANALYTICS_DIR": ""},
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(1)
+    # (自身のμs, 累積μs, 深さ, モジュール名)
+    rows = [
+        (int(m[1]), int(m[2]), len(m[3]) // 2, m[4])
+        for m in _IMPORT_LINE.finditer(proc.stderr)
+    ]
+    total = sum(row[0] for row in rows)
+    app_total = sum(row[0] for row in rows if row[3].split(".")[0] == "app")
+    print(
+        f"import {target}: {total / 1000:.1f} ms "
+        f"({len(rows)} modules, app.* {app_total / 1000:.1f} ms)"
+    )
+
+    # -X importtime は子モジュールを親より先に出力する。target 直前の深さ1の行が target の直接の import
+    direct: list[tuple[int, int, int, str]] = []
+    children: list[tuple[int, int, int, str]] = []
+    for row in rows:
+        if row[2] == 1:
+            children.append(row)
+        elif row[2] == 0:
+            if row[3] == target:
+                direct = children
+            children = []
+    print(f"\n{'self ms':>8} {'cumul ms':>9}  imported by {target}")
+    for self_us, cumulative_us, _, name in sorted(direct, key=lambda r: -r[1]):
+        if cumulative_us >= 1000:
+            print(f"{self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}  {name}")
+
+    print(f"\n{'self ms':>8} {'cumul ms':>9}  slowest modules (self)")
+    for self_us, cumulative_us, _, name in sorted(rows, key=lambda r: -r[0])[:top]:
+        print(f"{self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}  {name}")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(port: int, path: str) -> tuple[int, bytes] | None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    except OSError:
+        return None
+    finally:
+        conn.close()
+
+
+def _wait_for(port: int, path: str, deadline: float) -> tuple[int, bytes]:
+    while time.monotonic() < deadline:
+        result = _get(port, path)
+        if result is not None and result[0] == 200:
+            return result
+        time.sleep(0.005)
+    raise TimeoutError(f"{path} did not return 200")
+
+
+def _boot_once(env: dict[str, str], timeout: float) -> dict[str, float]:
+    port = _free_port()
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.router"],
+        env={**env, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = started + timeout
+    try:
+        _wait_for(port, "/health", deadline)
+        timings = {"listen_ms": (time.monotonic() - started) * 1000}
+
+        # プレイヤーが感じる待ち時間: 接続してからルーム作成の応答（最初のフレーム）が届くまで
+        with connect(f"ws://127.0.0.1:{port}/ws/startup-bench", open_timeout=timeout) as ws:
+            ws.send(json.dumps({
+                "type": "create_room",
+                "payload": {"nickname": "bench", "max_players": 2},
+            }))
+            frame = json.loads(ws.recv(timeout=timeout))
+        timings["first_frame_ms"] = (time.monotonic() - started) * 1000
+        if frame.get("type") != "room_created":
+            raise RuntimeError(f"unexpected first frame: {frame}")
+
+        _, body = _wait_for(port, "/ready", deadline)
+        timings["ready_ms"] = (time.monotonic() - started) * 1000
+        for phase, ms in json.loads(body)["phases_ms"].items():
+            timings[f"server.{phase}_ms"] = ms
+        return timings
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _boot(redis_url: str, runs: int, timeout: float) -> int:
+    url = urlsplit(redis_url)
+    env = {
+        **os.environ,
+        "HOST": "127.0.0.1",
+        "WEB_WORKERS": "1",
+        "REDIS_HOST": url.hostname or "localhost",
+        "REDIS_PORT": str(url.port or 6379),
+        "REDIS_PASSWORD": url.password or "",
+        "REPLAY_DIR": "",
+        "ARCHIVE_PATH": "",
+        "ANALYTICS_DIR": "",
+        "LOG_LEVEL": "warning",
+    }
+    samples: dict[str, list[float]] = {}
+    for i in range(runs):
+        try:
+            timings = _boot_once(env, timeout)
+        except (TimeoutError, RuntimeError, OSError) as e:
+            print(f"error: run {i + 1}: {e}", file=sys.stderr)
+            return 1
+        for name, value in timings.items():
+            samples.setdefault(name, []).append(value)
+        print(" ".join(f"{name}={value:.1f}" for name, value in timings.items()))
+
+    print(f"\n{'metric':<28} {'median':>9} {'min':>9} {'max':>9}")
+    for name, values in samples.items():
+        print(
+            f"{name:<28} {statistics.median(values):>9.1f} "
+            f"{min(values):>9.1f} {max(values):>9.1f}"
+        )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ 起動時間の計測")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imports = sub.add_parser("imports", help="import時間の内訳を表示する")
+    imports.add_argument("--target", default="app.main")
+    imports.add_argument("--top", type=int, default=20)
+
+    boot = sub.add_parser("boot", help="起動から最初のフレームまでを計測する")
+    boot.add_argument("--redis-url", default="redis://localhost:6379")
+    boot.add_argument("--runs", type=int, default=5)
+    boot.add_argument("--timeout", type=float, default=30.0)
+
+    args = parser.parse_args(argv)
+    if args.command == "imports":
+        _import_report(args.target, args.top)
+        return 0
+    return _boot(args.redis_url, args.runs, args.timeout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
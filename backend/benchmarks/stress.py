@@ -0,0 +1,690 @@
+"""並行ストレステストとゲームの不変条件の検査。
+
+使い方（backend/ で実行）:
+    python -m benchmarks.stress                              # プロセス内のfakeredisで実行
+    python -m benchmarks.stress --tables 50 --rounds 500 --seed 7
+    python -m benchmarks.stress --redis-url redis://localhost:6379/15 --flush
+    python -m benchmarks.stress --replay stress-failure.json # 保存した最小手順を再実行
+    python -m benchmarks.stress --rtt-ms 2 --drop-rate 0.002 # Redisとの往復に遅延と切断を加える
+
+多数の卓で、実際のクライアントと同じく EventHandler にイベントを投げる。
+手番のプレイヤーの正しい操作に加えて、同じ操作の二重送信（二重ドローなど）、
+別の操作との同時送信（横取りとスキップ、ドローとターン終了など）、手番外のプレイヤーの操作、
+手番中の切断をわざと同じラウンドで同時に投げ、ラウンドごとに次の不変条件を検査する。
+
+- conservation: 山札 + 全員の場 + 得点化・バーストで場を離れたカード = 配った山札（数字ごと）
+- deck: 山札のリストと残り枚数ハッシュが一致する
+- score: 得点の合計 = 得点化されたカードの数字の合計
+- turn: 手番を持つのは席に残っているプレイヤー1人で、カードを引く・横取りする・バーストするのは手番のプレイヤーだけ
+- phase: フェーズが場の状態と矛盾しない（score なら場にカードがある、burst ならバースト条件を満たす など）
+- replay: リプレイログを ReplayGame で再生した状態（手番・フェーズ・場・得点・山札の枚数）がサーバーと一致する
+- error: 想定外の例外（INTERNAL_ERROR。--drop-rate で切断を模擬する場合は除く）
+
+違反が見つかった卓は、イベントを削って同じ種類の違反が再現する最小の手順にし（delta debugging）、
+--save のファイルに保存する。fakeredis では同じ手順から同じ結果になるため最小化は確実に効くが、
+実際のRedisでは通信のタイミングで結果が変わるため、--attempts 回のうち1回でも再現すれば再現とみなす。
+"""
+from __future__ import annotations
+
+import os
+
+# app の import 前に設定する（実行中にリプレイログ・アーカイブ・分析イベントを書かない）
+os.environ.setdefault("REPLAY_DIR", "")
+os.environ.setdefault("ARCHIVE_PATH", "")
+os.environ.setdefault("ANALYTICS_DIR", "")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+from collections import Counter, defaultdict  # noqa: E402
+from collections.abc import Awaitable, Callable  # noqa: E402
+from dataclasses import asdict, dataclass, field  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import redis.asyncio as aioredis  # noqa: E402
+from redis.exceptions import ConnectionError as RedisConnectionError  # noqa: E402
+
+from app.models.game import GamePhase, RoomStatus, TurnInfo, build_deck  # noqa: E402
+from app.redis.client import RedisClient  # noqa: E402
+from app.services.game_service import GameService  # noqa: E402
+from app.services.replay_log import ReplayError, ReplayGame, replay_recorder  # noqa: E402
+from app.websocket.handlers import EventHandler  # noqa: E402
+from app.websocket.manager import ConnectionManager  # noqa: E402
+from app.websocket.state_publisher import state_publisher  # noqa: E402
+from benchmarks.harness import FakeSocket, make_redis, seat_players  # noqa: E402
+from benchmarks.netem import add_link_arguments, link_from_args, link_suspended  # noqa: E402
+
+# (プレイヤー番号, イベント) と、ラウンドごとに同時に投げるイベントの列
+Event = tuple[int, str]
+Schedule = list[list[Event]]
+
+ACTIONS = ("draw_card", "end_turn", "score_cards", "steal_card", "skip_steal", "confirm_burst")
+DISCONNECT = "disconnect"
+
+# フェーズごとの手番のプレイヤーの正しい操作（DRAWN はもう1枚引くかターン終了）
+_EXPECTED: dict[GamePhase, tuple[str, ...]] = {
+    GamePhase.SCORE: ("score_cards",),
+    GamePhase.DRAW: ("draw_card",),
+    GamePhase.DRAWN: ("draw_card", "draw_card", "end_turn"),
+    GamePhase.STEAL: ("steal_card", "skip_steal"),
+    GamePhase.BURST: ("confirm_burst",),
+}
+
+# 手番のプレイヤーが起こしたことを示すブロードキャストと、その操作をしたプレイヤーの項目
+_ACTOR_KEYS = {"card_drawn": "player", "card_stolen": "to_player", "burst": "player"}
+
+
+class RecordingManager(ConnectionManager):
+    """ブロードキャストを横取りして、カードの出入りと手番の移り変わりを記録する。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        # room_id -> 得点化・バーストで場を離れたカード
+        self.removed: dict[str, Counter[int]] = defaultdict(Counter)
+        # room_id -> 得点化されたカードの数字の合計
+        self.points: dict[str, int] = defaultdict(int)
+        # room_id -> ブロードキャスト上の手番のプレイヤー（ゲーム終了後は None）
+        self.holder: dict[str, str | None] = {}
+        # room_id -> ブロードキャストの順序から見つかった違反
+        self.violations: dict[str, list[str]] = defaultdict(list)
+
+    def reset(self, room_id: str) -> None:
+        self.removed.pop(room_id, None)
+        self.points.pop(room_id, None)
+        self.holder.pop(room_id, None)
+        self.violations.pop(room_id, None)
+
+    async def broadcast(self, room_id: str, message: dict) -> None:
+        kind = message["type"]
+        payload = message["payload"]
+        if kind == "cards_scored":
+            self.removed[room_id].update(payload["cards"])
+            self.points[room_id] += sum(payload["cards"])
+        elif kind == "burst":
+            self.removed[room_id].update(payload["lost_cards"])
+        if kind == "game_started":
+            self.holder[room_id] = payload["first_player"]
+        elif kind == "turn_changed":
+            self.holder[room_id] = payload["current_player"]
+        elif kind == "game_ended":
+            self.holder[room_id] = None
+        elif kind in _ACTOR_KEYS:
+            actor = payload[_ACTOR_KEYS[kind]]
+            holder = self.holder.get(room_id)
+            if actor != holder:
+                self.violations[room_id].append(
+                    f"turn: {kind} by {actor} while "
+                    + (f"{holder} holds the turn" if holder else "the game has ended")
+                )
+        await super().broadcast(room_id, message)
+
+
+class ReplySocket(FakeSocket):
+    """1イベントぶんの応答を受け取るソケット（エラーが返ればそのコードを残す）。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.error: str | None = None
+
+    async def send_text(self, data: str) -> None:
+        await super().send_text(data)
+        if data.startswith('{"type": "error"'):
+            self.error = json.loads(data)["payload"]["code"]
+
+
+@dataclass
+class Stats:
+    events: int = 0
+    rejected: Counter[str] = field(default_factory=Counter)
+    conflicts: int = 0            # 競合を仕込んだラウンド数
+    conflicts_rejected: int = 0   # そのうち、仕込んだイベントが拒否されたラウンド数
+    double_accepted: int = 0      # 二重送信が両方とも受理されたラウンド数
+    disconnects: int = 0
+    games: int = 0
+    # イベント1つの処理時間（秒）。--rtt-ms を付けると往復回数の差がここに表れる
+    latencies: list[float] = field(default_factory=list)
+
+
+@dataclass
+class Failure:
+    table: int
+    seed: int
+    players: int
+    deck_size: int
+    per_client_order: bool
+    round: int
+    violations: list[str]
+    schedule: Schedule
+
+    @property
+    def category(self) -> str:
+        return self.violations[0].split(":", 1)[0]
+
+
+class Table:
+    """1卓ぶんの状態。同じ seed と同じイベント列からは同じ結果になる（fakeredisの場合）。"""
+
+    def __init__(self, index: int, seed: int, players: int, deck_size: int) -> None:
+        self.index = index
+        self.seed = seed
+        self.room_id = f"stress{index:05d}"
+        self.player_ids = [f"{self.room_id}-p{i}" for i in range(players)]
+        self.nicknames = [f"P{i}" for i in range(players)]
+        self.deck_size = deck_size
+        self.seats: list[FakeSocket] = []
+        self.dealt: Counter[int] = Counter()
+        self.games = 0
+
+    def deck_seed(self) -> int:
+        return random.Random(f"{self.seed}:{self.games}").getrandbits(63)
+
+
+class StressRun:
+    def __init__(
+        self, redis: RedisClient, per_client_order: bool = True, injected_drops: bool = False
+    ) -> None:
+        self.redis = redis
+        self.per_client_order = per_client_order
+        # 通信路の模擬で切断を起こす場合、その INTERNAL_ERROR は違反として扱わない
+        # （途中で止まった操作の後も、残りの不変条件が保たれるかを検査する）
+        self.injected_drops = injected_drops
+        self.manager = RecordingManager()
+        self.service = GameService(redis, self.manager)
+        self.handler = EventHandler(self.service)
+        self.stats = Stats()
+
+    async def seat(self, table: Table) -> None:
+        await self.redis.create_rooms_bulk([
+            (table.room_id, len(table.player_ids), list(zip(table.player_ids, table.nicknames)))
+        ])
+        table.seats = await seat_players(self.manager, table.room_id, table.player_ids)
+
+    async def new_game(self, table: Table) -> bool:
+        """席に残っている全員で次のゲームを始める（2人未満なら False）。"""
+        seated = await self.redis.get_all_nicknames(table.room_id)
+        if len(seated) < 2:
+            return False
+        # 切断したプレイヤーの場は _end_game で得点化されずに残るため、前のゲームの分を片付ける
+        for nickname in table.nicknames:
+            await self.redis.clear_field(table.room_id, nickname)
+        self.manager.reset(table.room_id)
+        await self.service.begin_game(table.room_id, seated)
+        seed = table.deck_seed()
+        await self.redis.initialize_deck(table.room_id, deck_size=table.deck_size, seed=seed)
+        # 山札を配り直したので、リプレイログもこの山札から記録し直す
+        replay_recorder.start_game(table.room_id, seed, table.deck_size, seated)
+        table.dealt = Counter(build_deck(table.deck_size, seed))
+        table.games += 1
+        self.stats.games += 1
+        return True
+
+    async def fire(self, table: Table, event: Event) -> str | None:
+        """イベントを1つ処理し、拒否されたらエラーコードを返す。"""
+        player, action = event
+        if action == DISCONNECT:
+            self.stats.disconnects += 1
+            try:
+                await self.handler.disconnect(
+                    table.seats[player],  # type: ignore[arg-type]
+                    table.player_ids[player],
+                    table.room_id,
+                )
+            except RedisConnectionError:
+                # 模擬した切断で席の解放が途中で止まった（本番では受信ループの外でログに残るだけ）
+                return "INTERNAL_ERROR"
+            return None
+        reply = ReplySocket()
+        started = time.perf_counter()
+        await self.handler.handle(
+            reply,  # type: ignore[arg-type]
+            table.player_ids[player],
+            table.room_id,
+            {"type": action, "payload": {}},
+        )
+        self.stats.latencies.append(time.perf_counter() - started)
+        return reply.error
+
+    async def fire_round(self, table: Table, events: list[Event]) -> list[str | None]:
+        """ラウンドのイベントを同時に投げる。
+
+        per_client_order では同じプレイヤーのイベントを順に処理する（受信ループは1接続につき
+        1イベントずつ処理し、切断の片付けもその後に行うため、本番で起こりうるのは
+        プレイヤーをまたいだ競合だけ）。
+        """
+        errors: list[str | None] = [None] * len(events)
+
+        async def client(indexes: list[int]) -> None:
+            # 通信路の模擬は検査対象のイベント処理だけに掛ける
+            with link_suspended(False):
+                for i in indexes:
+                    errors[i] = await self.fire(table, events[i])
+
+        lanes: dict[int, list[int]] = defaultdict(list)
+        for i, (player, _) in enumerate(events):
+            lanes[player if self.per_client_order else i].append(i)
+        await asyncio.gather(*(client(indexes) for indexes in lanes.values()))
+        return errors
+
+    async def check(self, table: Table, errors: list[str | None]) -> list[str]:
+        """静止状態（ラウンドのイベントがすべて処理された時点）の不変条件を検査する。"""
+        room_id = table.room_id
+        violations = [
+            f"error: {e} while handling an event"
+            for e in errors
+            if e == "INTERNAL_ERROR" and not self.injected_drops
+        ]
+        violations += self.manager.violations.pop(room_id, [])
+        room = await self.redis.get_room(room_id)
+        if room is None:
+            # 全員が切断してルームが削除された
+            return violations
+
+        node = self.redis._node(room_id)
+        deck = Counter(
+            int(c) for c in await node.lrange(self.redis._deck_key(room_id), 0, -1)  # type: ignore[misc]
+        )
+        remaining = +Counter(await self.redis.get_remaining_counts(room_id))
+        if remaining != deck:
+            violations.append(f"deck: remaining counts {dict(remaining)} != deck {dict(deck)}")
+
+        fields = {
+            nickname: await self.redis.get_field(room_id, nickname)
+            for nickname in table.nicknames
+        }
+        seen = deck.copy()
+        for cards in fields.values():
+            seen.update(cards)
+        seen.update(self.manager.removed[room_id])
+        if seen != table.dealt:
+            violations.append(
+                f"conservation: extra {dict(seen - table.dealt)} "
+                f"missing {dict(table.dealt - seen)}"
+            )
+
+        scores = await self.redis.get_all_scores(room_id)
+        if sum(scores.values()) != self.manager.points[room_id]:
+            violations.append(
+                f"score: scores sum to {sum(scores.values())} "
+                f"but {self.manager.points[room_id]} points were scored"
+            )
+
+        turn = await self.redis.get_turn(room_id)
+        violations += self._check_replay(room_id, room.status, turn, fields, scores, sum(deck.values()))
+
+        if room.status != RoomStatus.PLAYING:
+            return violations
+        seated = set(await self.redis.get_all_nicknames(room_id))
+        if turn is None:
+            violations.append("turn: nobody holds the turn")
+            return violations
+        holder = turn.current_nickname
+        if seated and holder not in seated:
+            violations.append(f"turn: {holder} holds the turn but has left the room")
+        own = fields.get(holder, [])
+        if turn.phase == GamePhase.SCORE and not own:
+            violations.append(f"phase: {holder} is in score phase with an empty field")
+        elif turn.phase == GamePhase.BURST and not (
+            len(own) >= 4 and max(Counter(own).values()) >= 2
+        ):
+            violations.append(f"phase: {holder} is in burst phase with field {own}")
+        elif turn.phase == GamePhase.STEAL and turn.drawn_card not in own:
+            # 横取りの対象が切断していなくなるのは正常（skip_steal で進められる）
+            violations.append(
+                f"phase: {holder} is in steal phase but {turn.drawn_card} is not in the field"
+            )
+        return violations
+
+    def _check_replay(
+        self,
+        room_id: str,
+        status: RoomStatus,
+        turn: TurnInfo | None,
+        fields: dict[str, list[int]],
+        scores: dict[str, int],
+        deck_count: int,
+    ) -> list[str]:
+        """リプレイログを最初から再生し、サーバーの状態と食い違っていないかを調べる。"""
+        try:
+            replay = ReplayGame.parse(replay_recorder.buffered(room_id), room_id)
+            replay.seek(len(replay))
+        except ReplayError as e:
+            return [f"replay: {e}"]
+        violations = []
+        if status == RoomStatus.FINISHED and not replay.finished:
+            violations.append("replay: the game has ended but the replay has not")
+        if status == RoomStatus.PLAYING and turn is not None and (
+            replay.current != turn.current_nickname or replay.phase != turn.phase
+        ):
+            violations.append(
+                f"replay: replay has {replay.current} in {replay.phase.value} phase "
+                f"but the server has {turn.current_nickname} in {turn.phase.value} phase"
+            )
+        if len(replay.deck) != deck_count:
+            violations.append(f"replay: deck has {len(replay.deck)} cards, server {deck_count}")
+        for nickname in replay.seated:
+            if sorted(replay.fields[nickname]) != sorted(fields.get(nickname, [])):
+                violations.append(
+                    f"replay: {nickname} field {replay.fields[nickname]} != server {fields.get(nickname)}"
+                )
+        if {n: v for n, v in replay.scores.items() if v} != {n: v for n, v in scores.items() if v}:
+            violations.append(f"replay: scores {replay.scores} != server {scores}")
+        return violations
+
+    async def play(
+        self,
+        table: Table,
+        rounds: int,
+        plan: Callable[[Table, int], Awaitable[list[Event] | None]],
+    ) -> Failure | None:
+        """plan が返すイベントをラウンドごとに同時に投げ、違反が見つかったら止める。"""
+        # 着席・ゲーム開始・検査の読み取りは通信路の模擬の対象外（fire_round の中だけで掛ける）
+        with link_suspended():
+            return await self._play(table, rounds, plan)
+
+    async def _play(
+        self,
+        table: Table,
+        rounds: int,
+        plan: Callable[[Table, int], Awaitable[list[Event] | None]],
+    ) -> Failure | None:
+        await self.seat(table)
+        if not await self.new_game(table):
+            return None
+        played: Schedule = []
+        for n in range(rounds):
+            room = await self.redis.get_room(table.room_id)
+            if room is None:
+                break
+            if room.status == RoomStatus.FINISHED and not await self.new_game(table):
+                break
+            events = await plan(table, n)
+            if events is None:
+                break
+            played.append(events)
+            errors = await self.fire_round(table, events)
+            self.stats.events += len(events)
+            self.stats.rejected.update(e for e in errors if e is not None)
+            self._count_conflict(events, errors)
+            violations = await self.check(table, errors)
+            if violations:
+                return Failure(
+                    table.index,
+                    table.seed,
+                    len(table.player_ids),
+                    table.deck_size,
+                    self.per_client_order,
+                    n,
+                    violations,
+                    played,
+                )
+        return None
+
+    def _count_conflict(self, events: list[Event], errors: list[str | None]) -> None:
+        if len(events) < 2:
+            return
+        self.stats.conflicts += 1
+        if any(e is not None for e in errors):
+            self.stats.conflicts_rejected += 1
+        if len(set(events)) < len(events) and all(e is None for e in errors):
+            self.stats.double_accepted += 1
+
+
+class Planner:
+    """手番の状態を見て、正しい操作とわざと競合させる操作を選ぶ。"""
+
+    def __init__(
+        self, run: StressRun, conflict_rate: float, disconnect_rate: float
+    ) -> None:
+        self.run = run
+        self.conflict_rate = conflict_rate
+        self.disconnect_rate = disconnect_rate
+
+    async def __call__(self, table: Table, n: int) -> list[Event] | None:
+        rng = random.Random(f"{table.seed}:round:{n}")
+        turn = await self.run.redis.get_turn(table.room_id)
+        if turn is None or turn.current_nickname not in table.nicknames:
+            return None
+        holder = table.nicknames.index(turn.current_nickname)
+        action = rng.choice(_EXPECTED[turn.phase])
+        events: list[Event] = [(holder, action)]
+        if rng.random() < self.conflict_rate:
+            kind = rng.randrange(3)
+            if kind == 0:
+                # 二重送信（二重ドロー・二重ターン終了など）
+                events.append((holder, action))
+            elif kind == 1:
+                # フェーズが変わる瞬間に別の操作（横取りとスキップ、ドローとターン終了など）
+                events.append((holder, rng.choice([a for a in ACTIONS if a != action])))
+            else:
+                # 手番外のプレイヤーの操作
+                other = rng.choice([i for i in range(len(table.nicknames)) if i != holder])
+                events.append((other, rng.choice(ACTIONS)))
+        if rng.random() < self.disconnect_rate:
+            # 手番のプレイヤー自身か、手番が回ってくる途中の他のプレイヤーが切断する
+            events.append((rng.randrange(len(table.nicknames)), DISCONNECT))
+        rng.shuffle(events)
+        return events
+
+
+def _fixed(schedule: Schedule) -> Callable[[Table, int], Awaitable[list[Event] | None]]:
+    async def plan(table: Table, n: int) -> list[Event] | None:
+        return schedule[n] if n < len(schedule) else None
+
+    return plan
+
+
+# 決まった手順で特定の経路を必ず通す卓: 名前 -> (人数, 手順)
+_SCENARIOS: dict[str, tuple[int, Schedule]] = {
+    # 手番のプレイヤーが抜け、次の人が引いてターンを終える（抜けた時点で手番が回ることをリプレイでも再現する）
+    "leave-on-turn": (
+        3,
+        [[(0, DISCONNECT)], [(1, "draw_card")], [(1, "end_turn")], [(2, "draw_card")]],
+    ),
+}
+
+
+async def _run_scenarios(client: aioredis.Redis, deck_size: int) -> list[tuple[str, Failure]]:
+    failures = []
+    for index, (name, (players, schedule)) in enumerate(_SCENARIOS.items()):
+        run = StressRun(RedisClient(client))
+        table = Table(90000 + index, 1, players, deck_size)
+        failure = await run.play(table, len(schedule), _fixed(schedule))
+        if failure is not None:
+            failures.append((name, failure))
+    return failures
+
+
+def _drops_injected(client: aioredis.Redis) -> bool:
+    link = getattr(client, "netem", None)
+    return link is not None and link.profile.drop_rate > 0
+
+
+async def _replay(
+    client: aioredis.Redis, failure: Failure, schedule: Schedule
+) -> Failure | None:
+    """failure と同じ卓の設定で、schedule のイベントだけを空のDBで投げ直す。"""
+    await client.flushdb()
+    run = StressRun(RedisClient(client), failure.per_client_order, _drops_injected(client))
+    table = Table(failure.table, failure.seed, failure.players, failure.deck_size)
+    return await run.play(table, len(schedule), _fixed(schedule))
+
+
+async def _shrink(
+    client: aioredis.Redis, failure: Failure, attempts: int, budget: int
+) -> Failure:
+    """違反が再現する範囲でイベントを削る（ddmin の補集合のみを試す簡易版）。"""
+    best = failure
+    runs = 0
+
+    async def reproduces(events: list[tuple[int, Event]]) -> Failure | None:
+        nonlocal runs
+        grouped: dict[int, list[Event]] = defaultdict(list)
+        for n, event in events:
+            grouped[n].append(event)
+        schedule = [grouped[n] for n in sorted(grouped)]
+        for _ in range(attempts):
+            runs += 1
+            result = await _replay(client, failure, schedule)
+            if result is not None and result.category == failure.category:
+                return result
+        return None
+
+    events = [(n, e) for n, round_events in enumerate(failure.schedule) for e in round_events]
+    chunks = 2
+    while len(events) >= 2 and runs < budget:
+        size = -(-len(events) // chunks)
+        for start in range(0, len(events), size):
+            result = await reproduces(events[:start] + events[start + size:])
+            if result is not None:
+                events = events[:start] + events[start + size:]
+                best = result
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if chunks >= len(events):
+                break
+            chunks = min(chunks * 2, len(events))
+    return best
+
+
+def _print_trace(failure: Failure) -> None:
+    print(
+        f"\nminimal trace (table {failure.table}, seed {failure.seed}, "
+        f"{sum(len(r) for r in failure.schedule)} events):"
+    )
+    for n, events in enumerate(failure.schedule, 1):
+        print(f"  round {n:>3}: " + " | ".join(f"P{p} {a}" for p, a in events))
+    for violation in failure.violations:
+        print(f"  -> {violation}")
+
+
+def _save(path: Path, failure: Failure) -> None:
+    path.write_text(json.dumps(asdict(failure), ensure_ascii=False) + "\n")
+
+
+def _load(path: Path) -> Failure:
+    data = json.loads(path.read_text())
+    data["schedule"] = [[(p, a) for p, a in events] for events in data["schedule"]]
+    return Failure(**data)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    link = link_from_args(args)
+    client = make_redis(args.redis_url, interleave=True, link=link)
+    try:
+        if args.redis_url and await client.dbsize() and not args.flush:
+            print("error: Redis is not empty (use --flush)", file=sys.stderr)
+            return 2
+        await client.flushdb()
+        # game_state の間引きを無効にし、遅延送信のタスクを残さない
+        state_publisher.interval = 0
+        # リプレイログはファイルに書かずにメモリに残し、検査で再生する
+        replay_recorder.in_memory = True
+
+        if args.replay:
+            saved = _load(Path(args.replay))
+            failure = await _replay(client, saved, saved.schedule)
+            if failure is None:
+                print("no violation")
+                return 0
+            _print_trace(failure)
+            return 1
+
+        for name, failure in await _run_scenarios(client, args.deck_size):
+            print(f"scenario {name} failed")
+            _print_trace(failure)
+            return 1
+
+        run = StressRun(RedisClient(client), not args.concurrent_per_client, _drops_injected(client))
+        planner = Planner(run, args.conflict_rate, args.disconnect_rate)
+        tables = [
+            Table(i, random.Random(f"{args.seed}:{i}").getrandbits(31), args.players, args.deck_size)
+            for i in range(args.tables)
+        ]
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run.play(t, args.rounds, planner) for t in tables))
+        elapsed = time.perf_counter() - started
+        failures = [f for f in results if f is not None]
+
+        stats = run.stats
+        rejected = sum(stats.rejected.values())
+        print(f"tables {args.tables} x {args.players} players, {args.rounds} rounds, seed {args.seed}")
+        print(
+            f"events {stats.events} in {elapsed:.2f}s "
+            f"({stats.events / elapsed:.0f}/s, including invariant checks)"
+        )
+        print(f"games started {stats.games}, disconnects {stats.disconnects}")
+        if stats.latencies:
+            latencies = sorted(stats.latencies)
+            print(
+                "event latency "
+                f"p50 {latencies[len(latencies) // 2] * 1000:.2f}ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms, "
+                f"max {latencies[-1] * 1000:.2f}ms"
+            )
+        if link is not None:
+            netem = client.netem  # type: ignore[attr-defined]
+            print(
+                f"link {link.describe()}: round trips {netem.round_trips}, "
+                f"drops {netem.drops}, injected delay {netem.delay:.2f}s"
+            )
+        print(
+            f"rejected {rejected} ({rejected / max(stats.events, 1):.1%}): "
+            + ", ".join(f"{code} {n}" for code, n in stats.rejected.most_common())
+        )
+        print(
+            f"conflicting rounds {stats.conflicts}: "
+            f"rejected {stats.conflicts_rejected}, "
+            f"duplicate both accepted {stats.double_accepted}"
+        )
+        print(f"tables with violations {len(failures)}")
+        if not failures:
+            return 0
+
+        for failure in failures:
+            print(f"  table {failure.table} round {failure.round + 1}: {failure.violations[0]}")
+        # 実際のRedisや通信路の模擬ではタイミングで結果が変わるため複数回試す
+        attempts = args.attempts or (3 if args.redis_url or link is not None else 1)
+        first = await _shrink(client, failures[0], attempts, args.shrink_budget)
+        _print_trace(first)
+        _save(Path(args.save), first)
+        print(f"\nsaved to {args.save} (python -m benchmarks.stress --replay {args.save})")
+        return 1
+    finally:
+        await client.aclose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="だるまあつめ 並行ストレステスト")
+    parser.add_argument("--redis-url", default=None, help="使用するRedis（未指定ならfakeredis）")
+    parser.add_argument("--flush", action="store_true", help="空でないRedisでも実行する（全キーを消す）")
+    parser.add_argument("--tables", type=int, default=20, help="同時に進める卓の数")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=300, help="1卓あたりのラウンド数")
+    parser.add_argument("--deck-size", type=int, default=40, help="山札の枚数（小さいほどゲームが早く終わる）")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--conflict-rate", type=float, default=0.3, help="競合するイベントを同時に投げるラウンドの割合"
+    )
+    parser.add_argument(
+        "--disconnect-rate", type=float, default=0.01, help="手番中に切断するラウンドの割合"
+    )
+    parser.add_argument(
+        "--concurrent-per-client",
+        action="store_true",
+        help="同じプレイヤーのイベントも並行に処理する（受信ループを並行化した場合を想定）",
+    )
+    parser.add_argument("--attempts", type=int, default=0, help="最小化で1手順を試す回数（既定: fakeredis 1, Redis 3）")
+    parser.add_argument("--shrink-budget", type=int, default=300, help="最小化で再実行する回数の上限")
+    parser.add_argument("--save", default="stress-failure.json", help="最小手順の保存先")
+    parser.add_argument("--replay", default=None, help="保存した手順を再実行する")
+    add_link_arguments(parser)
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -187,6 +187,7 @@ const gameReducer = (state: GameState, action: GameAction): GameState => {
         players: updatedPlayers,
         deckCount: action.deckCount,
         currentPlayer: action.currentPlayer,
+        roomStatus: "playing",
         phase: newPhase,
         stealableTargets: newPhase !== "steal" ? {} : state.stealableTargets,
       };
@@ -214,9 +215,13 @@ interface UseWebSocketReturn {
 
 export const useWebSocket = (
   playerId: string,
-  nickname: string
+  nickname: string,
+  roomId?: string
 ): UseWebSocketReturn => {
-  const wsUrl = `${import.meta.env.VITE_WS_URL ?? "ws://localhost:8000/ws"}/${playerId}`;
+  // room を付けるとマルチワーカー構成でルームの担当ワーカーに振り分けられる
+  const wsUrl =
+    `${import.meta.env.VITE_WS_URL ?? "ws://localhost:8000/ws"}/${playerId}` +
+    (roomId ? `?room=${encodeURIComponent(roomId)}` : "");
   const serviceRef = useRef<WebSocketService | null>(null);
   const [isConnected, setIsConnected] = useState(false);
   const [gameState, dispatch] = useReducer(
@@ -339,6 +344,14 @@ export const useWebSocket = (
           toast.success(`ゲーム終了！優勝: ${event.payload.winner}`);
           break;
 
+        case "server_draining":
+          toast.info("サーバーのメンテナンスのため再接続します");
+          break;
+
+        case "server_busy":
+          toast.warning("サーバーが混み合っています。しばらくしてから再接続します");
+          break;
+
         case "error":
           toast.error(event.payload.message);
           break;
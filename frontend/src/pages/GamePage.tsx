@@ -22,7 +22,7 @@ const GamePage: React.FC = () => {
   const nickname = state?.nickname ?? localStorage.getItem("nickname") ?? "";
 
   const hasJoinedRef = useRef(false);
-  const { gameState, isConnected, sendEvent} = useWebSocket(playerId, nickname);
+  const { gameState, isConnected, sendEvent} = useWebSocket(playerId, nickname, roomId);
 
   // WebSocket接続確立後、ルームに参加
   useEffect(() => {
@@ -58,9 +58,17 @@ const HomePage: React.FC = () => {
   const wrappedSendEvent = useCallback(
     (event: ClientEvent) => {
       handleSendEvent(event);
+      if (event.type === "join_room") {
+        // 参加はゲームページの ?room= 付き接続から送る（マルチワーカー構成ではロビーの接続が
+        // ルームの担当ワーカーにつながっているとは限らない）
+        navigate(`/game/${event.payload.room_id}`, {
+          state: { playerId: PLAYER_ID, nickname: event.payload.nickname },
+        });
+        return;
+      }
       sendEvent(event);
     },
-    [handleSendEvent, sendEvent]
+    [handleSendEvent, sendEvent, navigate]
   );
 
   return (
@@ -3,6 +3,8 @@ import { type ClientEvent, type ServerEvent } from "@/types/websocket";
 type EventHandler = (event: ServerEvent) => void;
 type ConnectionHandler = () => void;
 
+const RECONNECT_DELAY_MS = 3000;
+
 export class WebSocketService {
   private ws: WebSocket | null = null;
   private url: string;
@@ -11,6 +13,7 @@ export class WebSocketService {
   private onDisconnectHandlers: Set<ConnectionHandler> = new Set();
   private reconnectTimer: ReturnType<typeof setTimeout> | null = null;
   private shouldReconnect = false;
+  private reconnectDelayMs = RECONNECT_DELAY_MS;
 
   constructor(url: string) {
     this.url = url;
@@ -29,6 +32,18 @@ export class WebSocketService {
     this.ws.onmessage = (event: MessageEvent) => {
       try {
         const serverEvent = JSON.parse(event.data as string) as ServerEvent;
+        // サーバーのハートビート: 応答がないと一定時間後に切断される
+        if (serverEvent.type === "ping") {
+          this.send({ type: "pong", payload: {} });
+          return;
+        }
+        if (serverEvent.type === "server_busy") {
+          // 直後にサーバーから切断されるので、指定された時間だけ待って再接続する
+          this.reconnectDelayMs = serverEvent.payload.retry_after_ms;
+        }
+        if (serverEvent.type === "server_draining") {
+          this.migrate(serverEvent.payload.reconnect_url, serverEvent.payload.retry_after_ms);
+        }
         this.eventHandlers.forEach((handler) => handler(serverEvent));
       } catch {
         console.error("WebSocket message parse error:", event.data);
@@ -38,7 +53,8 @@ export class WebSocketService {
     this.ws.onclose = () => {
       this.onDisconnectHandlers.forEach((handler) => handler());
       if (this.shouldReconnect) {
-        this.reconnectTimer = setTimeout(() => this.connect(), 3000);
+        this.reconnectTimer = setTimeout(() => this.connect(), this.reconnectDelayMs);
+        this.reconnectDelayMs = RECONNECT_DELAY_MS;
       }
     };
 
@@ -47,6 +63,24 @@ export class WebSocketService {
     };
   }
 
+  // サーバーのドレイン通知: 指定時間後に自分から切断し、新しいインスタンスへ即座に再接続する
+  private migrate(reconnectUrl: string | null, retryAfterMs: number): void {
+    if (reconnectUrl) {
+      const target = new URL(this.url);
+      const next = new URL(reconnectUrl);
+      target.protocol = next.protocol;
+      target.host = next.host;
+      this.url = target.toString();
+    }
+    const ws = this.ws;
+    setTimeout(() => {
+      if (this.ws === ws && this.shouldReconnect) {
+        this.reconnectDelayMs = 0;
+        ws?.close();
+      }
+    }, retryAfterMs);
+  }
+
   disconnect(): void {
     this.shouldReconnect = false;
     if (this.reconnectTimer) {
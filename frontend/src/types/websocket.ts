@@ -1,4 +1,4 @@
-import type { GamePhase } from "@/types/game";
+import type { GamePhase, RoomStatus } from "@/types/game";
 
 // クライアント → サーバー イベント
 
@@ -12,11 +12,16 @@ export type ClientEvent =
   | { type: "skip_steal"; payload: Record<string, never> }
   | { type: "confirm_burst"; payload: Record<string, never> }
   | { type: "end_turn"; payload: Record<string, never> }
-  | { type: "leave_room"; payload: Record<string, never> };
+  | { type: "leave_room"; payload: Record<string, never> }
+  | { type: "watch_room"; payload: { room_id: string } }
+  | { type: "quick_play"; payload: { nickname: string; max_players: number } }
+  | { type: "cancel_quick_play"; payload: Record<string, never> }
+  | { type: "pong"; payload: Record<string, never> };
 
 // サーバー → クライアント イベント
 
 export type ServerEvent =
+  | { type: "ping"; payload: Record<string, never> }
   | { type: "room_created"; payload: { room_id: string } }
   | {
       type: "player_joined";
@@ -83,6 +88,11 @@ export type ServerEvent =
         scores: Record<string, number>;
         current_player: string;
         phase: GamePhase;
+        hint: {
+          burst_probability: number;
+          steal_values: number[];
+          steal_probability: number;
+        } | null;
       };
     }
   | {
@@ -92,6 +102,44 @@ export type ServerEvent =
         rankings: { player: string; score: number }[];
       };
     }
+  | {
+      type: "room_watched";
+      payload: {
+        room_id: string;
+        status: RoomStatus;
+        players: string[];
+        spectator_count: number;
+      };
+    }
+  | {
+      type: "match_queued";
+      payload: {
+        max_players: number;
+      };
+    }
+  | {
+      type: "match_found";
+      payload: {
+        room_id: string;
+        nickname: string;
+        max_players: number;
+        players: string[];
+      };
+    }
+  | {
+      type: "server_busy";
+      payload: {
+        reason: "too_many_connections" | "capacity" | "overloaded";
+        retry_after_ms: number;
+      };
+    }
+  | {
+      type: "server_draining";
+      payload: {
+        reconnect_url: string | null;
+        retry_after_ms: number;
+      };
+    }
   | {
       type: "error";
       payload: {
@@ -107,4 +155,8 @@ export type ErrorCode =
   | "NOT_YOUR_TURN"
   | "INVALID_PHASE"
   | "CANNOT_STEAL"
-  | "ALREADY_IN_ROOM";
+  | "ALREADY_IN_ROOM"
+  | "ALREADY_QUEUED"
+  | "SERVER_BUSY"
+  | "SERVER_DRAINING"
+  | "WRONG_WORKER";